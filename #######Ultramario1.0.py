@@ -6,20 +6,48 @@ Built with Ursina Engine
 """
 
 from ursina import *
-import math, random
+import math, os, random, threading
+from engine.ecs import World
+from engine.events import EventBus, PICKUP, STOMP, DAMAGE, DEATH, LEVEL_CLEAR
+from engine.lod import LodGroup, UpdateLOD, fog_distance
+from engine.movers import PathMovers
+from engine.profiler import Sampler
+from engine.scores import Scores
+
+LAUNCHED = time.perf_counter()
 
 # Initialize Ursina
-app = Ursina()
+# ULTRAMARIO_WINDOW=offscreen|none runs without a visible window (benchmarks)
+WINDOW_TYPE = os.environ.get('ULTRAMARIO_WINDOW', 'onscreen')
+HEADLESS = WINDOW_TYPE == 'none'
+app = Ursina(window_type=WINDOW_TYPE)
 
 # Game Configuration
-window.title = 'Ultra Mario 3D Bros PC Port'
-window.borderless = False
-window.fullscreen = False
-window.exit_button.visible = False
-window.fps_counter.enabled = True
+if WINDOW_TYPE == 'onscreen':
+    window.title = 'Ultra Mario 3D Bros PC Port'
+    window.borderless = False
+    window.fullscreen = False
+    window.exit_button.visible = False
+    window.fps_counter.enabled = True
+
+# Opt-in: run coin/goomba/platform behaviour as batched systems (engine.ecs)
+# instead of one update() call per entity.
+USE_ECS = os.environ.get('ULTRAMARIO_ECS') == '1'
+
+# Gameplay telemetry; set MARIO_EVENT_LOG=run.jsonl to keep a log
+events = EventBus.from_env('ultramario3d')
+
+# Runs and their coins in scores.db (MARIO_SCORES= to turn off). This port
+# steps once per rendered frame, so run times are counted in 60ths of a second.
+scores = Scores.from_env('ultramario3d', lambda: int(time.perf_counter() * 60), last='ultramario3d')
+events.subscribe(scores.on_event)
+
+# F8 starts/stops a sampling profile; MARIO_PROFILE=out.folded records from start-up
+profiler = Sampler.from_env('ultramario3d')
 
 # Sky and lighting
-Sky(color=color.rgb(135, 206, 235))
+if not HEADLESS:
+    Sky(color=color.rgb(135, 206, 235))
 scene.fog_color = color.rgb(135, 206, 235)
 scene.fog_density = 0.02
 light = DirectionalLight()
@@ -48,9 +76,15 @@ class MainMenu(Entity):
                                   color=color.red, text_color=color.white,
                                   highlight_color=color.gray)
 
+        self.loading_text = Text("Loading 0%", parent=self, y=-0.35,
+                                 origin=(0, 0), scale=1.2, color=color.light_gray)
+
         self.start_button.on_click = self.start_game
         self.quit_button.on_click = application.quit
 
+    def show_progress(self, progress):
+        self.loading_text.text = "Ready" if progress >= 1 else f"Loading {int(progress * 100)}%"
+
     def start_game(self):
         destroy(self)   # remove menu
         start_game()    # launch main game loop
@@ -74,14 +108,7 @@ class Mario(Entity):
         self.velocity = Vec3(0, 0, 0)
         self.grounded = False
         self.double_jump_available = True
-
-        # Camera setup
         self.camera_pivot = Entity(parent=self, y=2)
-        camera.parent = self.camera_pivot
-        camera.position = (0, 1, -10)
-        camera.rotation = (0, 0, 0)
-        camera.fov = 90
-        mouse.locked = True
 
         # Collision
         self.collider = BoxCollider(self, size=(1, 2, 1))
@@ -91,6 +118,15 @@ class Mario(Entity):
         self.health = 3
         self.invulnerable_timer = 0
 
+    def take_control(self):
+        # Camera setup
+        camera.parent = self.camera_pivot
+        camera.position = (0, 1, -10)
+        camera.rotation = (0, 0, 0)
+        if not HEADLESS:
+            camera.fov = 90
+            mouse.locked = True
+
     def update(self):
         # Camera rotation with mouse
         self.rotation_y += mouse.velocity[0] * 40
@@ -153,17 +189,52 @@ class Mario(Entity):
             self.game_over()
 
     def game_over(self):
+        events.emit(DEATH, *self.position, value=self.coins)
         print("Game Over! Final Score:", self.coins)
         application.quit()
 
     def collect_coin(self):
         self.coins += 1
-        print(f"Coins: {self.coins}")
+        events.emit(PICKUP, *self.position, value=self.coins)
 
 
 # -------------------------------------------------
 # Collectibles, Enemies, Platforms, Level
 # -------------------------------------------------
+movers = PathMovers()   # shared paths for platforms and patrolling enemies
+world = World() if USE_ECS else None
+
+# Update LOD: full rate near Mario, every 4th frame out to where the fog hides
+# things, nothing beyond that or behind the camera.
+lod = UpdateLOD(near=25, far=fog_distance(scene.fog_density), mid_interval=4)
+lod_entities = LodGroup()   # coins/goombas whose advance(dt) runs in Python
+
+
+def forget(entity):
+    movers.remove(entity)
+    lod_entities.remove(entity)
+    if world:
+        world.remove(entity)
+    destroy(entity)
+
+
+def touch_coin(coin):
+    mario.collect_coin()
+    forget(coin)
+
+
+def touch_goomba(goomba):
+    if mario.invulnerable_timer <= 0:
+        if mario.velocity.y < -2:
+            events.emit(STOMP, *goomba.position)
+            forget(goomba)
+            mario.velocity.y = 10
+        else:
+            mario.health -= 1
+            mario.invulnerable_timer = 2
+            events.emit(DAMAGE, *mario.position, value=mario.health)
+
+
 class MarioCoin(Entity):
     def __init__(self, position=(0, 0, 0)):
         super().__init__(model='sphere', color=color.yellow, scale=0.5,
@@ -173,15 +244,21 @@ class MarioCoin(Entity):
         self.bob_height = 0.2
         self.start_y = position[1]
         self.time = random.random() * math.pi * 2
+        self.ignore = True   # driven by SystemRunner
+        if world:
+            world.add(self, position, spin=self.rotation_speed,
+                      bob=(self.bob_height, self.bob_speed, self.time),
+                      proximity=(1.5, touch_coin))
+        else:
+            lod_entities.add(self, position, reach=self.bob_height)
 
-    def update(self):
-        self.rotation_y += self.rotation_speed * time.dt
-        self.time += time.dt
+    def advance(self, dt):
+        self.rotation_y += self.rotation_speed * dt
+        self.time += dt
         self.y = self.start_y + math.sin(self.time * self.bob_speed) * self.bob_height
 
         if distance(self.position, mario.position) < 1.5:
-            mario.collect_coin()
-            destroy(self)
+            touch_coin(self)
 
 
 class Goomba(Entity):
@@ -189,27 +266,21 @@ class Goomba(Entity):
         super().__init__(model='cube', color=color.green, scale=(1, 1, 1),
                          position=position, collider='box')
         self.patrol_points = patrol_points or [position]
-        self.current_patrol_index = 0
         self.speed = 2
-
-    def update(self):
-        if len(self.patrol_points) > 1:
-            target = self.patrol_points[self.current_patrol_index]
-            direction = (Vec3(*target) - self.position).normalized()
-            self.position += direction * self.speed * time.dt
-
-            if distance(self.position, target) < 0.5:
-                self.current_patrol_index = (self.current_patrol_index + 1) % len(self.patrol_points)
-
+        patrol = (self.patrol_points, self.speed) if len(self.patrol_points) > 1 else None
+        self.ignore = True   # driven by SystemRunner
+        if world:
+            world.add(self, position, patrol=patrol, proximity=(1.5, touch_goomba))
+            return
+        if patrol:
+            movers.add(self, *patrol)
+        # anywhere on the patrol route counts as in range
+        home = [sum(p[i] for p in self.patrol_points) / len(self.patrol_points) for i in range(3)]
+        lod_entities.add(self, home, reach=max(distance(home, p) for p in self.patrol_points))
+
+    def advance(self, dt):
         if distance(self.position, mario.position) < 1.5:
-            if mario.invulnerable_timer <= 0:
-                if mario.velocity.y < -2:
-                    destroy(self)
-                    mario.velocity.y = 10
-                else:
-                    mario.health -= 1
-                    mario.invulnerable_timer = 2
-                    print(f"Health: {mario.health}")
+            touch_goomba(self)
 
 
 class MarioPlatform(Entity):
@@ -219,32 +290,75 @@ class MarioPlatform(Entity):
         self.start_position = position
         self.end_position = end_position
         self.speed = speed
-        self.direction = 1
-        self.progress = 0
+        if world:
+            world.add(self, position, pingpong=(end_position, speed))
+        else:
+            movers.add_pingpong(self, position, end_position, speed)
+
 
+class SystemRunner(Entity):
+    """Runs the batched systems: one update() call for every mover and ECS entity.
+
+    Simulation always advances for everything; only the per-entity work
+    (transform write-back, Python advance()) is thinned out by the LOD.
+    """
     def update(self):
-        self.progress += self.direction * self.speed * time.dt
-        if self.progress >= 1:
-            self.progress, self.direction = 1, -1
-        elif self.progress <= 0:
-            self.progress, self.direction = 0, 1
-        self.position = lerp(Vec3(*self.start_position), Vec3(*self.end_position), self.progress)
+        lod.begin_frame()
+        eye, forward = camera.world_position, camera.forward
+        if movers.count:
+            positions = movers.step(time.dt)
+            movers.write_back(lod.due(positions, eye, forward))
+        for entity, dt in lod_entities.tick(lod, eye, forward, time.dt):
+            entity.advance(dt)
+        if world:
+            world.step(time.dt, target=tuple(mario.position))
+            world.write_back(lod.due(world.transforms.col('pos'), eye, forward))
+
+
+LEVEL_DATA = {
+    'coins': [(x, 3, 0) for x in range(10, 50, 10)],
+    'goombas': [((15, 1, 0), [(15, 1, 0), (25, 1, 0)])],
+    'goal': (45, 5, 0),
+}
 
 
 class MarioLevel:
-    def __init__(self):
-        ground = Entity(model='cube', color=color.gray, scale=(50, 1, 50),
-                        position=(0, 0, 0), collider='box')
+    def __init__(self, data=LEVEL_DATA, staged=False):
+        self.entities = []
+        self.steps = self.build(data, enabled=not staged)
+        if not staged:
+            for _ in self.steps:
+                pass
+
+    def build(self, data, enabled=True):
+        """Create the level one entity at a time, yielding the fraction done."""
+        total = 2 + len(data['coins']) + len(data['goombas'])
+
+        def add(entity):
+            entity.enabled = enabled
+            self.entities.append(entity)
+            return entity
+
+        self.ground = add(Entity(model='cube', color=color.gray, scale=(50, 1, 50),
+                                 position=(0, 0, 0), collider='box'))
+        yield len(self.entities) / total
 
         # Coins
-        self.coins = [MarioCoin(position=(x, 3, 0)) for x in range(10, 50, 10)]
+        self.coins = []
+        for position in data['coins']:
+            self.coins.append(add(MarioCoin(position=position)))
+            yield len(self.entities) / total
 
         # Enemies
-        self.enemies = [Goomba(position=(15, 1, 0), patrol_points=[(15, 1, 0), (25, 1, 0)])]
+        self.enemies = []
+        for position, patrol_points in data['goombas']:
+            self.enemies.append(add(Goomba(position=position, patrol_points=patrol_points)))
+            yield len(self.entities) / total
 
         # Goal
-        self.goal = Entity(model='cube', color=color.magenta, scale=(1, 5, 1),
-                           position=(45, 5, 0), collider='box')
+        self.goal = add(Entity(model='cube', color=color.magenta, scale=(1, 5, 1),
+                               position=data['goal'], collider='box'))
+        yield 1.0
 
 
 class MarioUI:
@@ -254,18 +368,120 @@ class MarioUI:
 
 
 # -------------------------------------------------
-# Game Start Wrapper
+# Preloading
 # -------------------------------------------------
-def start_game():
+MODELS = ('cube', 'sphere', 'quad')
+
+
+def build_scene():
+    """Create Mario, the level and the HUD hidden, yielding progress 0..1."""
     global mario, level, ui
     mario = Mario()
-    level = MarioLevel()
+    mario.enabled = False
+    yield 0.1
+    level = MarioLevel(staged=True)
+    for done in level.steps:
+        yield 0.1 + 0.8 * done
     ui = MarioUI()
+    ui.coin_text.enabled = ui.health_text.enabled = False
+    yield 1.0
+
+
+class Preloader(Entity):
+    """Builds the game scene behind the menu.
+
+    Model files are parsed on a background thread; entities are then created
+    on the main thread in slices of at most `budget` seconds per frame so the
+    menu stays responsive. Finally the models are prepared on the GPU.
+    """
+    def __init__(self, on_progress=None, budget=0.004):
+        super().__init__()
+        self.on_progress = on_progress
+        self.budget = budget
+        self.progress = 0.0
+        self.ready = False
+        self.steps = None
+        self.started = time.perf_counter()
+        self.finished = None
+        self.assets_loaded = threading.Event()
+        threading.Thread(target=self.load_assets, name='preload', daemon=True).start()
+
+    def load_assets(self):
+        for name in MODELS:
+            load_model(name, application.internal_models_compressed_folder)
+        self.assets_loaded.set()
+
+    def update(self):
+        if self.ready:
+            return
+        if self.steps is None:
+            if not self.assets_loaded.is_set():
+                return
+            self.steps = build_scene()
+        deadline = time.perf_counter() + self.budget
+        while time.perf_counter() < deadline:
+            if not self.advance():
+                break
+        if self.on_progress:
+            self.on_progress(self.progress)
+
+    def advance(self):
+        try:
+            self.progress = next(self.steps)
+            return True
+        except StopIteration:
+            self.prepare()
+            return False
+
+    def prepare(self):
+        # upload geometry, textures and shaders before the first gameplay frame
+        if application.base.win:
+            gsg = application.base.win.getGsg()
+            for entity in [mario] + level.entities:
+                if entity.model:
+                    entity.model.prepareScene(gsg)
+        self.ready = True
+        self.finished = time.perf_counter()
+
+    def finish(self):
+        """Complete whatever is left synchronously (start pressed early)."""
+        self.assets_loaded.wait()
+        if self.steps is None:
+            self.steps = build_scene()
+        while not self.ready:
+            self.advance()
+        destroy(self)
+
+
+# -------------------------------------------------
+# Game Start Wrapper
+# -------------------------------------------------
+def start_game():
+    global mario, level, ui
+    clicked = time.perf_counter()
+    preloaded = preloader.ready
+    preloader.finish()
+    for entity in [mario, ui.coin_text, ui.health_text] + level.entities:
+        entity.enabled = True
+    mario.take_control()
+    SystemRunner()
+    scores.start()
+    first_frame = True
 
     def update_ui():
+        nonlocal first_frame
+        if first_frame:
+            first_frame = False
+            now = time.perf_counter()
+            print(f"Time to interactive: {(now - clicked) * 1000:.1f} ms after Start "
+                  f"(scene {'preloaded' if preloaded else 'finished on click'}, "
+                  f"preload took {(preloader.finished - preloader.started) * 1000:.1f} ms, "
+                  f"{(now - LAUNCHED):.2f} s since launch)")
+        events.tick()
         ui.coin_text.text = f'Coins: {mario.coins}'
         ui.health_text.text = f'Health: {mario.health}'
         if distance(mario.position, level.goal.position) < 2:
+            events.emit(LEVEL_CLEAR, *mario.position, value=mario.coins)
             print(f"Level Complete! Score: {mario.coins}")
             application.quit()
 
@@ -274,13 +490,24 @@ def start_game():
             mouse.locked = not mouse.locked
         if key == 'r':
             mario.respawn()
+        if key == 'f8':
+            profiler.toggle()
 
     globals()['update'] = update_ui
     globals()['input'] = input
 
 
+def profile_tag():
+    # mario only exists once the preloader has built the scene
+    playing = 'mario' in globals() and mario.enabled
+    return ('PLAYING' if playing else 'MENU'), events.frame
+
+
 # -------------------------------------------------
 # Run with Menu First
 # -------------------------------------------------
 menu = MainMenu()
-app.run()
+preloader = Preloader(on_progress=menu.show_progress)
+profiler.attach(profile_tag)
+if __name__ == '__main__':
+    app.run()
@@ -1,20 +1,48 @@
-import pygame, sys
+import os, pygame, sys, threading
+from collections import namedtuple
+from engine import levelfile, savestate, simthread, sweep, tiles
+from engine.atlas import Atlas
+from engine.particles import Particles
+from engine.loop import SNAP, FixedStep, Interpolator, LatencyMeter, render_fps
+from engine.capture import Recorder
+from engine.present import Presenter, display_mode
+from engine.profiler import Sampler
+from engine.text import Labels
+from engine.rewind import Rewind
+from engine.scores import Scores
+from engine.events import EventBus, PICKUP, STOMP, DEATH, LEVEL_CLEAR, BUMP
 
 # ========================
 # Initialization
 # ========================
 pygame.init()
 SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+window = pygame.display.set_mode(*display_mode((SCREEN_WIDTH, SCREEN_HEIGHT)))
+presenter = Presenter(window, (SCREEN_WIDTH, SCREEN_HEIGHT), capture=Recorder.from_env("1-1"))   # MARIO_WINDOW=3840x2160 MARIO_SCALE=integer
+screen = presenter.target   # everything draws at 800x600, then one scale to the window
 pygame.display.set_caption("Ultra Mario 2D Bros v0.x 1.0 - SMB1 1-1 (Pygame)")
 clock = pygame.time.Clock()
-FPS = 60
+FPS = 60                       # simulation rate; gameplay always steps 1/60 s
+RENDER_FPS = render_fps()      # MARIO_RENDER_FPS=0 draws uncapped
+latency = LatencyMeter.from_env("1-1")   # MARIO_LATENCY=1 prints input-to-present latency on exit
+events = EventBus.from_env("1-1")   # MARIO_EVENT_LOG=run.jsonl to record
+particles = Particles()   # coin, stomp and bump bursts come from events
+events.subscribe(particles.on_event)
+scores = Scores.from_env("1-1", lambda: events.frame, last="1-1")   # runs and time left in scores.db; MARIO_SCORES= to turn off
+events.subscribe(scores.on_event)
+QUICKSAVE = "quicksave-1-1.msav"   # F5 saves, F9 restores
+REWIND_KEY = pygame.K_BACKSPACE     # hold to rewind, up to 60 s
+PROFILE_KEY = pygame.K_F8           # start/stop a profile (MARIO_PROFILE=out.folded from start-up)
+profiler = Sampler.from_env("1-1")
+LEVEL_FILE = os.environ.get("MARIO_LEVEL") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels", "1-1.txt")
+WATCH_LEVEL = os.environ.get("MARIO_WATCH_LEVEL") == "1"   # apply edits to LEVEL_FILE while playing
 
 # ========================
 # Constants
 # ========================
 TILE = 16
 MENU, PLAYING, LEVEL_COMPLETE, HOWTO, DEAD = 0, 1, 2, 3, 4
+STATE_NAMES = ("MENU", "PLAYING", "LEVEL_COMPLETE", "HOWTO", "DEAD")
 SKY_BLUE = (107, 140, 255)
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -26,10 +54,15 @@ SKIN = (255, 220, 177)
 GREEN = (40, 170, 40)
 GRAY = (160, 160, 160)
 GROUND_TOP = SCREEN_HEIGHT - TILE*2
+CHUNK, MAX_CHUNKS = 256, 12        # cached background strips (px wide, kept)
+MERGE_SPAN = 1024                  # static solids are merged for collision this many px at a time
+CHUNK_KEY = (255, 0, 255)
+LEVEL_1_1 = levelfile.read(LEVEL_FILE)
 
 # Fonts
 title_font = pygame.font.SysFont("Arial", 36, bold=True)
 menu_font = pygame.font.SysFont("Arial", 20, bold=True)
+title_text, menu_text = Labels(title_font), Labels(menu_font)   # re-rendered only when the text changes
 
 def make_surface(w, h, color, border=True):
     surf = pygame.Surface((w, h), pygame.SRCALPHA)
@@ -38,6 +71,13 @@ def make_surface(w, h, color, border=True):
         pygame.draw.rect(surf, BLACK, (0,0,w-1,h-1), 1)
     return surf
 
+# Display-format copies of every sprite, packed into sheets once the level is built
+atlas = Atlas()
+
+# One surface per (size, colour): tiles share it and must never draw on it
+def shared_surface(w, h, color, border=True):
+    return atlas.get(("tile", w, h, color, border), lambda: make_surface(w, h, color, border))
+
 # ========================
 # NES Mario sprite
 # ========================
@@ -57,7 +97,12 @@ def create_mario():
     pygame.draw.rect(surf, BROWN, (9, 15, 3, 1))
     return surf
 
-def create_goomba_surface():
+def create_luigi():
+    surf = create_mario()
+    with pygame.PixelArray(surf) as px: px.replace(RED, GREEN)
+    return surf
+
+def draw_goomba():
     surf = pygame.Surface((16, 16), pygame.SRCALPHA)
     pygame.draw.ellipse(surf, BROWN, (1, 5, 14, 10))
     pygame.draw.rect(surf, BROWN, (2, 10, 12, 6))
@@ -67,69 +112,95 @@ def create_goomba_surface():
     pygame.draw.rect(surf, BLACK, (9, 13, 2, 2))
     return surf
 
+def create_goomba_surface(): return atlas.get("goomba", draw_goomba)
+
+def squashed_goomba_surface():
+    return atlas.get("goomba_squashed", lambda: pygame.transform.scale(draw_goomba(), (16, 8)))
+
 # ========================
 # Entities
 # ========================
-class Entity(pygame.sprite.Sprite):
-    def __init__(self):
-        super().__init__()
-        self.image = None
-        self.rect = pygame.Rect(0,0,0,0)
+# Slotted, no pygame.sprite bookkeeping: 1-1 keeps everything in plain lists.
+# Wrap one in tiles.SpriteAdapter if a sprite group is ever needed.
+class Entity(tiles.Tile):
+    __slots__ = ()
+    def __init__(self, kind=tiles.EMPTY):
+        super().__init__(pygame.Rect(0,0,0,0), kind, None)
 
 class Solid(Entity):
-    def __init__(self, x, y, w, h, color=BROWN):
-        super().__init__()
-        self.image = make_surface(w, h, color)
+    __slots__ = ()
+    def __init__(self, x, y, w, h, color=BROWN, kind=tiles.GROUND):
+        super().__init__(kind)
+        self.image = shared_surface(w, h, color)
         self.rect = self.image.get_rect(topleft=(x, y))
 
 class Block(Solid):
+    __slots__ = ('used', 'bump_timer')
+    KINDS = {'brick': tiles.BRICK, 'question': tiles.QUESTION}
     def __init__(self, x, y, kind='brick'):
-        color = (185, 70, 20) if kind == 'brick' else YELLOW
-        super().__init__(x, y, TILE, TILE, color)
-        self.kind = kind
-        self.used = False if kind == 'question' else None
+        kind = self.KINDS.get(kind, kind)
+        color = (185, 70, 20) if kind == tiles.BRICK else YELLOW
+        super().__init__(x, y, TILE, TILE, color, kind)
+        self.used = False if kind == tiles.QUESTION else None
         self.bump_timer = 0
 
     def on_head_hit(self, player):
         self.bump_timer = 6
-        if self.kind == 'question' and not self.used:
+        events.emit(BUMP, self.rect.centerx, self.rect.top)
+        if self.kind == tiles.QUESTION and not self.used:
             self.used = True
+            events.emit(PICKUP, self.rect.centerx, self.rect.top)
 
     def update(self):
         if self.bump_timer > 0:
             self.bump_timer -= 1
 
-    def draw(self, surface, camera_x=0):
+    def sprite(self):
         offset_y = -2 if self.bump_timer > 0 else 0
-        img = self.image.copy()
-        if self.kind == 'question':
-            pygame.draw.rect(img, YELLOW if not self.used else GRAY, (0,0,TILE-1,TILE-1))
-            pygame.draw.rect(img, BLACK, (0,0,TILE-1,TILE-1), 1)
-            if not self.used:
-                pygame.draw.circle(img, BLACK, (8, 6), 2)
-                pygame.draw.rect(img, BLACK, (7, 9, 2, 4))
-        elif self.kind == 'brick':
-            pygame.draw.rect(img, (180,80,40), (0,0,TILE-1,TILE-1))
-            pygame.draw.rect(img, BLACK, (0,0,TILE-1,TILE-1), 1)
-        surface.blit(img, (self.rect.x - camera_x, self.rect.y + offset_y))
+        return (self, block_face(self.kind, self.used), self.rect.x, self.rect.y + offset_y)
+
+# Block faces are drawn once per (kind, used) instead of on a copy every frame
+def draw_block_face(kind, used):
+    color = (185, 70, 20) if kind == tiles.BRICK else YELLOW
+    img = make_surface(TILE, TILE, color)
+    if kind == tiles.QUESTION:
+        pygame.draw.rect(img, YELLOW if not used else GRAY, (0,0,TILE-1,TILE-1))
+        pygame.draw.rect(img, BLACK, (0,0,TILE-1,TILE-1), 1)
+        if not used:
+            pygame.draw.circle(img, BLACK, (8, 6), 2)
+            pygame.draw.rect(img, BLACK, (7, 9, 2, 4))
+    elif kind == tiles.BRICK:
+        pygame.draw.rect(img, (180,80,40), (0,0,TILE-1,TILE-1))
+        pygame.draw.rect(img, BLACK, (0,0,TILE-1,TILE-1), 1)
+    return img
+
+def block_face(kind, used):
+    return atlas.get(("block", kind, used), draw_block_face, kind, used)
 
 class Pipe(Solid):
+    __slots__ = ()
     def __init__(self, tile_x, height_tiles):
         x = tile_x * TILE
         top_y = GROUND_TOP - height_tiles * TILE
-        super().__init__(x, top_y, TILE*2, height_tiles*TILE, GREEN)
+        super().__init__(x, top_y, TILE*2, height_tiles*TILE, GREEN, tiles.PIPE)
 
 class Flagpole(Entity):
+    __slots__ = ()
     def __init__(self, x):
-        super().__init__()
-        self.image = pygame.Surface((3, TILE*10), pygame.SRCALPHA)
-        pygame.draw.rect(self.image, (235,235,235), (0,0,3,TILE*10))
-        pygame.draw.circle(self.image, (235,235,235), (1, 3), 3)
+        super().__init__(tiles.FLAG)
+        self.image = atlas.get("flagpole", self.draw_pole)
         self.rect = self.image.get_rect(bottomleft=(x, GROUND_TOP))
+    @staticmethod
+    def draw_pole():
+        surf = pygame.Surface((3, TILE*10), pygame.SRCALPHA)
+        pygame.draw.rect(surf, (235,235,235), (0,0,3,TILE*10))
+        pygame.draw.circle(surf, (235,235,235), (1, 3), 3)
+        return surf
 
 class Goomba(Entity):
+    __slots__ = ('vx', 'alive', 'squash_timer')
     def __init__(self, x, y):
-        super().__init__()
+        super().__init__(tiles.GOOMBA)
         self.image = create_goomba_surface()
         self.rect = self.image.get_rect(topleft=(x,y))
         self.vx = -1
@@ -140,36 +211,26 @@ class Goomba(Entity):
         if not self.alive:
             self.squash_timer -= 1
             return
-        self.rect.y += 4
-        for s in solids:
-            if self.rect.colliderect(s.rect):
-                self.rect.bottom = s.rect.top
-                break
-        self.rect.x += self.vx
-        for s in solids:
-            if self.rect.colliderect(s.rect):
-                if self.vx > 0: self.rect.right = s.rect.left
-                else: self.rect.left = s.rect.right
-                self.vx *= -1
-                break
+        sweep.move(self.rect, 0, 4, solids)
+        if sweep.move(self.rect, self.vx, 0, solids): self.vx *= -1
 
     def stomp(self):
         self.alive = False
         self.squash_timer = FPS // 2
-        self.image = pygame.transform.scale(self.image, (16, 8))
+        self.image = squashed_goomba_surface()
         self.rect = self.image.get_rect(midbottom=self.rect.midbottom)
 
-    def draw(self, surface, camera_x=0):
+    def sprite(self):
         if self.alive or self.squash_timer > 0:
-            surface.blit(self.image, (self.rect.x - camera_x, self.rect.y))
+            return (self, self.image, self.rect.x, self.rect.y)
 
 # ========================
 # Player
 # ========================
 class Player(Entity):
     def __init__(self, x, y):
-        super().__init__()
-        self.image = create_mario()
+        super().__init__(tiles.PLAYER)
+        self.image = atlas.get("mario", create_mario)
         self.rect = self.image.get_rect(topleft=(x, y))
         self.vel_x = 0
         self.vel_y = 0
@@ -177,7 +238,7 @@ class Player(Entity):
         self.spawn = pygame.Vector2(x, y)
 
     def update(self, keys, solids, blocks, enemies):
-        prev_rect = self.rect.copy()
+        prev_bottom = self.rect.bottom
         accel, max_speed, friction = 0.5, 3.2, 0.85
         if keys[pygame.K_LEFT]: self.vel_x -= accel
         if keys[pygame.K_RIGHT]: self.vel_x += accel
@@ -185,30 +246,29 @@ class Player(Entity):
             self.vel_x *= friction
             if abs(self.vel_x) < 0.05: self.vel_x = 0
         self.vel_x = max(-max_speed, min(max_speed, self.vel_x))
-        self.rect.x += int(self.vel_x)
-        for s in solids:
-            if self.rect.colliderect(s.rect):
-                if self.vel_x > 0: self.rect.right = s.rect.left
-                elif self.vel_x < 0: self.rect.left = s.rect.right
-                self.vel_x = 0
+        # swept per axis: stop flush at the nearest solid in the way (engine/sweep.py)
+        if sweep.move(self.rect, int(self.vel_x), 0, solids): self.vel_x = 0
         self.vel_y += 0.5
         if self.vel_y > 8: self.vel_y = 8
         dy = int(self.vel_y)
         self.on_ground = False
-        self.rect.y += dy
-        for s in solids:
-            if self.rect.colliderect(s.rect):
-                if dy > 0:
-                    self.rect.bottom = s.rect.top; self.vel_y = 0; self.on_ground = True
-                elif dy < 0:
-                    self.rect.top = s.rect.bottom; self.vel_y = 0
-                    if isinstance(s, Block): s.on_head_hit(self)
+        hit = sweep.move(self.rect, 0, dy, solids)
+        if hit:
+            self.vel_y = 0
+            if dy > 0: self.on_ground = True
+            else:
+                # bump the block most of the head is under
+                block = next((s for s in hit.solids if isinstance(s, Block)), None)
+                if block: block.on_head_hit(self)
         for e in enemies:
             if not getattr(e, 'alive', True) and e.squash_timer <= 0: continue
             if self.rect.colliderect(e.rect):
-                if dy > 0 and prev_rect.bottom <= e.rect.top:
+                if dy > 0 and prev_bottom <= e.rect.top:
+                    events.emit(STOMP, e.rect.centerx, e.rect.top)
                     e.stomp(); self.vel_y = -6
-                else: return DEAD
+                else:
+                    events.emit(DEATH, self.rect.centerx, self.rect.bottom)
+                    return DEAD
         return PLAYING
 
     def jump(self):
@@ -223,123 +283,378 @@ class Player(Entity):
 # Level
 # ========================
 class Level:
+    """Solids, blocks, goombas and the flag, built from level file entries.
+
+    Collision goes through a column index and the static solids are drawn
+    from cached CHUNK-wide strips; apply() edits both for only the region an
+    entry covers, which is what lets a reload skip the full rebuild.
+
+    Collision does not see the static solids themselves: ground, pipes and
+    stairs are merged into the fewest rects that cover them
+    (tiles.merge_rects), grouped by the MERGE_SPAN px of level their left
+    edge is in, and only Blocks stay individual. A span whose solids don't
+    merge into fewer rects keeps them as they are. An edit re-merges its
+    span before the next query.
+
+    With MARIO_SIM_THREAD=1 a reload's apply() runs on the simulation thread
+    while draw() renders chunks on the main one, so both hold `lock`.
+    """
     def __init__(self):
         self.solids, self.blocks, self.enemies = [], [], []
         self.flag = None
         self.length_px = 0
+        self.index = tiles.ColumnIndex(4*TILE)       # all solids, for drawing
+        self.colliders = tiles.ColumnIndex(4*TILE)   # blocks and merged static solids
+        self.merged = {}     # span number -> its colliders
+        self.unmerged = set()   # spans edited since they were last merged
+        self.entries = []    # level file entries, in file order
+        self.objects = {}    # entry -> objects made for each copy of it
+        self.chunks = {}     # chunk number -> Surface with the static solids
+        self.lock = threading.Lock()   # held by apply() and draw()
 
     def add_block(self, block):
-        self.blocks.append(block); self.solids.append(block)
+        self.blocks.append(block); self.add_solid(block)
 
-    def add_solid(self, solid): self.solids.append(solid)
+    def add_solid(self, solid):
+        self.solids.append(solid); self.index.add(solid); self.invalidate(solid.rect)
+        if isinstance(solid, Block): self.colliders.add(solid)
     def add_enemy(self, e): self.enemies.append(e)
     def all_solids(self): return self.solids
 
+    def near(self, rect):
+        """Colliders that rect can touch this tick; blocks keep their self.solids order."""
+        if self.unmerged: self.merge()
+        return self.colliders.nearby(rect.inflate(2*TILE, 2*TILE))
+
+    def all_colliders(self):
+        if self.unmerged: self.merge()
+        order = self.colliders.order
+        return sorted(order, key=order.__getitem__)
+
+    def merge(self):
+        """Re-merge the static solids of every span edited since the last merge."""
+        for span in self.unmerged:
+            for tile in self.merged.pop(span, ()): self.colliders.remove(tile)
+            area = pygame.Rect(span*MERGE_SPAN, 0, MERGE_SPAN, 1)
+            statics = [s for s in self.index.nearby(area)
+                       if not isinstance(s, Block) and area.left <= s.rect.left < area.right]
+            rects = tiles.merge_rects([s.rect for s in statics])
+            if len(rects) < len(statics): statics = [tiles.Tile(r, tiles.GROUND, None) for r in rects]
+            self.merged[span] = statics
+            for s in statics: self.colliders.add(s)
+        self.unmerged.clear()
+
+    def add_object(self, obj):
+        if isinstance(obj, Block): self.add_block(obj)
+        elif isinstance(obj, Solid): self.add_solid(obj)
+        elif isinstance(obj, Goomba): self.add_enemy(obj)
+        elif isinstance(obj, Flagpole): self.flag = obj
+
+    def remove_object(self, obj):
+        if isinstance(obj, Solid):
+            self.solids.remove(obj); self.index.remove(obj); self.invalidate(obj.rect)
+            if isinstance(obj, Block): self.blocks.remove(obj); self.colliders.remove(obj)
+        elif isinstance(obj, Goomba): self.enemies.remove(obj)
+        elif obj is self.flag: self.flag = None
+
+    def apply(self, entries):
+        """Move the level to `entries`, touching only what changed; returns (removed, added)."""
+        removed, added = levelfile.diff(self.entries, entries)
+        with self.lock:
+            for entry in removed:
+                for obj in self.objects[entry].pop(): self.remove_object(obj)
+            for entry in added:
+                if entry[0]=="length": self.length_px = entry[1]*TILE
+                objs = make_objects(entry)
+                self.objects.setdefault(entry, []).append(objs)
+                for obj in objs: self.add_object(obj)
+        self.entries = list(entries)
+        return removed, added
+
+    # Static solids are drawn from CHUNK-wide cached strips
+    def invalidate(self, rect):
+        for c in range(rect.left//CHUNK, (rect.right-1)//CHUNK + 1): self.chunks.pop(c, None)
+        self.unmerged.add(rect.left//MERGE_SPAN)
+
+    def render_chunk(self, c):
+        area = pygame.Rect(c*CHUNK, 0, CHUNK, SCREEN_HEIGHT)
+        chunk = pygame.Surface(area.size).convert(); chunk.fill(CHUNK_KEY)
+        for s in self.index.nearby(area):
+            if not isinstance(s, Block): chunk.blit(s.image, (s.rect.x - area.x, s.rect.y))
+        chunk.set_colorkey(CHUNK_KEY, pygame.RLEACCEL)
+        self.chunks[c] = chunk
+        return chunk
+
     def draw(self, surface, camera_x):
-        for s in self.solids:
-            if isinstance(s, Block): s.draw(surface, camera_x)
-            else: surface.blit(s.image, (s.rect.x - camera_x, s.rect.y))
-        for e in self.enemies: e.draw(surface, camera_x)
-        if self.flag: surface.blit(self.flag.image, (self.flag.rect.x - camera_x, self.flag.rect.y))
-
-def build_level_1_1():
-    lvl = Level(); W = 240; lvl.length_px = W*TILE
-    def add_ground(tx, length):
-        x = tx*TILE; w = length*TILE
-        lvl.add_solid(Solid(x, GROUND_TOP, w, TILE*2, (222,160,92)))
-    for tx, length in [(0, 40), (43, 30), (76, 30), (110, 20),
-                       (135, 20), (160, 30), (195, 45)]: add_ground(tx, length)
-    def place_block(tx, ty, kind='brick'): lvl.add_block(Block(tx*TILE, ty*TILE, kind))
-    base_ty = (GROUND_TOP//TILE) - 5
-    place_block(22, base_ty, 'brick'); place_block(23, base_ty, 'question')
-    place_block(24, base_ty, 'brick'); place_block(23, base_ty-1, 'question')
-    for tx,h in [(50,2),(58,3),(66,4),(74,4),(102,2),(140,3),(172,2)]:
-        lvl.add_solid(Pipe(tx,h))
-    for t in range(104, 110): place_block(t, base_ty, 'brick')
-    place_block(109, base_ty-1, 'question')
-    def stairs(start_tx, height, ascending=True):
-        for i in range(height):
-            tx = start_tx+i if ascending else start_tx+(height-1-i)
-            lvl.add_solid(Solid(tx*TILE, GROUND_TOP-(i+1)*TILE, TILE, (i+1)*TILE, (222,160,92)))
-    stairs(180, 5, True); stairs(190, 5, False)
-    lvl.flag = Flagpole(lvl.length_px - TILE*6)
-    for x,y in [(35*TILE, GROUND_TOP-TILE),(60*TILE,GROUND_TOP-TILE),
-                (108*TILE,GROUND_TOP-TILE),(170*TILE,GROUND_TOP-TILE)]:
-        lvl.add_enemy(Goomba(x,y))
+        """The static solids; everything else is in the Game's View."""
+        width = surface.get_width()
+        first, last = camera_x//CHUNK, (camera_x + width - 1)//CHUNK
+        with self.lock:
+            for c in range(first, last + 1):
+                chunk = self.chunks.get(c) or self.render_chunk(c)
+                surface.blit(chunk, (c*CHUNK - camera_x, 0))
+            if len(self.chunks) > MAX_CHUNKS:
+                for c in [c for c in self.chunks if not first - 2 <= c <= last + 2]: del self.chunks[c]
+
+    def sprites(self, left, right):
+        """(obj, image, x, y) for the blocks between x=left and right, goombas and the flag."""
+        sprites = [b.sprite() for b in self.blocks if left < b.rect.x < right]
+        sprites += [s for s in map(Goomba.sprite, self.enemies) if s]
+        if self.flag: sprites.append((self.flag, self.flag.image, self.flag.rect.x, self.flag.rect.y))
+        return sprites
+
+def make_objects(entry):
+    """The objects one level file entry stands for (see levels/1-1.txt)."""
+    name, *args = entry
+    if name=="ground":
+        tx, length = args
+        return [Solid(tx*TILE, GROUND_TOP, length*TILE, TILE*2, (222,160,92))]
+    if name in ("brick", "question"):
+        tx, ty = args
+        return [Block(tx*TILE, ty*TILE, name)]
+    if name=="pipe": return [Pipe(*args)]
+    if name=="stair":
+        tx, h = args
+        return [Solid(tx*TILE, GROUND_TOP-h*TILE, TILE, h*TILE, (222,160,92), tiles.STAIR)]
+    if name=="goomba": return [Goomba(args[0]*TILE, GROUND_TOP-TILE)]
+    if name=="flag": return [Flagpole(args[0]*TILE)]
+    return []
+
+def build_level(entries):
+    lvl = Level(); lvl.apply(entries)
     return lvl
 
+def build_level_1_1(): return build_level(LEVEL_1_1)
+
 # ========================
 # Helpers
 # ========================
 def clamp(n, minn, maxn): return max(minn, min(n, maxn))
 
+# Every 1-1 sprite exists once the level has been built: pack them now
+build_level_1_1(); atlas.get("mario", create_mario); squashed_goomba_surface()
+for kind, used in ((tiles.BRICK, None), (tiles.QUESTION, False), (tiles.QUESTION, True)): block_face(kind, used)
+atlas.pack()
+
 # ========================
-# Game loop
+# Game state
 # ========================
-def run_game():
-    level = build_level_1_1()
-    player = Player(32, GROUND_TOP - TILE)
-    camera_x, state, time_left, HUD_timer = 0, MENU, 400, 0
-    running = True
-    while running:
-        dt = clock.tick(FPS)/1000.0; keys = pygame.key.get_pressed()
-        for e in pygame.event.get():
-            if e.type==pygame.QUIT: pygame.quit(); sys.exit()
-            elif e.type==pygame.KEYDOWN:
-                if e.key==pygame.K_ESCAPE: pygame.quit(); sys.exit()
-                elif state==PLAYING:
-                    if e.key==pygame.K_SPACE: player.jump()
-                    elif e.key==pygame.K_r:
-                        level=build_level_1_1(); player.reset()
-                        camera_x,state,time_left=0,PLAYING,400
-                elif state==MENU:
-                    if e.key==pygame.K_RETURN: state=PLAYING
-                    elif e.key==pygame.K_h: state=HOWTO
-                elif state==HOWTO:
-                    if e.key==pygame.K_RETURN: state=MENU
-                elif state in (DEAD,LEVEL_COMPLETE):
-                    if e.key==pygame.K_RETURN:
-                        level=build_level_1_1(); player.reset()
-                        camera_x,state,time_left=0,PLAYING,400
+# What one frame shows, built after a step and never changed; with
+# MARIO_SIM_THREAD=1 the main thread draws it while the next steps run.
+# `level` is the one to draw the static solids of, even if a restart has
+# already built the next.
+View = namedtuple("View", "state camera time_left sprites level")
+
+class Game:
+    """Everything run_game needs between frames; benchmarks and tools drive it directly."""
+    def __init__(self):
+        self.level = build_level_1_1()
+        self.player = Player(32, GROUND_TOP - TILE)
+        self.camera_x, self.state, self.time_left, self.hud_timer = 0, MENU, 400, 0
+        self.view = MENU   # state the current frame is drawn in
+
+    def restart(self):
+        self.level = build_level_1_1(); self.player.reset(); particles.clear()
+        self.camera_x, self.state, self.time_left = 0, PLAYING, 400
+        scores.start()
+
+    def handle_key(self, key):
+        if key==pygame.K_F5: savestate.save(QUICKSAVE,"1-1",self); return
+        if key==pygame.K_F9:
+            error = os.path.exists(QUICKSAVE) and savestate.quickload(QUICKSAVE,"1-1",self)
+            if error: print("1-1 quickload: %s" % error)
+            return
+        state = self.state
+        if state==PLAYING:
+            if key==pygame.K_SPACE: self.player.jump()
+            elif key==pygame.K_r: self.restart()
+        elif state==MENU:
+            if key==pygame.K_RETURN: self.state=PLAYING; scores.start()
+            elif key==pygame.K_h: self.state=HOWTO
+        elif state==HOWTO:
+            if key==pygame.K_RETURN: self.state=MENU
+        elif state in (DEAD,LEVEL_COMPLETE):
+            if key==pygame.K_RETURN: self.restart()
+
+    def update(self, keys, dt):
+        self.view = self.state
+        if self.state!=PLAYING: return
+        level, player = self.level, self.player
+        st=player.update(keys,level.near(player.rect),level.blocks,level.enemies)
+        if st==DEAD: self.state=DEAD
+        for b in level.blocks: b.update()
+        for enemy in level.enemies: enemy.update(level.near(enemy.rect))
+        self.camera_x=clamp(player.rect.centerx-SCREEN_WIDTH//2,0,level.length_px-SCREEN_WIDTH)
+        if player.rect.left<0: player.rect.left=0
+        if level.flag and player.rect.colliderect(level.flag.rect):
+            self.state=LEVEL_COMPLETE
+            events.emit(LEVEL_CLEAR,player.rect.centerx,player.rect.bottom,value=self.time_left)
+        self.hud_timer+=dt
+        if self.hud_timer>=1.0:
+            self.hud_timer=0; self.time_left=max(0,self.time_left-1)
+            if self.time_left==0:
+                self.state=DEAD
+                events.emit(DEATH,player.rect.centerx,player.rect.bottom)
+
+    def snapshot(self):
+        sprites = ()
+        if self.view==PLAYING:
+            camera_x, player = self.camera_x, self.player
+            sprites = self.level.sprites(camera_x - TILE - SNAP, camera_x + SCREEN_WIDTH + SNAP)
+            sprites.append((player, player.image, player.rect.x, player.rect.y))
+            sprites = tuple(sprites)
+        return View(self.view, self.camera_x, self.time_left, sprites, self.level)
+
+    def draw(self, screen, view=None):
+        view = view or self.snapshot()
         screen.fill(SKY_BLUE)
+        state = view.state
         if state==MENU:
-            title=title_font.render("Ultra Mario 2D Bros",True,WHITE)
+            title=title_text.render("title","Ultra Mario 2D Bros",WHITE)
             screen.blit(title,(SCREEN_WIDTH//2-title.get_width()//2,100))
-            opt1=menu_font.render("Press ENTER to Start",True,WHITE)
-            opt2=menu_font.render("Press H for How To Play",True,WHITE)
+            opt1=menu_text.render("opt1","Press ENTER to Start",WHITE)
+            opt2=menu_text.render("opt2","Press H for How To Play",WHITE)
             screen.blit(opt1,(SCREEN_WIDTH//2-opt1.get_width()//2,300))
             screen.blit(opt2,(SCREEN_WIDTH//2-opt2.get_width()//2,340))
         elif state==HOWTO:
             lines=["HOW TO PLAY","---------------------------",
                    "Arrow Keys: Move left/right","SPACE: Jump","R: Reset level",
+                   "F5/F9: Quick save/load","BACKSPACE (hold): Rewind","F8: Start/stop profiler",
                    "ESC: Quit","ENTER: Back to Menu"]
             for i,text in enumerate(lines):
-                surf=menu_font.render(text,True,WHITE)
+                surf=menu_text.render(i,text,WHITE)
                 screen.blit(surf,(SCREEN_WIDTH//2-surf.get_width()//2,120+i*30))
         elif state==PLAYING:
-            st=player.update(keys,level.all_solids(),level.blocks,level.enemies)
-            if st==DEAD: state=DEAD
-            for b in level.blocks: b.update()
-            for enemy in level.enemies: enemy.update(level.all_solids())
-            camera_x=clamp(player.rect.centerx-SCREEN_WIDTH//2,0,level.length_px-SCREEN_WIDTH)
-            if player.rect.left<0: player.rect.left=0
-            if level.flag and player.rect.colliderect(level.flag.rect): state=LEVEL_COMPLETE
-            HUD_timer+=dt
-            if HUD_timer>=1.0:
-                HUD_timer=0; time_left=max(0,time_left-1)
-                if time_left==0: state=DEAD
+            camera_x = view.camera
             pygame.draw.rect(screen,(222,160,92),(0,GROUND_TOP+TILE,SCREEN_WIDTH,SCREEN_HEIGHT-(GROUND_TOP+TILE)))
-            level.draw(screen,camera_x)
-            screen.blit(player.image,(player.rect.x-camera_x,player.rect.y))
-            hud=title_font.render("MARIO   WORLD 1-1    TIME %03d"%time_left,True,WHITE)
+            view.level.draw(screen,camera_x)
+            screen.blits([(image,(x-camera_x,y)) for _,image,x,y in view.sprites],False)
+            particles.draw(screen,camera_x)
+            hud=title_text.render("hud","MARIO   WORLD 1-1    TIME %03d"%view.time_left,WHITE)
             screen.blit(hud,(20,10))
         elif state==DEAD:
-            txt=title_font.render("YOU DIED  -  Press ENTER",True,WHITE)
+            txt=title_text.render("dead","YOU DIED  -  Press ENTER",WHITE)
             screen.blit(txt,(SCREEN_WIDTH//2-txt.get_width()//2,SCREEN_HEIGHT//3))
         elif state==LEVEL_COMPLETE:
-            txt=title_font.render("COURSE CLEAR!  -  Press ENTER",True,WHITE)
+            txt=title_text.render("clear","COURSE CLEAR!  -  Press ENTER",WHITE)
             screen.blit(txt,(SCREEN_WIDTH//2-txt.get_width()//2,SCREEN_HEIGHT//3))
-        pygame.display.flip()
 
-def main(): run_game()
+# ========================
+# Game loop
+# ========================
+def run_game():
+    game = Game()
+    rewind = Rewind("1-1", game)
+    watcher = levelfile.Watcher(LEVEL_FILE) if WATCH_LEVEL else None
+    frame = 0
+    def attach(): profiler.attach(lambda: (STATE_NAMES[game.view], events.frame))
+
+    def tick(keys, pressed):
+        nonlocal frame
+        for key in pressed: game.handle_key(key)
+        events.tick()
+        frame += 1
+        if watcher and frame % 15 == 0:
+            entries = watcher.poll()
+            if entries is not None:
+                LEVEL_1_1[:] = entries   # restarts use the edited level too
+                game.level.apply(entries); rewind.clear()
+            elif watcher.error: print(watcher.error); watcher.error = None
+        if keys[REWIND_KEY]: rewind.step_back()
+        else: game.update(keys, 1/FPS); rewind.capture()
+
+    if simthread.enabled(): return run_threaded(game, tick, attach)
+    attach()
+    # 60 Hz simulation, drawn at up to RENDER_FPS with positions interpolated in between
+    step = FixedStep(FPS)
+    interp = Interpolator(lambda: [game.player, *game.level.enemies], (game, "camera_x"))
+    running = True
+    while running:
+        elapsed = clock.tick(RENDER_FPS)/1000.0; keys = pygame.key.get_pressed()
+        polled = pygame.event.get()
+        latency.polled(sum(e.type==pygame.KEYDOWN for e in polled))
+        for e in polled:
+            if e.type==pygame.QUIT: pygame.quit(); sys.exit()
+            elif e.type==pygame.KEYDOWN:
+                if e.key==pygame.K_ESCAPE: pygame.quit(); sys.exit()
+                if e.key==PROFILE_KEY: profiler.toggle()
+                else: game.handle_key(e.key)
+        for _ in range(step.advance(elapsed)):
+            interp.capture()
+            tick(keys, ())
+            particles.update()
+            latency.stepped()
+        with interp.blended(step.alpha):
+            game.draw(screen)
+        presenter.present()
+        latency.presented()
+
+def run_threaded(game, tick, setup):
+    """tick() at 60 Hz on the simulation thread, after setup(); this one polls and draws its Views."""
+    sim = simthread.SimThread(tick, game.snapshot, FPS, setup=setup)
+    sim.keys = pygame.key.get_pressed()
+    sim.start()
+    seen = 0
+    while True:
+        clock.tick(RENDER_FPS)
+        polled = pygame.event.get()
+        latency.polled(sum(e.type==pygame.KEYDOWN for e in polled))
+        for e in polled:
+            if e.type==pygame.QUIT or e.type==pygame.KEYDOWN and e.key==pygame.K_ESCAPE:
+                sim.stop(); pygame.quit(); sys.exit()
+            elif e.type==pygame.KEYDOWN:
+                if e.key==PROFILE_KEY: profiler.toggle()
+                else: sim.send(e.key)
+        sim.keys = pygame.key.get_pressed()
+        view, ticks = sim.view()
+        for _ in range(min(ticks - seen, 5)): particles.update()
+        if ticks != seen: latency.stepped(); seen = ticks
+        game.draw(screen, view)
+        presenter.present()
+        latency.presented()
+
+# ========================
+# Two players over UDP (rollback netcode, engine/netplay.py)
+#   python 1-1.py --netplay 0 7000 127.0.0.1:7001
+#   python 1-1.py --netplay 1 7001 127.0.0.1:7000
+# ========================
+def run_netplay(local, port, peer, rtt_ms=0, loss=0.0):
+    from engine.netplay import Link, Match, Session, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP
+    scores.path = None   # rollbacks restart runs over again; matches stay off the leaderboard
+    match = Match(sys.modules[__name__])
+    session = Session(match, local, Link(port, peer, rtt_ms=rtt_ms, loss=loss))
+    game, other = match.game, match.players[1]
+    other.image = atlas.get("luigi", create_luigi)
+    pygame.display.set_caption("Ultra Mario 2D Bros - 1-1 netplay (player %d)" % (local+1))
+    if not session.connect(): print("no answer from %s:%d" % peer); return
+    jump = False
+    while True:
+        clock.tick(FPS); keys = pygame.key.get_pressed(); events.tick()
+        for e in pygame.event.get():
+            if e.type==pygame.QUIT: pygame.quit(); sys.exit()
+            elif e.type==pygame.KEYDOWN:
+                if e.key==pygame.K_ESCAPE: pygame.quit(); sys.exit()
+                if e.key==pygame.K_SPACE: jump = True
+        bits = ((INPUT_LEFT if keys[pygame.K_LEFT] else 0) | (INPUT_RIGHT if keys[pygame.K_RIGHT] else 0)
+                | (INPUT_JUMP if jump else 0))
+        if session.tick(bits): jump = False
+        particles.update()
+        game.camera_x = match.camera_for(local)
+        game.draw(screen)
+        if game.view==PLAYING: screen.blit(other.image,(other.rect.x-game.camera_x,other.rect.y))
+        presenter.present()
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--netplay", nargs=3, metavar=("PLAYER", "PORT", "PEER"),
+                        help="two-player mode: PLAYER 0 or 1, local UDP PORT, PEER host:port")
+    parser.add_argument("--rtt-ms", type=float, default=0, help="simulated round trip (netplay)")
+    parser.add_argument("--loss", type=float, default=0.0, help="simulated packet loss (netplay)")
+    args = parser.parse_args()
+    if args.netplay:
+        local, port, peer = args.netplay
+        host, peer_port = peer.rsplit(":", 1)
+        run_netplay(int(local), int(port), (host, int(peer_port)), args.rtt_ms, args.loss)
+    else: run_game()
 if __name__=="__main__": main()
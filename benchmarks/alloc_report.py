@@ -0,0 +1,126 @@
+"""
+Allocation report for the scripted benchmark sessions (engine/allocs.py).
+
+Runs each game's suite scenario under AllocProfiler and prints, per game
+state, the call sites that allocate every frame: bytes, allocating calls
+and new Surfaces per frame. Hot paths have per-frame budgets below; any
+function over its budget is listed and the exit status is non-zero.
+
+    python benchmarks/alloc_report.py [--games 1-1 mario3 ...] [--frames 600] [--top 15]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+from engine.allocs import AllocProfiler
+from engine.loader import load_game
+from suite import GAMES, SCENARIOS
+
+STATES = {
+    '1-1': ('MENU', 'PLAYING', 'LEVEL_COMPLETE', 'HOWTO', 'DEAD'),
+    'mario3': ('MENU', 'PLAYING', 'GAME_OVER', 'LEVEL_COMPLETE', 'BOSS_FIGHT'),
+}
+MODULES = {'1-1': '1-1', 'mario3': 'mario3'}
+
+# function qualname -> bytes per frame, or (bytes, new Surfaces) per frame;
+# the bytes are what the scripted session measures plus about 25%, so a
+# new per-frame allocation on a hot path shows up
+BUDGETS = {
+    '1-1': {
+        'Player.update': 896,
+        'move': 3456,
+        'sweep': 2816,
+        'Block.sprite': (1280, 0),
+        'Level.draw': 1024,
+        'Level.sprites': 640,
+        'Game.snapshot': 640,
+        'Game.draw': (1152, 1),
+        'Game.update': 512,
+    },
+    'mario3': {
+        'Player.update': 640,
+        'update_game': 384,
+        'draw_game': (1664, 3),
+        'snapshot': 1280,
+        'Boss.update': 128,
+    },
+    'mario4k': {
+        'Player.update': 640,
+        'run_game': (1408, 0),
+    },
+    '3d': {
+        'Goomba.update': 2048,
+        'MarioPlatform.update': 2048,
+        'Mario.update': 8192,
+    },
+}
+
+
+def worker(name, frames, top):
+    prof = AllocProfiler(top)
+    names = {}
+    if name in STATES:
+        module = load_game(MODULES[name])
+        names = {getattr(module, state): state for state in STATES[name]}
+    started = [False]
+
+    def tick(start=False, state=None):
+        if start:
+            prof.start()
+            started[0] = True
+        elif started[0]:
+            prof.frame(names.get(state, 'PLAYING'))
+
+    try:
+        SCENARIOS[name](frames, tick)
+    finally:
+        prof.stop()
+    result = {'report': prof.report(), 'failures': prof.check(BUDGETS.get(name, {}))}
+    sys.stdout.write('RESULT ' + json.dumps(result) + '\n')
+    sys.stdout.flush()
+    os._exit(0)
+
+
+def spawn(name, frames, top):
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy')
+    env.pop('MARIO_EVENT_LOG', None)
+    cmd = [sys.executable, os.path.abspath(__file__), '--worker', name,
+           '--frames', str(frames), '--top', str(top)]
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    for line in proc.stdout.splitlines():
+        if line.startswith('RESULT '):
+            return json.loads(line[7:])
+    raise RuntimeError(f'{name} failed:\n{proc.stdout[-2000:]}{proc.stderr[-2000:]}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--games', nargs='+', choices=GAMES, default=list(GAMES))
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--top', type=int, default=15, help='call sites listed per state')
+    parser.add_argument('--worker', choices=GAMES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.frames, args.top)
+
+    failed = []
+    for name in args.games:
+        result = spawn(name, args.frames, args.top)
+        print(f'== {name}')
+        print(result['report'])
+        for failure in result['failures']:
+            print(f'OVER BUDGET {name} {failure}')
+            failed.append(failure)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+engine.batch.BatchSim: checks it against K scalar 1-1 games tick by tick,
+then measures player-ticks per second for larger K.
+
+    python benchmarks/bench_batch_physics.py [--verify-games 64] [--verify-ticks 3000]
+                                             [--games 1024 4096 16384] [--ticks 300]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+import pygame
+from engine.batch import DT, BatchSim
+from engine.env import Held, load_1_1
+from suite import JUMPS_1_1
+
+
+def random_inputs(rng, k):
+    left = rng.random(k) < 0.15
+    right = rng.random(k) < 0.8
+    jump = rng.random(k) < 0.08
+    return left, right, jump
+
+
+def snapshot(game):
+    p = game.player
+    return ((p.rect.x, p.rect.y, p.vel_x, p.vel_y, p.on_ground, game.state, game.time_left),
+            [(e.rect.x, e.rect.y, e.rect.w, e.rect.h, e.vx, e.alive, e.squash_timer)
+             for e in game.level.enemies],
+            [b.used for b in game.level.blocks if b.used is not None])
+
+
+def batch_snapshot(sim, i):
+    return ((int(sim.x[i]), int(sim.y[i]), float(sim.vel_x[i]), float(sim.vel_y[i]),
+             bool(sim.on_ground[i]), int(sim.state[i]), int(sim.time_left[i])),
+            [(int(sim.goomba_x[g, i]), int(sim.goomba_y[g, i]), int(sim.goomba_w[g, i]),
+              int(sim.goomba_h[g, i]), int(sim.goomba_vx[g, i]), bool(sim.goomba_alive[g, i]),
+              int(sim.goomba_squash[g, i])) for g in range(len(sim.goomba_x))],
+            sim.used[i].tolist())
+
+
+def new_game(smb):
+    game = smb.Game()
+    game.state = smb.PLAYING
+    return game
+
+
+def verify(smb, k, ticks, seed=1):
+    """Random inputs, except the first few games replay the winning 1-1 run
+    with their jumps shifted a few ticks, which covers stomps and the flag."""
+    rng = np.random.default_rng(seed)
+    sim = BatchSim(k, smb)
+    games = [new_game(smb) for _ in range(k)]
+    age = np.zeros(k, dtype=int)
+    scripted = np.arange(min(8, k))
+    resets = stomps = flags = 0
+    for t in range(ticks):
+        left, right, jump = random_inputs(rng, k)
+        left[scripted] = False
+        right[scripted] = True
+        jump[scripted] = [age[i] - i in JUMPS_1_1 for i in scripted]
+        age += 1
+        for i, game in enumerate(games):
+            if game.state != smb.PLAYING:
+                continue
+            keys = Held(*[key for key, down in ((pygame.K_LEFT, left[i]), (pygame.K_RIGHT, right[i])) if down])
+            if jump[i]:
+                game.handle_key(pygame.K_SPACE)
+            game.update(keys, DT)
+        alive = sim.goomba_alive.sum()
+        sim.step(left, right, jump)
+        stomps += alive - sim.goomba_alive.sum()
+        for i, game in enumerate(games):
+            if snapshot(game) != batch_snapshot(sim, i):
+                print(f'MISMATCH tick {t} game {i}\n  scalar {snapshot(game)}\n  batch  {batch_snapshot(sim, i)}')
+                return False
+        # restart games that ended or fell out of the level, in both
+        done = [i for i, g in enumerate(games)
+                if g.state != smb.PLAYING or g.player.rect.top > smb.SCREEN_HEIGHT]
+        flags += sum(games[i].state == smb.LEVEL_COMPLETE for i in done)
+        for i in done:
+            games[i] = new_game(smb)
+            age[i] = 0
+        if done:
+            sim.reset(np.array(done))
+            resets += len(done)
+    print(f'verified {k} games x {ticks} ticks bit-identical '
+          f'({resets} restarts, {stomps} stomps, {flags} flags)')
+    return True
+
+
+def throughput(smb, k, ticks):
+    rng = np.random.default_rng(2)
+    sim = BatchSim(k, smb)
+    inputs = [random_inputs(rng, k) for _ in range(ticks)]
+    t0 = time.perf_counter()
+    for left, right, jump in inputs:
+        sim.step(left, right, jump)
+        done = np.flatnonzero((sim.state != sim.PLAYING) | (sim.y > smb.SCREEN_HEIGHT))
+        if len(done):
+            sim.reset(done)
+    return k * ticks / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--verify-games', type=int, default=64)
+    parser.add_argument('--verify-ticks', type=int, default=3000)
+    parser.add_argument('--games', type=int, nargs='+', default=[1024, 4096, 16384])
+    parser.add_argument('--ticks', type=int, default=300)
+    args = parser.parse_args()
+
+    smb = load_1_1()
+    if not verify(smb, args.verify_games, args.verify_ticks):
+        sys.exit(1)
+
+    games = [new_game(smb) for _ in range(64)]
+    keys = Held(pygame.K_RIGHT)
+    t0 = time.perf_counter()
+    for _ in range(args.ticks):
+        for game in games:
+            game.update(keys, DT)
+    scalar = 64 * args.ticks / (time.perf_counter() - t0)
+    print(f'scalar Game.update     {scalar:>12,.0f} player-ticks/s')
+    for k in args.games:
+        rate = throughput(smb, k, args.ticks)
+        print(f'BatchSim K={k:<7}    {rate:>12,.0f} player-ticks/s  ({rate / scalar:.0f}x)')
+
+
+if __name__ == '__main__':
+    main()
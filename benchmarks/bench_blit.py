@@ -0,0 +1,80 @@
+"""
+Blit cost per sprite as created (unconverted), as a standalone converted
+sprite (engine.atlas.convert) and as an atlas subsurface, using the real
+sprite factories from 1-1, mario3 and mario4k.
+
+    python benchmarks/bench_blit.py [--blits 20000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pygame
+from engine.atlas import Atlas, convert
+from engine.loader import load_game
+
+
+def sprites():
+    smb = load_game('1-1')
+    m3 = load_game('mario3')
+    m4 = load_game('mario4k')
+    T = smb.TILE
+    return [
+        ('1-1 mario', smb.create_mario),
+        ('1-1 goomba', smb.draw_goomba),
+        ('1-1 brick', lambda: smb.make_surface(T, T, (185, 70, 20))),
+        ('1-1 pipe', lambda: smb.make_surface(2 * T, 4 * T, smb.GREEN)),
+        ('1-1 ground', lambda: smb.make_surface(40 * T, 2 * T, (222, 160, 92))),
+        ('1-1 flagpole', smb.Flagpole.draw_pole),
+        ('mario3 enemy', lambda: m3.make_solid(30, 30, m3.BROWN)),
+        ('mario3 platform', lambda: m3.make_solid(150, 20, m3.BROWN)),
+        ('mario4k mario', m4.create_mario),
+        ('mario4k ground', lambda: m4.make_platform(m4.SCREEN_WIDTH, 40)),
+    ]
+
+
+def per_blit(screen, surface, blits):
+    w, h = screen.get_size()
+    sw, sh = surface.get_size()
+    spots = [((i * 53) % max(1, w - sw), (i * 31) % max(1, h - sh)) for i in range(256)]
+    t0 = time.perf_counter()
+    for i in range(blits):
+        screen.blit(surface, spots[i & 255])
+    return (time.perf_counter() - t0) / blits * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--blits', type=int, default=20000)
+    args = parser.parse_args()
+
+    factories = sprites()
+    screen = pygame.display.get_surface()
+    atlas = Atlas()
+    for name, make in factories:
+        atlas.get(name, make)
+    atlas.pack()
+    print(f'{"sprite":16} {"size":>8} {"mode":>9} {"raw us":>8} {"conv us":>8} {"atlas us":>9} {"speedup":>8}')
+    total_raw = total_atlas = 0.0
+    for name, make in factories:
+        raw = make()
+        mode, _ = atlas.modes[name]
+        t_raw = per_blit(screen, raw, args.blits)
+        t_conv = per_blit(screen, convert(raw), args.blits)
+        t_atlas = per_blit(screen, atlas.sprites[name], args.blits)
+        total_raw += t_raw
+        total_atlas += t_atlas
+        size = '%dx%d' % raw.get_size()
+        print(f'{name:16} {size:>8} {mode:>9} {t_raw:8.2f} {t_conv:8.2f} {t_atlas:9.2f} '
+              f'{t_raw / t_atlas:7.1f}x')
+    print(f'{"all":16} {"":>8} {"":>9} {total_raw:8.2f} {"":>8} {total_atlas:9.2f} '
+          f'{total_raw / total_atlas:7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
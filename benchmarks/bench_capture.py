@@ -0,0 +1,106 @@
+"""
+engine.capture.Recorder on the scripted 1-1 run, paced to 60 FPS like the
+game: frame time (update, draw, present; not the wait) with no capture,
+with the Recorder, and with the frame encoded on the game thread (tobytes
++ zlib) as a naive capture would. The Recorder is also run starved (2
+buffers, zlib level 9, the game unpaced) to show it drops frames instead
+of slowing the game.
+
+Every capture is read back: the frame numbers must account for every
+written and dropped frame, and the last frame, if it was written, must
+match the screen.
+
+    python benchmarks/bench_capture.py [--frames 600] [--fps 60]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import zlib
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+import pygame
+from engine.capture import Recorder, read_frames
+from engine.env import Held
+from engine.loader import load_game
+from suite import DT, JUMPS_1_1
+
+
+def run(smb, frames, fps, grab=None):
+    """Per-frame seconds of the scripted run, with `grab(screen)` after each present."""
+    game = smb.Game()
+    game.handle_key(pygame.K_RETURN)
+    keys = Held(pygame.K_RIGHT)
+    times = []
+    due = time.perf_counter()
+    for f in range(frames):
+        due += 1 / fps if fps else 0
+        t0 = time.perf_counter()
+        if f in JUMPS_1_1:
+            game.handle_key(pygame.K_SPACE)
+        game.update(keys, DT)
+        game.draw(smb.screen)
+        smb.presenter.present()
+        if grab:
+            grab(smb.screen)
+        times.append(time.perf_counter() - t0)
+        time.sleep(max(0.0, due - time.perf_counter()))
+    return sorted(times)
+
+
+def check(path, recorder, screen):
+    numbers, last = [], None
+    for number, _, rgb in read_frames(path):
+        numbers.append(number)
+        last = rgb
+    expected = np.transpose(pygame.surfarray.array3d(screen), (1, 0, 2))
+    return (len(numbers) == recorder.written and numbers == sorted(numbers)
+            and recorder.written + recorder.dropped == recorder.frames
+            and (recorder.dropped or numbers == list(range(recorder.frames)))
+            and (numbers[-1] != recorder.frames - 1 or np.array_equal(last, expected)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--fps', type=float, default=60, help='0: as fast as possible')
+    args = parser.parse_args()
+
+    smb = load_game('1-1')
+    path = os.path.join(tempfile.gettempdir(), 'bench-capture.mcap')
+    ok = True
+
+    def report(name, times, extra=''):
+        print(f'{name:<26} p50 {times[len(times) // 2] * 1000:6.2f} ms   '
+              f'p99 {times[int(len(times) * 0.99)] * 1000:6.2f} ms   {extra}')
+
+    report('no capture', run(smb, args.frames, args.fps))
+
+    def naive(screen):
+        with open(path, 'ab') as f:
+            f.write(zlib.compress(pygame.image.tobytes(screen, 'RGBX'), 1))
+    report('encode on game thread', run(smb, args.frames, args.fps, naive))
+    os.remove(path)
+
+    for name, settings, fps in (('Recorder', dict(fps=0), args.fps),
+                                ('Recorder, starved, unpaced', dict(fps=0, buffers=2, level=9), 0)):
+        recorder = Recorder('bench', path, **settings)
+        times = run(smb, args.frames, fps, recorder.grab)
+        recorder.close()
+        size = os.path.getsize(path)
+        good = check(path, recorder, smb.screen)
+        ok &= good
+        report(name, times, f'{recorder.written} written, {recorder.dropped} dropped, '
+                            f'{size / recorder.written / 1024:.0f} KB/frame, read back {"ok" if good else "WRONG"}')
+        os.remove(path)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+5,000 spinning, bobbing coins: per-entity update() vs the engine.ecs World.
+
+Runs ursina without a window so only the per-frame Python cost is measured.
+
+    python benchmarks/bench_ecs_coins.py [--coins 5000] [--frames 300]
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time as _time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ursina import Ursina, Entity, distance, destroy, time
+from engine.ecs import World
+
+FAR_AWAY = (0, -1000, 0)   # proximity probe that never triggers a pickup
+
+
+class LegacyCoin(Entity):
+    """Same per-frame work as MarioCoin.update in the 3D port."""
+    def __init__(self, position):
+        super().__init__(position=position)
+        self.rotation_speed = 100
+        self.bob_speed = 2
+        self.bob_height = 0.2
+        self.start_y = position[1]
+        self.time = random.random() * math.pi * 2
+
+    def update(self):
+        self.rotation_y += self.rotation_speed * time.dt
+        self.time += time.dt
+        self.y = self.start_y + math.sin(self.time * self.bob_speed) * self.bob_height
+        if distance(self.position, FAR_AWAY) < 1.5:
+            destroy(self)
+
+
+class WorldRunner(Entity):
+    def __init__(self, world):
+        super().__init__()
+        self.world = world
+
+    def update(self):
+        self.world.step(time.dt, target=FAR_AWAY)
+        self.world.write_back()
+
+
+def grid(n):
+    side = int(math.ceil(math.sqrt(n)))
+    return [((i % side) * 2.0, 3.0, (i // side) * 2.0) for i in range(n)]
+
+
+def run(app, frames):
+    for _ in range(10):
+        app.step()
+    start = _time.perf_counter()
+    for _ in range(frames):
+        app.step()
+    return (_time.perf_counter() - start) * 1000 / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--coins', type=int, default=5000)
+    parser.add_argument('--frames', type=int, default=300)
+    args = parser.parse_args()
+
+    app = Ursina(window_type='none')
+
+    coins = [LegacyCoin(p) for p in grid(args.coins)]
+    legacy_ms = run(app, args.frames)
+    for c in coins:
+        destroy(c)
+    app.step()
+
+    world = World(capacity=args.coins)
+    for p in grid(args.coins):
+        coin = Entity(position=p, ignore=True)
+        world.add(coin, p, spin=100, bob=(0.2, 2, random.random() * math.pi * 2),
+                  proximity=(1.5, destroy))
+    WorldRunner(world)
+    ecs_ms = run(app, args.frames)
+
+    print(f'coins: {args.coins}  frames: {args.frames}')
+    print(f'update() per coin : {legacy_ms:8.3f} ms/frame')
+    print(f'ecs systems       : {ecs_ms:8.3f} ms/frame  ({legacy_ms / ecs_ms:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
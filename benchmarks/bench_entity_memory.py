@@ -0,0 +1,73 @@
+"""
+Bytes per level entity: pygame.sprite.Sprite with its own Surface (the old
+1-1 Solid) vs the slotted tiles with shared images used now.
+
+Python allocations are measured with tracemalloc; Surface pixel buffers live
+in SDL's heap, so their size is added separately (once per unique Surface).
+
+    python benchmarks/bench_entity_memory.py [--tiles 100000]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pygame
+from engine.loader import load_game
+
+TILE = 16
+COLORS = [(222, 160, 92), (185, 70, 20), (40, 170, 40)]
+
+
+class SpriteSolid(pygame.sprite.Sprite):
+    """The pre-slots 1-1 Solid."""
+    def __init__(self, x, y, w, h, color):
+        super().__init__()
+        self.image = pygame.Surface((w, h), pygame.SRCALPHA)
+        self.image.fill(color)
+        pygame.draw.rect(self.image, (0, 0, 0), (0, 0, w - 1, h - 1), 1)
+        self.rect = self.image.get_rect(topleft=(x, y))
+
+
+def measure(factory, count):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = [factory(i) for i in range(count)]
+    python_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    surfaces = {id(e.image): e.image for e in entities}
+    pixel_bytes = sum(s.get_pitch() * s.get_height() for s in surfaces.values())
+    return (python_bytes + pixel_bytes) / count, python_bytes / count, len(surfaces)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tiles', type=int, default=100_000)
+    args = parser.parse_args()
+
+    smb = load_game('1-1')
+    cols = 10_000
+
+    def tile_pos(i):
+        return (i % cols) * TILE, (i // cols) * TILE
+
+    rows = [
+        ('Sprite + own Surface', lambda i: SpriteSolid(*tile_pos(i), TILE, TILE, COLORS[i % 3])),
+        ('1-1 Solid (slots)', lambda i: smb.Solid(*tile_pos(i), TILE, TILE, COLORS[i % 3])),
+        ('1-1 Block (slots)', lambda i: smb.Block(*tile_pos(i), 'brick' if i % 2 else 'question')),
+    ]
+    print(f'{args.tiles} tiles')
+    print(f'{"entity":24} {"bytes/entity":>13} {"python only":>12} {"surfaces":>9}')
+    for name, factory in rows:
+        total, python_only, surfaces = measure(factory, args.tiles)
+        print(f'{name:24} {total:13.0f} {python_only:12.0f} {surfaces:9d}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Environment steps per second: one SMBEnv in-process, then VectorEnv with
+1, 2, 4 ... workers up to the CPU count.
+
+    python benchmarks/bench_env.py [--steps 20000] [--envs-per-worker 16]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+from engine.env import RIGHT, RIGHT_JUMP, SMBEnv, VectorEnv
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--steps', type=int, default=20_000)
+    parser.add_argument('--envs-per-worker', type=int, default=16)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    env = SMBEnv()
+    env.reset()
+    actions = rng.choice([RIGHT, RIGHT_JUMP], size=args.steps, p=[0.9, 0.1]).tolist()
+    t0 = time.perf_counter()
+    for action in actions:
+        if env.step(action)[2]:
+            env.reset()
+    single = args.steps / (time.perf_counter() - t0)
+    print(f'SMBEnv            {single:>10.0f} steps/s')
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        n = workers * args.envs_per_worker
+        with VectorEnv(n, workers) as venv:
+            venv.reset()
+            batches = max(1, args.steps // n)
+            batch_actions = rng.choice([RIGHT, RIGHT_JUMP], size=(batches, n), p=[0.9, 0.1])
+            t0 = time.perf_counter()
+            for a in batch_actions:
+                venv.step(a)
+            rate = batches * n / (time.perf_counter() - t0)
+        print(f'VectorEnv x{workers:<3} {n:>4} envs {rate:>10.0f} steps/s  '
+              f'({rate / single / workers:.0%} of linear)')
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
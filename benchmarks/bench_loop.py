@@ -0,0 +1,147 @@
+"""
+Fixed-step loop (engine/loop.py): gameplay is the same at any render rate,
+and input-to-present latency for the old 60 Hz locked loop against
+rendering at 144 Hz and uncapped.
+
+The identity check runs the scripted 1-1 run once stepping Game.update
+directly, then through FixedStep / Interpolator with jittery frame times
+for several render rates, drawing inside blended() every frame; the
+savestate after every simulation step must match, and drawing must leave
+no trace in it.
+
+The latency runs are the real run_game() loop in a child process (dummy
+video driver), with a thread pressing SPACE at random moments.
+
+    python benchmarks/bench_loop.py [--frames 1500] [--seconds 5]
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pygame
+from engine import savestate
+from engine.env import Held
+from engine.loader import load_game
+from engine.loop import FixedStep, Interpolator
+from suite import JUMPS_1_1
+
+RENDER_RATES = (30, 60, 75, 144, 240, 1000)
+
+
+def scripted(smb, frames, render_hz=None, seed=0):
+    """Savestate after each of `frames` steps; render_hz=None steps directly."""
+    random.seed(seed)
+    game = smb.Game()
+    game.handle_key(pygame.K_RETURN)
+    keys = Held(pygame.K_RIGHT)
+    states = []
+
+    def tick():
+        f = len(states)
+        if f in JUMPS_1_1:
+            game.handle_key(pygame.K_SPACE)
+        game.update(keys, 1 / 60)
+        states.append(savestate.dumps('1-1', game))
+
+    if render_hz is None:
+        while len(states) < frames:
+            tick()
+        return states, 0
+    rng = random.Random(render_hz)
+    step = FixedStep(60)
+    interp = Interpolator(lambda: [game.player, *game.level.enemies], (game, 'camera_x'))
+    draws = 0
+    while len(states) < frames:
+        for _ in range(step.advance(rng.uniform(0.5, 1.5) / render_hz)):
+            interp.capture()
+            tick()
+        with interp.blended(step.alpha):
+            game.draw(smb.screen)
+        draws += 1
+        if states and savestate.dumps('1-1', game) != states[-1]:
+            raise AssertionError(f'drawing at {render_hz} Hz changed the game state')
+    return states[:frames], draws
+
+
+def verify(frames):
+    smb = load_game('1-1')
+    reference, _ = scripted(smb, frames)
+    ok = True
+    for hz in RENDER_RATES:
+        states, draws = scripted(smb, frames, hz)
+        same = states == reference
+        ok &= same
+        print(f'render ~{hz:>4} Hz: {draws:>6} draws for {frames} steps, '
+              f'{"identical" if same else "DIFFERENT"} gameplay')
+    return ok
+
+
+def child(render_fps, seconds):
+    """Run the real 1-1 loop, pressing SPACE at random; prints latency and rates as JSON."""
+    smb = load_game('1-1')
+    smb.RENDER_FPS = render_fps
+    presents = [0]
+    present = smb.presenter.present
+
+    def counted():
+        presents[0] += 1
+        present()
+    smb.presenter.present = counted
+
+    def press():
+        rng = random.Random(1)
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RETURN))
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            time.sleep(rng.uniform(0.05, 0.25))
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+        pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    threading.Thread(target=press, daemon=True).start()
+    t0 = time.perf_counter()
+    try:
+        smb.run_game()
+    except SystemExit:
+        pass
+    elapsed = time.perf_counter() - t0
+    result = smb.latency.summary()
+    result['render_hz'] = round(presents[0] / elapsed, 1)
+    print(json.dumps(result))
+
+
+def latency(seconds):
+    for label, fps in (('locked 60 Hz (old loop)', 60), ('render 144 Hz', 144),
+                       ('render uncapped', 0)):
+        out = subprocess.run([sys.executable, __file__, '--child', str(fps), '--seconds', str(seconds)],
+                             capture_output=True, text=True, check=True).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(f'{label:<24} {r["render_hz"]:>7.1f} fps  {r["inputs"]:>3} presses  '
+              f'mean p50 {r["mean_ms_p50"]:>5.1f} ms  p99 {r["mean_ms_p99"]:>5.1f} ms  '
+              f'worst p99 {r["worst_ms_p99"]:>5.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', type=int, default=1500)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--child', type=int, metavar='RENDER_FPS', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child is not None:
+        child(args.child, args.seconds)
+        return
+    if not verify(args.frames):
+        sys.exit(1)
+    latency(args.seconds)
+
+
+if __name__ == '__main__':
+    main()
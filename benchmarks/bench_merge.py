@@ -0,0 +1,95 @@
+"""
+Merged collision rects (tiles.merge_rects in 1-1's Level): colliders and
+candidates per Level.near() query, with and without merging, on the
+shipped 1-1 and on the same level written a tile at a time (every ground
+strip as 1-tile entries, the way an editor saves it).
+
+Every run replays the winning 1-1 schedule to the flag; the player's
+position and velocity must match the shipped level without merging on
+every tick.
+
+    python benchmarks/bench_merge.py [--frames 1400] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pygame
+from engine import tiles
+from engine.env import Held, load_1_1
+from suite import DT, JUMPS_1_1
+
+
+def tile_by_tile(entries):
+    out = []
+    for entry in entries:
+        if entry[0] == 'ground':
+            out += [('ground', x, 1) for x in range(entry[1], entry[1] + entry[2])]
+        else:
+            out.append(entry)
+    return out
+
+
+def run(smb, entries, frames):
+    """(colliders, candidates per query, ticks/s, per-tick player trace)."""
+    smb.LEVEL_1_1[:] = entries      # restarts rebuild this layout too
+    game = smb.Game()
+    game.handle_key(pygame.K_RETURN)
+    level = game.level
+    near, counts = level.near, []
+
+    def counted(rect):
+        found = near(rect)
+        counts.append(len(found))
+        return found
+
+    level.near = counted
+    keys = Held(pygame.K_RIGHT)
+    trace = []
+    t0 = time.perf_counter()
+    for f in range(frames):
+        if f in JUMPS_1_1:
+            game.handle_key(pygame.K_SPACE)
+        game.update(keys, DT)
+        p = game.player
+        trace.append((p.rect.x, p.rect.y, p.vel_x, p.vel_y, game.state))
+    elapsed = time.perf_counter() - t0
+    return len(level.all_colliders()), sum(counts) / len(counts), frames / elapsed, trace
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--frames', type=int, default=1400)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    smb = load_1_1()
+    shipped = list(smb.LEVEL_1_1)
+    layouts = {'shipped': shipped, 'tile by tile': tile_by_tile(shipped)}
+    merge = tiles.merge_rects
+    reference, ok = None, True
+    print(f'{"layout":<14} {"merged":<7} {"solids":>6} {"colliders":>9} {"cands/query":>11} {"ticks/s":>9}')
+    for name, entries in layouts.items():
+        solids = len(smb.build_level(entries).solids)
+        for merged in (False, True):
+            # without merging every span keeps its own solids
+            tiles.merge_rects = merge if merged else list
+            results = [run(smb, entries, args.frames) for _ in range(args.repeat)]
+            colliders, cands, _, trace = results[0]
+            rate = max(r[2] for r in results)
+            reference = reference or trace
+            ok &= trace == reference
+            print(f'{name:<14} {"yes" if merged else "no":<7} {solids:>6} {colliders:>9} {cands:>11.2f} {rate:>9,.0f}')
+    tiles.merge_rects = merge
+    smb.LEVEL_1_1[:] = shipped
+    print(f'player trace identical in every run: {"yes" if ok else "NO"}')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
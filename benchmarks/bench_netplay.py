@@ -0,0 +1,122 @@
+"""
+Two-player rollback netplay on localhost: two client processes play 1-1
+with scripted input at 60 Hz through the latency / packet-loss shim.
+
+Reports rollbacks, frames re-simulated, the slowest rollback (it has to fit
+in a 16 ms frame) and stalls, and checks both clients and an offline run
+with the same inputs reach the same state.
+
+    python benchmarks/bench_netplay.py [--frames 900] [--rtt-ms 100] [--loss 0.05]
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from suite import JUMPS_1_1
+
+PORTS = (47000, 47001)
+
+
+def script(player, frame):
+    """Scripted input bits: player 0 runs the winning route, player 1 the same a bit later."""
+    from engine.netplay import INPUT_JUMP, INPUT_RIGHT
+    if player == 1:
+        frame -= 30
+        if frame < 0:
+            return 0
+    return INPUT_RIGHT | (INPUT_JUMP if frame in JUMPS_1_1 else 0)
+
+
+def client(local, args, out):
+    from engine.env import load_1_1
+    from engine.netplay import Link, Match, Session
+    smb = load_1_1()
+    link = Link(PORTS[local], ('127.0.0.1', PORTS[1 - local]), rtt_ms=args.rtt_ms,
+                jitter_ms=args.jitter_ms, loss=args.loss, seed=local)
+    session = Session(Match(smb), local, link)
+    if not session.connect():
+        out.put((local, None))
+        return
+    period = 1 / 60
+    next_tick = time.perf_counter()
+    tick_ms = []
+    while not session.settled(args.frames):
+        t0 = time.perf_counter()
+        session.tick(script(local, session.frame))
+        tick_ms.append((time.perf_counter() - t0) * 1000)
+        next_tick += period
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    # keep answering until the peer has settled too
+    for _ in range(60):
+        session.tick(0)
+        time.sleep(period)
+    tick_ms.sort()
+    out.put((local, {
+        'checksum': session.checksum(args.frames),
+        'rollbacks': session.rollbacks,
+        'resimulated': session.resimulated,
+        'max_rollback_ms': session.max_rollback_ms,
+        'tick_p99_ms': tick_ms[int(len(tick_ms) * 0.99)],
+        'stalls': session.stalls,
+        'dropped': link.dropped,
+        'sent': link.sent,
+    }))
+    link.close()
+
+
+def offline(frames):
+    import zlib
+    from engine.env import load_1_1
+    from engine.netplay import Match
+    match = Match(load_1_1())
+    for f in range(frames):
+        match.advance((script(0, f), script(1, f)))
+    return zlib.crc32(match.save())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--frames', type=int, default=900)
+    parser.add_argument('--rtt-ms', type=float, default=100)
+    parser.add_argument('--jitter-ms', type=float, default=10)
+    parser.add_argument('--loss', type=float, default=0.05)
+    args = parser.parse_args()
+
+    ctx = mp.get_context('spawn')
+    out = ctx.Queue()
+    procs = [ctx.Process(target=client, args=(i, args, out)) for i in range(2)]
+    for p in procs:
+        p.start()
+    results = dict(out.get(timeout=args.frames / 30 + 60) for _ in procs)
+    for p in procs:
+        p.join()
+    expected = offline(args.frames)
+
+    ok = True
+    print(f'{args.frames} frames, rtt {args.rtt_ms:.0f} ms +{args.jitter_ms:.0f} jitter, '
+          f'{args.loss:.0%} loss')
+    for i in range(2):
+        r = results[i]
+        if r is None:
+            print(f'player {i + 1}: could not connect')
+            ok = False
+            continue
+        same = r['checksum'] == expected
+        ok &= same
+        print(f'player {i + 1}: {r["rollbacks"]} rollbacks, {r["resimulated"]} frames re-simulated, '
+              f'slowest {r["max_rollback_ms"]:.2f} ms, tick p99 {r["tick_p99_ms"]:.2f} ms, '
+              f'{r["stalls"]} stalls, {r["dropped"]}/{r["sent"]} packets dropped, '
+              f'state matches offline run: {"yes" if same else "NO"}')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+engine.particles at full load: update() + draw() time per frame with
+--live particles kept alive on an 800x600 target, and the memory traced
+before and after the run (it must not grow). For scale, the same effect
+as one small Surface blit per particle.
+
+    python benchmarks/bench_particles.py [--live 50000] [--frames 600] [--naive 5000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+import pygame
+from engine.particles import Particles
+
+BUDGET_MS = 1000 / 60
+
+
+def percentiles(times):
+    times = sorted(times)
+    return times[len(times) // 2] * 1000, times[int(len(times) * 0.99)] * 1000
+
+
+def run_arrays(screen, live, frames):
+    particles = Particles(live, seed=0)
+    rng = np.random.default_rng(0)
+    effects = list(particles.effects)
+
+    def frame():
+        for _ in range((live - len(particles)) // 500):
+            particles.burst(rng.integers(0, 800), rng.integers(100, 500),
+                            effects[rng.integers(len(effects))], 500)
+        particles.update()
+        screen.fill((0, 0, 0))
+        particles.draw(screen)
+
+    for _ in range(120):
+        frame()
+    times = np.zeros(frames)    # preallocated, so only the particles can grow
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(frames):
+        t0 = time.perf_counter()
+        frame()
+        times[i] = time.perf_counter() - t0
+    grown = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    storage = sum(a.nbytes for a in vars(particles).values() if isinstance(a, np.ndarray))
+    return percentiles(times), grown, storage, particles.dropped
+
+
+def run_naive(screen, live, frames):
+    """A Surface and a Python object per particle."""
+    dot = pygame.Surface((2, 2)).convert()
+    dot.fill((255, 220, 0))
+    rng = np.random.default_rng(0)
+    parts = [[400.0, 300.0, float(vx), float(vy), int(life)]
+             for vx, vy, life in zip(rng.uniform(-2, 2, live), rng.uniform(-5, 0, live),
+                                     rng.integers(20, 40, live))]
+    times = []
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        for p in parts:
+            p[3] += 0.3
+            p[0] += p[2]
+            p[1] += p[3]
+            p[4] -= 1
+            if p[4] <= 0:
+                p[:] = [400.0, 300.0, p[2], -p[3], 30]
+        screen.fill((0, 0, 0))
+        for p in parts:
+            screen.blit(dot, (p[0], p[1]))
+        times.append(time.perf_counter() - t0)
+    return percentiles(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--live', type=int, default=50_000)
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--naive', type=int, default=5000, help='particles for the blit-per-particle run')
+    args = parser.parse_args()
+
+    pygame.init()
+    screen = pygame.display.set_mode((800, 600))
+    (p50, p99), grown, storage, dropped = run_arrays(screen, args.live, args.frames)
+    print(f'arrays  {args.live:>7,} live   p50 {p50:6.2f} ms   p99 {p99:6.2f} ms   '
+          f'storage {storage / 1e6:.1f} MB   traced growth {grown:+,} B   dropped {dropped}')
+    n50, n99 = run_naive(screen, args.naive, min(args.frames, 120))
+    print(f'naive   {args.naive:>7,} live   p50 {n50:6.2f} ms   p99 {n99:6.2f} ms')
+    ok = p99 < BUDGET_MS and grown < 1024   # a few live ints, not per-frame growth
+    print(f'{args.live:,} particles within a 60 FPS frame, fixed memory: {"yes" if ok else "NO"}')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
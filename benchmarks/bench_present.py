@@ -0,0 +1,70 @@
+"""
+Cost of drawing a 1-1 frame and presenting it to windows of growing size.
+
+The frame is always drawn at 800x600 (presenter.target), so the draw time
+should not move with the window; only the single scale in present() does.
+The sdl mode hands that scale to SDL's renderer (on the GPU with a real
+video driver; the dummy driver used here does it in software).
+
+    python benchmarks/bench_present.py [--frames 300]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+WINDOWS = ('1920x1080', '2560x1440', '3840x2160')
+# sdl scales inside the renderer, so the window size does not apply to it
+RUNS = ([('800x600', 'integer')] + [(w, m) for w in WINDOWS for m in ('integer', 'fit', 'stretch')]
+        + [('3840x2160', 'sdl')])
+
+
+def worker(window, mode, frames):
+    # one process per window: the display size is fixed at import time
+    os.environ['MARIO_WINDOW'] = window
+    os.environ['MARIO_SCALE'] = mode
+    import pygame
+    from engine.env import Held
+    from engine.loader import load_game
+    from suite import JUMPS_1_1
+    smb = load_game('1-1')
+    game = smb.Game()
+    game.handle_key(pygame.K_RETURN)
+    keys = Held(pygame.K_RIGHT)
+    draw = present = 0.0
+    for f in range(frames):
+        if f in JUMPS_1_1:
+            game.handle_key(pygame.K_SPACE)
+        game.update(keys, 1 / 60)
+        t0 = time.perf_counter()
+        game.draw(smb.screen)
+        t1 = time.perf_counter()
+        smb.presenter.present()
+        present += time.perf_counter() - t1
+        draw += t1 - t0
+
+    print(f'{window:>10} {mode:8} draw {draw / frames * 1000:6.3f} ms  '
+          f'present {present / frames * 1000:6.3f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--worker', nargs=2)
+    args = parser.parse_args()
+    if args.worker:
+        worker(*args.worker, args.frames)
+        return
+    for window, mode in RUNS:
+        subprocess.run([sys.executable, __file__, '--frames', str(args.frames),
+                        '--worker', window, mode], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Level hot-reload on a 10,000-column level: time from saving an edit to
+the next frame being drawn (poll, parse, diff, apply, draw), against
+rebuilding the level from scratch and drawing it.
+
+Each edit is checked: the reloaded level must hold the same objects as a
+fresh build of the edited file, and the player must not have moved.
+
+    python benchmarks/bench_reload.py [--columns 10000] [--edits 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from engine import levelfile
+from engine.loader import load_game
+
+
+def big_level(entries, columns):
+    """1-1 repeated end to end until it is `columns` wide."""
+    width = next(e[1] for e in entries if e[0] == 'length')
+    copies = -(-columns // width)
+    out = [('length', width * copies)]
+    for i in range(copies):
+        for entry in entries:
+            if entry[0] == 'flag' and i < copies - 1:
+                continue
+            if entry[0] != 'length':
+                out.append((entry[0], entry[1] + i * width) + entry[2:])
+    return out
+
+
+def edit(entries, near, rng):
+    """A few edits around column `near`: move a block, add a pipe, drop or add a goomba."""
+    entries = list(entries)
+    blocks = [i for i, e in enumerate(entries) if e[0] in ('brick', 'question') and abs(e[1] - near) < 60]
+    if blocks:
+        i = rng.choice(blocks)
+        name, x, y = entries[i]
+        entries[i] = (name, x + rng.choice((-1, 1)), y)
+    entries.append(('pipe', near + rng.randrange(10, 40), rng.randrange(2, 5)))
+    goombas = [i for i, e in enumerate(entries) if e[0] == 'goomba' and abs(e[1] - near) < 200]
+    if goombas and rng.random() < 0.5:
+        del entries[rng.choice(goombas)]
+    else:
+        entries.append(('goomba', near + rng.randrange(20, 50)))
+    return entries
+
+
+def contents(level):
+    return Counter([(type(o).__name__, tuple(o.rect), o.kind) for o in level.solids]
+                   + [('Goomba', tuple(e.rect)) for e in level.enemies]
+                   + [('flag', tuple(level.flag.rect) if level.flag else None, level.length_px)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--columns', type=int, default=10000)
+    parser.add_argument('--edits', type=int, default=20)
+    args = parser.parse_args()
+
+    smb = load_game('1-1')
+    entries = big_level(smb.LEVEL_1_1, args.columns)
+    path = os.path.join(tempfile.gettempdir(), 'bench-reload-level.txt')
+    levelfile.write(path, entries)
+    watcher = levelfile.Watcher(path)
+
+    game = smb.Game()
+    game.level = smb.build_level(entries)
+    game.state = smb.PLAYING
+    near = args.columns // 2
+    game.player.rect.topleft = (near * smb.TILE, smb.GROUND_TOP - 4 * smb.TILE)
+    game.camera_x = near * smb.TILE - smb.SCREEN_WIDTH // 2
+    game.draw(smb.screen)
+    print(f'{args.columns} columns, {len(entries)} entries, {len(game.level.solids)} solids, '
+          f'{len(game.level.enemies)} goombas')
+
+    rng = random.Random(0)
+    reload_ms, rebuild_ms = [], []
+    ok = True
+    for n in range(args.edits):
+        entries = edit(entries, near, rng)
+        levelfile.write(path, entries)
+        watcher.stamp = None        # mtime granularity: make sure this write is seen
+        before = tuple(game.player.rect)
+        t0 = time.perf_counter()
+        new = watcher.poll()
+        game.level.apply(new)
+        game.draw(smb.screen)
+        reload_ms.append((time.perf_counter() - t0) * 1000)
+
+        t0 = time.perf_counter()
+        fresh = smb.build_level(levelfile.read(path))
+        camera = game.camera_x
+        fresh.draw(smb.screen, camera)
+        rebuild_ms.append((time.perf_counter() - t0) * 1000)
+        ok &= contents(game.level) == contents(fresh) and tuple(game.player.rect) == before
+
+    os.remove(path)
+    reload_ms.sort()
+    rebuild_ms.sort()
+    print(f'reload-to-visible  median {reload_ms[len(reload_ms) // 2]:7.2f} ms   max {reload_ms[-1]:7.2f} ms')
+    print(f'full rebuild       median {rebuild_ms[len(rebuild_ms) // 2]:7.2f} ms   max {rebuild_ms[-1]:7.2f} ms')
+    print(f'reloaded level matches a fresh build: {"yes" if ok else "NO"}')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Rewind history cost: per-tick capture time, memory for a full 60 s of
+history, and step-back time, for 1-1 (scripted run, restarted at the flag)
+and the mario3 world 6 boss fight.
+
+Every step back is checked against the snapshot taken on the way forward.
+
+    python benchmarks/bench_rewind.py [--frames 4200] [--budget-us 100]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+import pygame
+from engine import savestate
+from engine.env import Held
+from engine.loader import load_game
+from engine.rewind import Rewind
+from suite import JUMPS_1_1
+
+DT = 1 / 60
+
+
+def ticks_1_1(game, smb):
+    keys = Held(pygame.K_RIGHT)
+    frame = 0
+    while True:
+        if game.state != smb.PLAYING:
+            game.restart()
+            frame = 0
+        if frame in JUMPS_1_1:
+            game.handle_key(pygame.K_SPACE)
+        game.update(keys, DT)
+        frame += 1
+        yield
+
+
+def ticks_mario3(m3):
+    keys = Held(pygame.K_RIGHT)
+    jump = pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE)
+    while True:
+        if random.random() < 0.05:
+            m3.handle_event(jump)
+        m3.handle_keys(keys)
+        m3.update_game()
+        yield
+
+
+def measure(name, target, ticks, frames, budget_us):
+    rewind = Rewind(name, target)
+    history = []
+    capture = []
+    for _ in range(frames):
+        next(ticks)
+        t0 = time.perf_counter()
+        rewind.capture()
+        capture.append(time.perf_counter() - t0)
+        history.append(savestate.dumps(name, target))
+    history = history[-rewind.count - 1:]
+    stored = rewind.nbytes + len(rewind.current)
+    raw = sum(map(len, history))
+
+    exact = True
+    back = []
+    for expected in reversed(history[:-1]):
+        t0 = time.perf_counter()
+        rewind.step_back()
+        back.append(time.perf_counter() - t0)
+        exact &= savestate.dumps(name, target) == expected
+    exact &= not rewind.step_back()
+
+    capture_us = np.array(capture) * 1e6
+    back_us = np.array(back) * 1e6
+    p99 = np.percentile(capture_us, 99)
+    print(f'{name:7} {len(back)} frames ({len(back) / 60:.0f} s): {stored / 1024:.0f} KB '
+          f'(full snapshots would be {raw / 1024:.0f} KB)')
+    print(f'        capture mean {capture_us.mean():5.1f} us  p99 {p99:5.1f} us  '
+          f'step back mean {back_us.mean():5.1f} us  exact: {"yes" if exact else "NO"}')
+    return exact and p99 <= budget_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--frames', type=int, default=4200)
+    parser.add_argument('--budget-us', type=float, default=100.0,
+                        help='fail if the p99 capture time exceeds this')
+    args = parser.parse_args()
+
+    smb = load_game('1-1')
+    game = smb.Game()
+    game.handle_key(pygame.K_RETURN)
+    ok = measure('1-1', game, ticks_1_1(game, smb), args.frames, args.budget_us)
+
+    random.seed(0)
+    m3 = load_game('mario3')
+    m3.current_world, m3.current_level = 6, 5
+    m3.generate_level(6, 5)
+    m3.game_state = m3.BOSS_FIGHT
+    ok &= measure('mario3', m3, ticks_mario3(m3), args.frames, args.budget_us)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Save-state size, write time and mmap restore time for 1-1 (the stairs
+section, reached with the scripted run) and mario3 (the world 6 boss).
+
+Each game is also checked for an exact replay: the state reached by running
+on from a snapshot must equal the state reached after restoring it and
+running the same frames again.
+
+    python benchmarks/bench_savestate.py [--repeat 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pygame
+from engine import savestate
+from engine.env import Held
+from engine.loader import load_game
+from suite import JUMPS_1_1
+
+DT = 1 / 60
+
+
+def run_1_1(game, start, frames):
+    keys = Held(pygame.K_RIGHT)
+    for f in range(start, start + frames):
+        if f in JUMPS_1_1:
+            game.handle_key(pygame.K_SPACE)
+        game.update(keys, DT)
+
+
+def run_mario3(m3, frames):
+    keys = Held(pygame.K_RIGHT)
+    jump = pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE)
+    for f in range(frames):
+        if random.random() < 0.05:
+            m3.handle_event(jump)
+        m3.handle_keys(keys)
+        m3.update_game()
+
+
+def measure(name, target, advance, repeat):
+    path = os.path.join(tempfile.gettempdir(), f'bench-{name}.msav')
+    size = savestate.save(path, name, target)
+    snapshot = savestate.dumps(name, target)
+    advance()
+    expected = savestate.dumps(name, target)
+    savestate.load(path, target)
+    advance()
+    replayed = savestate.dumps(name, target) == expected
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        savestate.save(path, name, target)
+    write_us = (time.perf_counter() - t0) / repeat * 1e6
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        savestate.load(path, target)
+    load_us = (time.perf_counter() - t0) / repeat * 1e6
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        savestate.loads(target, snapshot)
+    loads_us = (time.perf_counter() - t0) / repeat * 1e6
+    os.remove(path)
+    print(f'{name:7} {size:>6} B  save {write_us:7.1f} us  load (mmap) {load_us:7.1f} us  '
+          f'loads {loads_us:7.1f} us  exact replay: {"yes" if replayed else "NO"}')
+    return replayed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    smb = load_game('1-1')
+    game = smb.Game()
+    game.handle_key(pygame.K_RETURN)
+    start = 1150    # on the way up the stairs(180, ...) section
+    run_1_1(game, 0, start)
+    ok = measure('1-1', game, lambda: run_1_1(game, start, 120), args.repeat)
+
+    random.seed(0)
+    m3 = load_game('mario3')
+    m3.current_world, m3.current_level = 6, 5
+    m3.generate_level(6, 5)
+    m3.game_state = m3.BOSS_FIGHT
+    run_mario3(m3, 400)     # let the boss fire a few projectiles
+    print(f'mario3 boss projectiles in flight: {len(m3.boss.projectiles)}')
+    ok &= measure('mario3', m3, lambda: run_mario3(m3, 300), args.repeat)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""
+engine.scores: what recording costs the game thread, and how fast the
+leaderboard answers with a large history.
+
+First --live runs of mario3-like play (a start, a split per level, a finish)
+go through Scores: the time of each call on the game thread, and how long
+the writer takes to commit them all. For scale, the same records committed
+one at a time on the game thread. Then the database is filled to --runs
+runs, and the top-10 per level and per run is timed with the indexes and
+without them (NOT INDEXED); both must give the same rows.
+
+    python benchmarks/bench_scores.py [--runs 1000000] [--live 20000]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from engine.events import DEATH, LEVEL_CLEAR
+from engine.scores import TOP_LEVEL, TOP_RUNS, Scores, connect
+
+LEVELS = [f'{w}-{l}' for w in range(1, 7) for l in range(1, 6)]
+
+
+def cleared(rng):
+    """Levels cleared in a run: most runs end early, three on average."""
+    return min(int(rng.expovariate(1 / 3)), len(LEVELS) - 1)
+
+
+def play(scores, rng, runs, times):
+    """`runs` runs through Scores, each call's seconds appended to `times`."""
+    tick = [0]
+    scores.clock = lambda: tick[0]
+    level = [0]
+    scores.level = lambda: LEVELS[level[0]]
+    perf = time.perf_counter
+    for _ in range(runs):
+        t0 = perf()
+        scores.start()
+        times.append(perf() - t0)
+        score = 0
+        for level[0] in range(cleared(rng)):
+            tick[0] += rng.randrange(1800, 7200)
+            score += rng.randrange(100, 2000)
+            t0 = perf()
+            scores.on_event(LEVEL_CLEAR, 0, 0, 0, score)
+            times.append(perf() - t0)
+        t0 = perf()
+        scores.on_event(DEATH, 0, 0, 0, score)
+        times.append(perf() - t0)
+
+
+def naive(path, rng, runs):
+    """Each record committed on the game thread as it happens; seconds per call."""
+    db = connect(path)
+    times = []
+    perf = time.perf_counter
+    for _ in range(runs):
+        t0 = perf()
+        with db:
+            run = db.execute('INSERT INTO runs (game, started) VALUES (?, ?)', ('mario3', time.time())).lastrowid
+        times.append(perf() - t0)
+        score = 0
+        for level in LEVELS[:cleared(rng)]:
+            score += rng.randrange(100, 2000)
+            t0 = perf()
+            with db:
+                db.execute('INSERT INTO splits VALUES (?, ?, ?, ?, ?, ?)',
+                           (run, 'mario3', level, score, 0, time.time()))
+            times.append(perf() - t0)
+        t0 = perf()
+        with db:
+            db.execute("UPDATE runs SET ended = ?, score = ?, outcome = 'dead' WHERE id = ?",
+                       (time.time(), score, run))
+        times.append(perf() - t0)
+    db.close()
+    return times
+
+
+def fill(path, rng, runs):
+    """Bulk-insert runs until the database holds `runs` of them."""
+    db = connect(path)
+    have = db.execute('SELECT COUNT(*) FROM runs').fetchone()[0]
+    first = db.execute('SELECT COALESCE(MAX(id), 0) FROM runs').fetchone()[0] + 1
+    end = first + runs - have
+    for chunk in range(first, end, 50_000):
+        rows, splits = [], []
+        for run in range(chunk, min(chunk + 50_000, end)):
+            score = ticks = 0
+            n = cleared(rng)
+            for level in LEVELS[:n]:
+                score += rng.randrange(100, 2000)
+                ticks += rng.randrange(1800, 7200)
+                splits.append((run, 'mario3', level, score, ticks, 0.0))
+            rows.append((run, 'mario3', 0.0, 0.0, score, ticks, n, 'dead'))
+        with db:
+            db.executemany('INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            db.executemany('INSERT INTO splits VALUES (?, ?, ?, ?, ?, ?)', splits)
+    db.close()
+
+
+def timed(db, sql, args, repeat=20):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        rows = db.execute(sql, args).fetchall()
+    return rows, (time.perf_counter() - t0) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=1_000_000, help='runs in the database for the queries')
+    parser.add_argument('--live', type=int, default=20_000, help='runs recorded through Scores')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    path = os.path.join(tempfile.gettempdir(), 'bench-scores.db')
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    def report(name, times, extra=''):
+        times.sort()
+        print(f'{name:<24} p50 {times[len(times) // 2] * 1e6:8.1f} us   '
+              f'p99 {times[int(len(times) * 0.99)] * 1e6:8.1f} us   '
+              f'max {times[-1] * 1e3:7.2f} ms   {extra}')
+
+    scores = Scores('mario3', path)
+    times = []
+    t0 = time.perf_counter()
+    play(scores, rng, args.live, times)
+    queued = time.perf_counter() - t0
+    scores.flush()
+    written = time.perf_counter() - t0
+    report('Scores (queued)', times, f'{len(times):,} calls; committed {len(times) / written:,.0f}/s '
+                                     f'({queued:.2f} s queueing, {written:.2f} s to disk)')
+    top = scores.top('1-1', 3)
+    scores.close()      # writes the last run's death
+    ok = scores.written == len(times) and scores.error is None
+
+    slow = naive(path + '.naive', rng, min(args.live, 500))
+    report('commit per record', slow, f'{len(slow):,} calls')
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + '.naive' + suffix):
+            os.remove(path + '.naive' + suffix)
+
+    t0 = time.perf_counter()
+    fill(path, rng, args.runs)
+    db = sqlite3.connect(path)
+    splits = db.execute('SELECT COUNT(*) FROM splits').fetchone()[0]
+    print(f'filled to {args.runs:,} runs, {splits:,} splits in {time.perf_counter() - t0:.1f} s '
+          f'({os.path.getsize(path) / 1e6:.0f} MB)')
+    for name, sql, query in (('top 10, level 3-2', TOP_LEVEL, ('mario3', '3-2', 10)),
+                             ('top 10, runs', TOP_RUNS, ('mario3', 10))):
+        fast, fast_s = timed(db, sql, query)
+        plan = ' '.join(row[-1] for row in db.execute('EXPLAIN QUERY PLAN ' + sql, query))
+        table = 'splits' if sql is TOP_LEVEL else 'runs'
+        scan, scan_s = timed(db, sql.replace(f'FROM {table}', f'FROM {table} NOT INDEXED'), query, 2)
+        ok &= fast == scan and 'USING INDEX' in plan and 'TEMP B-TREE' not in plan
+        print(f'{name:<24} {fast_s * 1e3:8.3f} ms   without the index {scan_s * 1e3:9.1f} ms   '
+              f'same rows: {"yes" if fast == scan else "NO"}   plan: {plan}')
+    db.close()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    ok &= len(top) == 3
+    print(f'every record committed and leaderboards served from the indexes: {"yes" if ok else "NO"}')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
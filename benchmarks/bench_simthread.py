@@ -0,0 +1,138 @@
+"""
+engine.simthread on the scripted 1-1 run: how late each 60 Hz tick starts
+when every --every'th drawn frame stalls, in the single-thread loop (ticks
+wait for the frame) and with the SimThread (ticks run beside it). Two kinds
+of stall: one that releases the GIL (sleep, like a big blit or a vsync
+wait) and one in pure Python that holds it, which only the lowered switch
+interval lets the simulation cut into.
+
+The threaded run must also end in the same game state as stepping the
+same ticks directly.
+
+    python benchmarks/bench_simthread.py [--frames 600] [--stall-ms 40] [--every 30]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pygame
+from engine import savestate
+from engine.env import Held
+from engine.loader import load_game
+from engine.simthread import SimThread
+from suite import DT, JUMPS_1_1
+
+
+def scripted(smb):
+    """A fresh game and tick(keys, pressed) playing the scripted run."""
+    game = smb.Game()
+    game.handle_key(pygame.K_RETURN)
+    held = Held(pygame.K_RIGHT)
+    ticks = [0]
+
+    def tick(keys=None, pressed=()):
+        if ticks[0] in JUMPS_1_1:
+            game.handle_key(pygame.K_SPACE)
+        game.update(held, DT)
+        ticks[0] += 1
+        smb.particles.update()
+    return game, tick, ticks
+
+
+def stalls(kind, seconds):
+    def sleep():
+        time.sleep(seconds)
+
+    def spin():
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            pass
+    return {'sleep': sleep, 'python': spin}[kind]
+
+
+def single(smb, frames, stall, every):
+    """Ticks run as they fall due, before each draw; seconds late per tick."""
+    game, tick, ticks = scripted(smb)
+    late = []
+    due = time.perf_counter()
+    drawn = 0
+    while ticks[0] < frames:
+        now = time.perf_counter()
+        while due <= now and ticks[0] < frames:
+            late.append(now - due)
+            tick()
+            due += DT
+        game.draw(smb.screen)
+        drawn += 1
+        if drawn % every == 0:
+            stall()
+        smb.presenter.present()
+        time.sleep(max(0.0, due - time.perf_counter()))
+    return sorted(late), savestate.dumps('1-1', game)
+
+
+def threaded(smb, frames, stall, every):
+    """The SimThread ticks; this thread draws at 60 Hz. Seconds late per tick."""
+    game, tick, ticks = scripted(smb)
+    state = []
+
+    def counted(keys, pressed):
+        tick()
+        if ticks[0] == frames:
+            state.append(savestate.dumps('1-1', game))
+    sim = SimThread(counted, game.snapshot, 60)
+    sim.start()
+    drawn = 0
+    due = time.perf_counter()
+    while not state:
+        due += DT
+        view, _ = sim.view()
+        game.draw(smb.screen, view)
+        drawn += 1
+        if drawn % every == 0:
+            stall()
+        smb.presenter.present()
+        time.sleep(max(0.0, due - time.perf_counter()))
+    sim.stop()
+    return sorted(list(sim.late)[:frames]), state[0], sim.skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--stall-ms', type=float, default=40)
+    parser.add_argument('--every', type=int, default=30, help='drawn frames between stalls')
+    args = parser.parse_args()
+
+    smb = load_game('1-1')
+    reference, tick, _ = scripted(smb)
+    for _ in range(args.frames):
+        tick()
+    reference = savestate.dumps('1-1', reference)
+
+    def report(name, late, extra=''):
+        print(f'{name:<28} late p50 {late[len(late) // 2] * 1000:6.2f} ms   '
+              f'p99 {late[int(len(late) * 0.99)] * 1000:6.2f} ms   max {late[-1] * 1000:6.2f} ms   {extra}')
+
+    ok = True
+    for kind in ('sleep', 'python'):
+        stall = stalls(kind, args.stall_ms / 1000)
+        late, state = single(smb, args.frames, stall, args.every)
+        report(f'single thread, {kind} stall', late)
+        late, state, skipped = threaded(smb, args.frames, stall, args.every)
+        same = state == reference
+        ok &= same and late[int(len(late) * 0.99)] < DT
+        report(f'SimThread, {kind} stall', late,
+               f'{skipped} skipped, state {"matches" if same else "DIFFERS"}')
+    print(f'ticks on time through {args.stall_ms:g} ms stalls: {"yes" if ok else "NO"}')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,424 @@
+"""
+Headless benchmark suite for all four games.
+
+Each game runs in its own worker process (SDL dummy video driver for the
+pygame games, a windowless ursina app for the 3D port) with scripted input
+for a fixed number of frames:
+
+    1-1       build_level_1_1() timing, then a scripted run to the flag
+    mario3    every world/level 1-1 .. 6-5 played to its flag, castle levels
+              as boss fights stomped until cleared
+    mario4k   the real run_game() loop with patched input and clock
+    3d        the 3D port after Start, walking and jumping through the level
+
+Every game is run twice: once for timing and peak RSS, once under
+tracemalloc for allocations per frame. Results are written as JSON and
+optionally compared with a saved baseline; a regression beyond the
+tolerance makes the exit status non-zero.
+
+    python benchmarks/suite.py [--frames 1500] [--games 1-1 mario3 ...]
+                               [--out results.json]
+                               [--save-baseline | --baseline [PATH]] [--tolerance 0.1]
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+os.environ['MARIO_SCORES'] = ''     # scripted runs stay off the leaderboard
+
+from engine.loader import ROOT, load_game
+
+GAMES = ('1-1', 'mario3', 'mario4k', '3d')
+DEFAULT_BASELINE = os.path.join(HERE, 'baseline.json')
+DT = 1 / 60
+
+# A winning 1-1 schedule: hold RIGHT every frame and press SPACE on these frames.
+JUMPS_1_1 = frozenset([128, 204, 254, 304, 356, 411, 545, 579, 617, 738, 788,
+                       882, 970, 1020, 1048, 1094])
+
+# metric -> +1 if higher is better, -1 if lower is better
+COMPARED = {
+    'ticks_per_s': +1,
+    'frame_ms_p50': -1,
+    'frame_ms_p99': -1,
+    'peak_rss_mb': -1,
+    'alloc_bytes_per_frame': -1,
+    'alloc_blocks_per_frame': -1,
+}
+
+
+LEVEL_FRAMES = 1800     # mario3: longest a level may take to clear
+RETRY_FRAMES = 600      # mario3: then ESC, ENTER for a new layout of it
+
+
+class Held:
+    """Stand-in for pygame.key.get_pressed() with a fixed set of held keys."""
+    def __init__(self, *keys):
+        self.keys = set(keys)
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+
+class Done(Exception):
+    pass
+
+
+# ------------------------------------------------------------------
+# Scenarios: run the game, calling tick() once at the end of every frame
+# (with the game state the frame was in, where the game has more than one)
+# ------------------------------------------------------------------
+def scenario_1_1(frames, tick):
+    import pygame
+    smb = load_game('1-1')
+    t0 = time.perf_counter()
+    for _ in range(20):
+        smb.build_level_1_1()
+    build_ms = (time.perf_counter() - t0) / 20 * 1000
+
+    game = smb.Game()
+    game.handle_key(pygame.K_RETURN)
+    keys = Held(pygame.K_RIGHT)
+    flag_frame = None
+    tick(start=True)
+    for f in range(frames):
+        if f in JUMPS_1_1:
+            game.handle_key(pygame.K_SPACE)
+        game.update(keys, DT)
+        smb.particles.update()
+        game.draw(smb.screen)
+        smb.presenter.present()
+        if flag_frame is None and game.state == smb.LEVEL_COMPLETE:
+            flag_frame = f
+        tick(state=game.view)
+    return {'build_level_ms': round(build_ms, 3), 'reached_flag': flag_frame is not None,
+            'flag_frame': flag_frame}
+
+
+def scenario_mario3(frames, tick):
+    # Every world and level in turn, each played until it is cleared (at
+    # most LEVEL_FRAMES frames), then round again until `frames` have run.
+    # The autopilot only presses keys. It holds RIGHT and jumps the enemy
+    # just ahead or the platform side it has walked into; stuck up on a
+    # platform (over the flag, or under another one) it walks back off. In
+    # a castle it jumps from beside the boss (the boss floats a head above
+    # the ground, and touching it from below or the side costs a life),
+    # keeps clear of it on the way up and steers onto it once above it.
+    # A layout it hasn't cleared in RETRY_FRAMES is dealt again the way a
+    # player would: ESC to the menu and ENTER.
+    import pygame
+    random.seed(0)
+    m3 = load_game('mario3')
+    levels = [(w, l) for w in range(1, 7) for l in range(1, 6)]
+    jump = pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE)
+    redeal = [pygame.event.Event(pygame.KEYDOWN, key=key) for key in (pygame.K_ESCAPE, pygame.K_RETURN)]
+    right, left, none = Held(pygame.K_RIGHT), Held(pygame.K_LEFT), Held()
+    cleared, boss_hits, played, retries = set(), 0, 0, 0
+    backing = [None]    # bottom of the platform being backed off, until it is left below
+    last_x, stuck = [None], [0]     # x on the frame before, frames it hasn't moved
+
+    def enter(world, level):
+        m3.current_world, m3.current_level = world, level
+        m3.generate_level(world, level)
+        m3.player.lives = 3
+        m3.game_state = m3.PLAYING      # a castle turns into the boss fight once the player walks in
+
+    def steer():
+        player, boss = m3.player, m3.boss
+        if boss:
+            dx = boss.rect.centerx - player.rect.centerx
+            toward, away = (right, left) if dx > 0 else (left, right)
+            if player.rect.bottom <= boss.rect.top:
+                return toward
+            clear = (player.rect.width + boss.rect.width) // 2 + 5
+            if abs(dx) < clear:
+                return away
+            if player.on_ground and abs(dx) < clear + 30:
+                m3.handle_event(jump)
+                return none
+            return toward if player.on_ground else none
+        blocked, last_x[0] = player.rect.x == last_x[0], player.rect.x
+        stuck[0] = stuck[0] + 1 if blocked and player.on_ground else 0
+        # stuck up on a platform: walk (and hop) back until it drops off
+        if backing[0] is not None and player.rect.bottom > backing[0]:
+            backing[0] = None
+        elif backing[0] is None and player.on_ground and player.rect.bottom < m3.SCREEN_HEIGHT - 20 and (
+                player.rect.right >= m3.SCREEN_WIDTH or stuck[0] > 10):
+            backing[0], blocked, stuck[0] = player.rect.bottom, False, 0   # blocked going right, not yet left
+        if player.on_ground and (blocked or backing[0] is None and any(
+                0 <= e.rect.left - player.rect.right <= 40
+                and e.rect.bottom == player.rect.bottom for e in m3.enemies)):
+            m3.handle_event(jump)
+        return right if backing[0] is None else left
+
+    tick(start=True)
+    while played < frames or len(cleared) < len(levels):
+        for world, level in levels:
+            enter(world, level)
+            for f in range(1, LEVEL_FRAMES + 1):
+                if f % RETRY_FRAMES == 0:
+                    for event in redeal:
+                        m3.handle_event(event)
+                    backing[0] = None
+                    retries += 1
+                m3.handle_keys(steer())
+                health = m3.boss.health if m3.boss else 0
+                m3.update_game()
+                m3.particles.update()
+                if m3.boss and m3.boss.health < health:
+                    boss_hits += 1
+                m3.draw_game()
+                m3.presenter.present()
+                played += 1
+                state = m3.game_state
+                tick(state=state)
+                if state == m3.LEVEL_COMPLETE:
+                    cleared.add((world, level))
+                    break
+                if state == m3.GAME_OVER:
+                    enter(world, level)
+            if played >= frames and len(cleared) == len(levels):
+                break
+        if len(cleared) < len(levels):
+            break
+    if len(cleared) < len(levels) or not boss_hits:
+        missed = ' '.join(f'{w}-{l}' for w, l in levels if (w, l) not in cleared)
+        raise RuntimeError(f'mario3: {len(cleared)}/{len(levels)} levels cleared '
+                           f'(not {missed or "-"}), {boss_hits} boss hits')
+    return {'levels': len(levels), 'frames_played': played,
+            'levels_cleared': len(cleared), 'boss_hits': boss_hits, 'retries': retries}
+
+
+def scenario_mario4k(frames, tick):
+    # run_game() keeps its state in locals, so drive the real loop by
+    # replacing its inputs: the clock marks frame boundaries, the event
+    # queue scripts the jumps and ends the run.
+    import pygame
+    count = [0]
+
+    class Clock:
+        def tick(self, fps=0):
+            if count[0]:
+                tick()
+            return 1000 / 60    # exactly one simulation step per frame
+
+    def get_events():
+        count[0] += 1
+        if count[0] > frames:
+            raise Done
+        if count[0] % 40 == 0:
+            return [pygame.event.Event(pygame.KEYDOWN, key=pygame.K_z)]
+        return []
+
+    pygame.key.get_pressed = lambda: Held(pygame.K_RIGHT)
+    pygame.event.get = get_events
+    m4 = load_game('mario4k')
+    m4.clock = Clock()
+    tick(start=True)
+    try:
+        m4.run_game()
+    except Done:
+        pass
+    return {}
+
+
+def scenario_3d(frames, tick):
+    os.environ['ULTRAMARIO_WINDOW'] = 'none'
+    os.chdir(ROOT)
+    import __main__
+    game = load_game('ultramario3d')
+    from ursina import held_keys
+    game.menu.start_game()
+    __main__.update = game.update
+    held_keys['d'] = 1
+    reached_goal = False
+    tick(start=True)
+    for f in range(frames):
+        held_keys['space'] = 1 if f % 45 < 3 else 0
+        held_keys['w'] = 1 if (f // 120) % 2 else 0
+        try:
+            game.app.step()
+        except SystemExit:   # the goal quits the app
+            reached_goal = True
+            break
+        tick()
+    return {'reached_goal': reached_goal, 'coins': game.mario.coins}
+
+
+SCENARIOS = {
+    '1-1': scenario_1_1,
+    'mario3': scenario_mario3,
+    'mario4k': scenario_mario4k,
+    '3d': scenario_3d,
+}
+
+
+# ------------------------------------------------------------------
+# Worker
+# ------------------------------------------------------------------
+def percentile(ordered, q):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_timed(name, frames):
+    stamps = []
+
+    def tick(start=False, state=None):
+        if start:
+            stamps.clear()
+        stamps.append(time.perf_counter())
+
+    gc.collect()
+    extra = SCENARIOS[name](frames, tick)
+    times = sorted((b - a) * 1000 for a, b in zip(stamps, stamps[1:]))
+    total = stamps[-1] - stamps[0] if len(stamps) > 1 else 0.0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != 'darwin':
+        rss *= 1024
+    result = {
+        'frames': len(times),
+        'ticks_per_s': round(len(times) / total, 1) if total else 0.0,
+        'frame_ms_p50': round(percentile(times, 0.50), 3),
+        'frame_ms_p90': round(percentile(times, 0.90), 3),
+        'frame_ms_p99': round(percentile(times, 0.99), 3),
+        'frame_ms_max': round(times[-1], 3) if times else 0.0,
+        'peak_rss_mb': round(rss / 2**20, 1),
+    }
+    result.update(extra)
+    return result
+
+
+def run_allocs(name, frames):
+    # preallocated so recording a frame does not itself allocate
+    peaks, blocks = [0] * frames, [0] * frames
+    seen = {'frame': 0}
+
+    def tick(start=False, state=None):
+        current = tracemalloc.get_traced_memory()[0]
+        now = sys.getallocatedblocks()
+        if not start and seen['frame'] < frames:
+            peaks[seen['frame']] = tracemalloc.get_traced_memory()[1] - seen['current']
+            blocks[seen['frame']] = now - seen['blocks']
+            seen['frame'] += 1
+        tracemalloc.reset_peak()
+        seen['current'], seen['blocks'] = current, now
+
+    tracemalloc.start()
+    SCENARIOS[name](frames, tick)
+    tracemalloc.stop()
+    n = seen['frame'] or 1
+    del peaks[n:], blocks[n:]
+    return {
+        'alloc_bytes_per_frame': round(sum(peaks) / n),
+        'alloc_bytes_p99': percentile(sorted(peaks), 0.99),
+        'alloc_blocks_per_frame': round(sum(blocks) / n, 2),
+    }
+
+
+def worker(name, mode, frames):
+    result = run_timed(name, frames) if mode == 'time' else run_allocs(name, frames)
+    # some games keep threads (event log writer, loaders) or an app alive
+    sys.stdout.write('RESULT ' + json.dumps(result) + '\n')
+    sys.stdout.flush()
+    os._exit(0)
+
+
+# ------------------------------------------------------------------
+# Driver
+# ------------------------------------------------------------------
+def spawn(name, mode, frames):
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy')
+    env.pop('MARIO_EVENT_LOG', None)
+    cmd = [sys.executable, os.path.abspath(__file__), '--worker', name, '--mode', mode,
+           '--frames', str(frames)]
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    for line in proc.stdout.splitlines():
+        if line.startswith('RESULT '):
+            return json.loads(line[7:])
+    raise RuntimeError(f'{name} ({mode}) failed:\n{proc.stdout[-2000:]}{proc.stderr[-2000:]}')
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, metrics in results['games'].items():
+        base = baseline.get('games', {}).get(name)
+        if not base:
+            continue
+        for key, sign in COMPARED.items():
+            old, new = base.get(key), metrics.get(key)
+            if not old or new is None:
+                continue
+            change = (new - old) / abs(old)
+            worse = -change if sign > 0 else change
+            flag = 'REGRESSION' if worse > tolerance else ''
+            print(f'  {name:8} {key:24} {old:>12} -> {new:>12}  {change:+7.1%} {flag}')
+            if flag:
+                regressions.append((name, key))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--frames', type=int, default=1500)
+    parser.add_argument('--alloc-frames', type=int, default=600,
+                        help='frames for the (slower) tracemalloc pass')
+    parser.add_argument('--games', nargs='+', choices=GAMES, default=list(GAMES))
+    parser.add_argument('--out', help='write results JSON here')
+    parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE,
+                        help='compare with a saved baseline (default benchmarks/baseline.json)')
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE,
+                        help='save the results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.10)
+    parser.add_argument('--worker', choices=GAMES, help=argparse.SUPPRESS)
+    parser.add_argument('--mode', choices=('time', 'alloc'), default='time', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.mode, args.frames)
+
+    results = {
+        'meta': {'python': platform.python_version(), 'machine': platform.machine(),
+                 'system': platform.system(), 'frames': args.frames},
+        'games': {},
+    }
+    for name in args.games:
+        metrics = spawn(name, 'time', args.frames)
+        metrics.update(spawn(name, 'alloc', min(args.frames, args.alloc_frames)))
+        results['games'][name] = metrics
+        print(f'{name:8} {metrics["ticks_per_s"]:>9} ticks/s  p50 {metrics["frame_ms_p50"]} ms  '
+              f'p99 {metrics["frame_ms_p99"]} ms  rss {metrics["peak_rss_mb"]} MB  '
+              f'{metrics["alloc_bytes_per_frame"]} B/frame')
+
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            f.write(text + '\n')
+        print(f'baseline saved to {args.save_baseline}')
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f'compared with {args.baseline} (tolerance {args.tolerance:.0%}):')
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+"""
+Shared runtime pieces for the games in this repo.
+Modules here never open a window, start a game loop or import ursina, so
+they can be used from benchmarks and headless tools as well as the games.
+"""
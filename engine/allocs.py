@@ -0,0 +1,215 @@
+"""
+Per-frame allocation profile of a game loop, by call site and game state.
+
+tracemalloc sees every Python-level allocation but only keeps what is still
+alive, and most per-frame garbage (a Rect copy, a rendered HUD string, a
+Vec3 sum) is gone by the time a snapshot could be taken. So AllocProfiler
+hooks sys.setprofile instead: at every call/return event it reads
+tracemalloc's peak since the previous event, which is what the code in
+between allocated, and books it to that code: the Python function, or the
+line that called a C function ("1-1.py:144 Block.draw -> Surface.copy").
+Two costs are the profiler's own and are measured once at start() and left
+out: the ints each tracemalloc reading allocates, and the frame object
+every Python call gets once a profile hook is set.
+
+SDL pixel memory is not Python memory, so calls that return a new Surface
+(Surface.copy/convert, Font.render, pygame.transform.*, ...) are also
+counted as surfaces. Plain pygame.Surface(...) constructors are not
+visible to the profile hook and are not counted.
+
+    prof = AllocProfiler()
+    prof.start()
+    for ...:
+        game.update(keys, dt); game.draw(screen)
+        prof.frame(STATE_NAMES[game.state])
+    prof.stop()
+    print(prof.report())
+    failures = prof.check({'Block.draw': 2048, 'Game.draw': (4096, 1)})
+
+The hook makes the game several times slower; it is meant for scripted
+runs (benchmarks/alloc_report.py), not for play.
+"""
+
+import os
+import sys
+import tracemalloc
+from collections import defaultdict
+
+SURFACE_MAKERS = frozenset((
+    'Surface.copy', 'Surface.convert', 'Surface.convert_alpha', 'Surface.premul_alpha',
+    'Font.render', 'pygame.image.load', 'pygame.image.frombuffer', 'pygame.image.fromstring',
+    'pygame.image.frombytes', 'pygame.mask.Mask.to_surface', 'Mask.to_surface',
+))
+NOT_SURFACES = frozenset(('pygame.transform.average_color', 'pygame.transform.threshold'))
+
+
+def c_name(func):
+    owner = getattr(func, '__self__', None)
+    if type(owner).__name__ == 'module':
+        return f'{owner.__name__}.{func.__name__}'
+    return getattr(func, '__qualname__', func.__name__)
+
+
+def makes_surface(name):
+    return name in SURFACE_MAKERS or (name.startswith('pygame.transform.') and name not in NOT_SURFACES)
+
+
+class AllocProfiler:
+    def __init__(self, top=25):
+        self.tracing = False
+        self.state = None
+        self.frames = defaultdict(int)                  # state -> frames
+        self.sites = defaultdict(lambda: [0, 0, 0])     # (state, site) -> [bytes, allocating calls, surfaces]
+        self.frame_bytes = defaultdict(list)            # state -> bytes of each frame
+        self._current = defaultdict(lambda: [0, 0, 0])  # this frame: site -> [...]
+        self._site = None
+        self._mark = 0
+        self.overhead = 0       # see _measure_overhead
+        self.frame_cost = 0
+        self.top = top
+
+    # -- hook -------------------------------------------------------
+    def _hook(self, frame, event, arg):
+        self._book(tracemalloc.get_traced_memory()[1] - self._mark - self.overhead, frame, event, arg)
+        # only once _book's temporaries are freed, or they would hide
+        # smaller allocations under the restarted peak
+        self._mark = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    def _book(self, spent, frame, event, arg):
+        if event == 'call':
+            spent -= self.frame_cost
+        if spent > 0 and self._site is not None:
+            entry = self._current[self._site]
+            entry[0] += spent
+            entry[1] += 1
+        if event == 'c_call':
+            code = frame.f_code
+            name = c_name(arg)
+            self._site = (code, frame.f_lineno, name)
+            if makes_surface(name):
+                self._current[self._site][2] += 1
+        elif event == 'return':
+            back = frame.f_back
+            self._site = (back.f_code, None, None) if back is not None else None
+        else:
+            self._site = (frame.f_code, None, None)
+
+    def start(self, state=None):
+        self.state = state
+        self.tracing = not tracemalloc.is_tracing()
+        if self.tracing:
+            tracemalloc.start()
+        self.overhead, self.frame_cost = self._measure_overhead()
+        self._mark = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        sys.setprofile(self._hook)
+
+    @staticmethod
+    def _measure_overhead():
+        """(bytes the hook's own reads of tracemalloc add to every interval,
+        bytes of the frame object a Python call gets), measured like _hook does."""
+        spent = {'call': [], 'return': []}
+        mark = 0
+
+        def probe():
+            pass
+
+        def hook(frame, event, arg):
+            nonlocal mark
+            if event in spent:
+                spent[event].append(tracemalloc.get_traced_memory()[1] - mark)
+            mark = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+        sys.setprofile(hook)
+        for _ in range(8):
+            probe()
+        sys.setprofile(None)
+        base = min(spent['return'])
+        return base, max(0, min(spent['call']) - base)
+
+    def stop(self):
+        sys.setprofile(None)
+        self._current.clear()
+        if self.tracing:
+            tracemalloc.stop()
+            self.tracing = False
+
+    def frame(self, state=None):
+        """End of a frame; `state` is what the frame was (e.g. 'PLAYING')."""
+        sys.setprofile(None)
+        state = self.state if state is None else state
+        self.frames[state] += 1
+        total = 0
+        for site, (spent, calls, surfaces) in self._current.items():
+            entry = self.sites[state, site]
+            entry[0] += spent
+            entry[1] += calls
+            entry[2] += surfaces
+            total += spent
+        self.frame_bytes[state].append(total)
+        self._current.clear()
+        self._site = None
+        self._mark = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        sys.setprofile(self._hook)
+
+    # -- results ----------------------------------------------------
+    @staticmethod
+    def site_name(site):
+        code, line, cname = site
+        where = f'{os.path.basename(code.co_filename)}:{line or code.co_firstlineno} {code.co_qualname}'
+        return f'{where} -> {cname}' if cname else where
+
+    def per_frame(self):
+        """{state: [(site name, function, bytes/frame, calls/frame, surfaces/frame)]}, biggest first."""
+        out = defaultdict(list)
+        for (state, site), (spent, calls, surfaces) in self.sites.items():
+            n = self.frames[state] or 1
+            out[state].append((self.site_name(site), site[0].co_qualname,
+                               spent / n, calls / n, surfaces / n))
+        for rows in out.values():
+            rows.sort(key=lambda r: (-r[2], -r[4]))
+        return dict(out)
+
+    def by_function(self, state=None):
+        """{function qualname: [bytes/frame, surfaces/frame]} over all states or one.
+
+        A function's share is what its own code and the C functions it calls
+        allocated; Python functions it calls are booked separately.
+        """
+        totals = defaultdict(lambda: [0.0, 0.0])
+        frames = sum(n for s, n in self.frames.items() if state is None or s == state) or 1
+        for (s, site), (spent, _, surfaces) in self.sites.items():
+            if state is None or s == state:
+                entry = totals[site[0].co_qualname]
+                entry[0] += spent / frames
+                entry[1] += surfaces / frames
+        return dict(totals)
+
+    def report(self, top=None):
+        top = top or self.top
+        lines = []
+        for state, rows in self.per_frame().items():
+            sizes = sorted(self.frame_bytes[state])
+            lines.append(f'[{state}] {self.frames[state]} frames, '
+                         f'{sum(sizes) / len(sizes):,.0f} B/frame allocated '
+                         f'(p99 {sizes[min(len(sizes) - 1, int(len(sizes) * 0.99))]:,} B)')
+            lines.append(f'  {"B/frame":>10} {"allocs":>8} {"surfaces":>8}  site')
+            for name, _, spent, calls, surfaces in rows[:top]:
+                lines.append(f'  {spent:>10,.0f} {calls:>8.1f} {surfaces:>8.2f}  {name}')
+        return '\n'.join(lines)
+
+    def check(self, budgets):
+        """Functions over budget: `budgets` maps a qualname to bytes/frame or (bytes, surfaces)."""
+        failures = []
+        functions = self.by_function()
+        for name, budget in budgets.items():
+            limit, surface_limit = budget if isinstance(budget, tuple) else (budget, None)
+            spent, surfaces = functions.get(name, (0.0, 0.0))
+            if spent > limit:
+                failures.append(f'{name}: {spent:,.0f} B/frame > {limit:,} budget')
+            if surface_limit is not None and surfaces > surface_limit:
+                failures.append(f'{name}: {surfaces:.2f} surfaces/frame > {surface_limit} budget')
+        return failures
@@ -0,0 +1,294 @@
+"""
+Lockstep physics for many independent 1-1 games in one process.
+
+BatchSim keeps K copies of the 1-1 simulation in arrays: player position,
+velocity and on-ground flag, each game's goombas and question blocks, its
+state and clock. step() advances every game still PLAYING by one tick,
+doing exactly what Game.update() does for one game, so the results are
+bit-identical to the scalar path for the same inputs.
+
+Collision tests each rect against the few solids listed for its column of
+the level (a table built once from the level's colliders: its blocks and
+merged static solids). Each axis move is
+the array form of engine.sweep.move(): one pass over the column's solids
+keeps the gap to the nearest one in the way. Only a player stopped moving
+up needs to know what it hit; those few rows get a second pass for the
+block the scalar code bumps.
+
+Nothing is drawn and no events are emitted.
+
+    sim = BatchSim(4096)
+    sim.step(left, right, jump)      # bool arrays of length K
+    done = sim.state != PLAYING
+    sim.reset(np.flatnonzero(done))
+"""
+
+import numpy as np
+
+from engine.env import load_1_1
+
+DT = 1 / 60
+ACCEL, MAX_SPEED, FRICTION = 0.5, 3.2, 0.85
+GRAVITY, TERMINAL = 0.5, 8
+JUMP_SPEED, STOMP_BOUNCE = -9.5, -6
+GOOMBA_FALL = 4
+
+
+class BatchSim:
+    def __init__(self, count, smb=None):
+        self.smb = smb = smb or load_1_1()
+        self.count = count
+        self.PLAYING, self.DEAD, self.LEVEL_COMPLETE = smb.PLAYING, smb.DEAD, smb.LEVEL_COMPLETE
+
+        level = smb.build_level_1_1()
+        player = smb.Player(32, smb.GROUND_TOP - smb.TILE)
+        self.spawn = player.rect.topleft
+        self.w, self.h = player.rect.size
+
+        # colliders, in the order the scalar code tests them
+        solids = level.all_colliders()
+        rects = [s.rect for s in solids]
+        self.sx = np.array([r.left for r in rects], dtype=np.int32)
+        self.sy = np.array([r.top for r in rects], dtype=np.int32)
+        self.sr = np.array([r.right for r in rects], dtype=np.int32)
+        self.sb = np.array([r.bottom for r in rects], dtype=np.int32)
+        # solid index -> column in `used` (question blocks), -1 otherwise
+        questions = [s for s in level.blocks if s.used is not None]
+        self.question_col = np.full(len(rects), -1, dtype=np.intp)
+        for col, block in enumerate(questions):
+            self.question_col[solids.index(block)] = col
+        # bumpable blocks, plus False for the sentinel below
+        self.is_block = np.array([isinstance(s, smb.Block) for s in solids] + [False])
+        self.flag = tuple(level.flag.rect)
+
+        goombas = level.enemies
+        self.goomba_spawn = np.array([g.rect.topleft for g in goombas], dtype=np.int32)
+        self.goomba_size = tuple(goombas[0].rect.size) if goombas else (0, 0)
+        self.squashed_size = smb.squashed_goomba_surface().get_size()
+        self.squash_frames = smb.FPS // 2
+
+        self.tile = smb.TILE
+        reach = max(self.w, self.goomba_size[0], self.squashed_size[0])
+        (self.col_solid, self.col_left, self.col_top,
+         self.col_right, self.col_bottom) = self._column_table(reach)
+        # Near edges for _sweep: moving +y, then (negated) moving -y. Moves
+        # along x also reach solids up to MAX_SPEED px past the rect.
+        self.keys_y = np.hstack([self.col_top, -self.col_bottom])
+        _, left, self.xcol_top, right, self.xcol_bottom = self._column_table(reach + int(MAX_SPEED))
+        self.keys_x = np.hstack([left, -right])
+
+        # goomba arrays are (goomba, game) so each goomba's row is contiguous
+        g, q = len(goombas), len(questions)
+        self.x = np.zeros(count, dtype=np.int32)
+        self.y = np.zeros(count, dtype=np.int32)
+        self.vel_x = np.zeros(count)
+        self.vel_y = np.zeros(count)
+        self.on_ground = np.zeros(count, dtype=bool)
+        self.state = np.zeros(count, dtype=np.int8)
+        self.time_left = np.zeros(count, dtype=np.int32)
+        self.hud_timer = np.zeros(count)
+        self.goomba_x = np.zeros((g, count), dtype=np.int32)
+        self.goomba_y = np.zeros((g, count), dtype=np.int32)
+        self.goomba_w = np.zeros((g, count), dtype=np.int32)
+        self.goomba_h = np.zeros((g, count), dtype=np.int32)
+        self.goomba_vx = np.zeros((g, count), dtype=np.int32)
+        self.goomba_alive = np.zeros((g, count), dtype=bool)
+        self.goomba_squash = np.zeros((g, count), dtype=np.int32)
+        self.used = np.zeros((count, q), dtype=bool)
+        self.reset()
+
+    def reset(self, rows=None):
+        """Put `rows` (default: all) back at the start of the level, PLAYING."""
+        rows = slice(None) if rows is None else rows
+        self.x[rows], self.y[rows] = self.spawn
+        self.vel_x[rows] = self.vel_y[rows] = 0
+        self.on_ground[rows] = False
+        self.state[rows] = self.PLAYING
+        self.time_left[rows] = 400
+        self.hud_timer[rows] = 0
+        self.goomba_x[:, rows] = self.goomba_spawn[:, :1]
+        self.goomba_y[:, rows] = self.goomba_spawn[:, 1:]
+        self.goomba_w[:, rows], self.goomba_h[:, rows] = self.goomba_size
+        self.goomba_vx[:, rows] = -1
+        self.goomba_alive[:, rows] = True
+        self.goomba_squash[:, rows] = 0
+        self.used[rows] = False
+
+    # ------------------------------------------------------------------
+    # Collision
+    # ------------------------------------------------------------------
+    def _column_table(self, reach):
+        """Candidate solids per TILE-wide column and their edges.
+
+        A column lists everything that can overlap a rect of width up to
+        `reach` whose left edge is in the column, in list order, padded with
+        a sentinel box that never overlaps. Stored slot-major so each test
+        runs over all rects at once.
+        """
+        tile = self.tile
+        columns = [np.flatnonzero((self.sr > c * tile) & (self.sx < (c + 1) * tile + reach))
+                   for c in range(int(self.sr.max()) // tile + 1)]
+        table = np.full((len(columns), max(map(len, columns))), len(self.sx), dtype=np.intp)
+        for c, solids in enumerate(columns):
+            table[c, :len(solids)] = solids
+        far = np.iinfo(np.int32).max // 2
+        sx, sy = np.append(self.sx, far), np.append(self.sy, far)
+        sr, sb = np.append(self.sr, -far), np.append(self.sb, -far)
+        return (np.ascontiguousarray(table.T),
+                *(np.ascontiguousarray(a[table].T) for a in (sx, sy, sr, sb)))
+
+    def _sweep(self, x, y, w, h, d, axis):
+        """Per rect, engine.sweep.move() by `d` along `axis` (0: x, 1: y).
+
+        Returns the new position on that axis and the gap to the solid it
+        stopped at; the gap is abs(d) where nothing was in the way.
+        """
+        ncols = self.col_solid.shape[1]
+        if axis == 0:
+            pos, across, size, span = x, y, w, h
+            col = np.clip(np.minimum(x, x + d) // self.tile, 0, ncols - 1)
+            keys, alo, ahi = self.keys_x, self.xcol_top, self.xcol_bottom
+        else:
+            pos, across, size, span = y, x, h, w
+            col = np.clip(x // self.tile, 0, ncols - 1)
+            keys, alo, ahi = self.keys_y, self.col_left, self.col_right
+        # near edge of each solid along the move, negated for negative moves
+        # (keys[:, ncols:]) so that nearer is always smaller
+        forward = d > 0
+        start = np.where(forward, pos + size, -pos)
+        key_col = np.where(forward, col, col + ncols)
+        best = np.abs(d)
+        across_end = across + span
+        for slot in range(len(keys)):
+            gap = keys[slot].take(key_col) - start
+            ahead = (gap >= 0) & (across < ahi[slot].take(col)) & (alo[slot].take(col) < across_end)
+            np.minimum(best, gap, out=best, where=ahead)
+        return np.where(forward, pos + best, pos - best), best
+
+    def _head_bump(self, x, top, w):
+        """Per rect just stopped moving up at `top`: the Block engine.sweep.move()
+        lists first among what it touched (most overlap, then list order), or -1."""
+        col = np.clip(x // self.tile, 0, self.col_solid.shape[1] - 1)
+        right = x + w
+        best = np.zeros(len(x), dtype=np.int32)
+        block = np.full(len(x), -1, dtype=np.intp)
+        for slot in range(len(self.col_solid)):
+            solid = self.col_solid[slot].take(col)
+            overlap = (np.minimum(right, self.col_right[slot].take(col)) -
+                       np.maximum(x, self.col_left[slot].take(col)))
+            better = (self.col_bottom[slot].take(col) == top) & self.is_block[solid] & (overlap > best)
+            np.copyto(best, overlap, where=better)
+            np.copyto(block, solid, where=better)
+        return block
+
+    # ------------------------------------------------------------------
+    # Per tick
+    # ------------------------------------------------------------------
+    def step(self, left, right, jump, dt=DT):
+        """One Game.update() for every PLAYING game; inputs are bool arrays.
+
+        `jump` is a SPACE press this tick (Player.jump() before the update).
+        """
+        live = np.flatnonzero(self.state == self.PLAYING)
+        if len(live) == 0:
+            return
+        # all games running is the common case: work on views, no gathers
+        sel = slice(None) if len(live) == self.count else live
+        left, right, jump = left[sel], right[sel], jump[sel]
+        w, h = self.w, self.h
+        x, y = self.x[sel], self.y[sel]
+        vx, vy = self.vel_x[sel], self.vel_y[sel]
+        on_ground = self.on_ground[sel]
+        state = self.state[sel]
+
+        # Player.jump()
+        jumping = jump & on_ground
+        vy[jumping] = JUMP_SPEED
+        on_ground[jumping] = False
+
+        # horizontal: same float operations in the same order as Player.update
+        prev_bottom = y + h
+        vx = np.where(left, vx - ACCEL, vx)
+        vx = np.where(right, vx + ACCEL, vx)
+        coast = ~(left | right)
+        vx = np.where(coast, vx * FRICTION, vx)
+        vx[coast & (np.abs(vx) < 0.05)] = 0.0
+        vx = np.maximum(-MAX_SPEED, np.minimum(MAX_SPEED, vx))
+        dx = vx.astype(np.int32)
+        x[:], gap = self._sweep(x, y, w, h, dx, 0)
+        vx[gap < np.abs(dx)] = 0.0
+
+        # vertical
+        vy += GRAVITY
+        vy[vy > TERMINAL] = TERMINAL
+        dy = vy.astype(np.int32)
+        y[:], gap = self._sweep(x, y, w, h, dy, 1)
+        stopped = gap < np.abs(dy)
+        vy[stopped] = 0.0
+        on_ground[:] = stopped & (dy > 0)
+        rows = np.flatnonzero(stopped & (dy < 0))
+        if len(rows):
+            block = self._head_bump(x[rows], y[rows], w)
+            rows, block = rows[block >= 0], block[block >= 0]
+            col = self.question_col[block]
+            bumped = col >= 0
+            self.used[live[rows[bumped]], col[bumped]] = True
+
+        # goombas: stomp from above, otherwise the player dies
+        gx, gy = self.goomba_x[:, sel], self.goomba_y[:, sel]
+        gw, gh = self.goomba_w[:, sel], self.goomba_h[:, sel]
+        gvx = self.goomba_vx[:, sel]
+        galive, gsquash = self.goomba_alive[:, sel], self.goomba_squash[:, sel]
+        dead = np.zeros(len(live), dtype=bool)
+        right_edge, bottom = x + w, y + h
+        sw, sh = self.squashed_size
+        for g in range(len(gx)):
+            touching = (~dead & (galive[g] | (gsquash[g] > 0)) &
+                        (x < gx[g] + gw[g]) & (gx[g] < right_edge) &
+                        (y < gy[g] + gh[g]) & (gy[g] < bottom))
+            stomp = touching & (dy > 0) & (prev_bottom <= gy[g])
+            if stomp.any():
+                galive[g, stomp] = False
+                gsquash[g, stomp] = self.squash_frames
+                # Goomba.stomp keeps the rect's midbottom
+                gx[g, stomp] += gw[g, stomp] // 2 - sw // 2
+                gy[g, stomp] += gh[g, stomp] - sh
+                gw[g, stomp], gh[g, stomp] = sw, sh
+                vy[stomp] = STOMP_BOUNCE
+            dead |= touching & ~stomp
+        state[dead] = self.DEAD
+
+        # Goomba.update for every goomba of these games; squashed ones only
+        # count down, so their collision results are masked out
+        gsquash[~galive] -= 1
+        fx, fy, fw, fh, fvx = gx.ravel(), gy.ravel(), gw.ravel(), gh.ravel(), gvx.ravel()
+        walking = galive.ravel()
+        moved, _ = self._sweep(fx, fy, fw, fh, np.full(len(fy), GOOMBA_FALL, dtype=np.int32), 1)
+        np.copyto(fy, moved, where=walking)
+        moved, gap = self._sweep(fx, fy, fw, fh, fvx, 0)
+        np.copyto(fx, moved, where=walking)
+        fvx[walking & (gap < np.abs(fvx))] *= -1
+
+        # Game.update: left edge, flag, clock
+        np.maximum(x, 0, out=x)
+        fx0, fy0, fw0, fh0 = self.flag
+        at_flag = (x < fx0 + fw0) & (fx0 < x + w) & (y < fy0 + fh0) & (fy0 < y + h)
+        state[at_flag] = self.LEVEL_COMPLETE
+        hud = self.hud_timer[sel] + dt
+        tick = hud >= 1.0
+        hud[tick] = 0
+        time_left = self.time_left[sel]
+        time_left[tick] = np.maximum(0, time_left[tick] - 1)
+        state[tick & (time_left == 0)] = self.DEAD
+
+        self.x[sel], self.y[sel] = x, y
+        self.vel_x[sel], self.vel_y[sel] = vx, vy
+        self.on_ground[sel] = on_ground
+        self.state[sel] = state
+        self.hud_timer[sel] = hud
+        self.time_left[sel] = time_left
+        self.goomba_x[:, sel], self.goomba_y[:, sel] = gx, gy
+        self.goomba_w[:, sel], self.goomba_h[:, sel] = gw, gh
+        self.goomba_vx[:, sel] = gvx
+        self.goomba_alive[:, sel] = galive
+        self.goomba_squash[:, sel] = gsquash
@@ -0,0 +1,165 @@
+"""
+Background video capture of the presented frames, for QA recordings.
+
+Recorder copies each presented frame into one of a fixed pool of buffers
+and queues it for a writer thread, which compresses it losslessly (zlib)
+and appends it to the capture file. All the game thread does is the copy:
+one memcpy of the 32-bit frame through a surfarray view. zlib and the file
+writes release the GIL, so the writer runs alongside the game.
+
+When every buffer is still waiting to be written, the new frame is dropped
+instead of waited for. Memory stays at `buffers` frames, the game never
+blocks on the disk, and each drop leaves a gap in the frame numbers of the
+file (and adds to `dropped`).
+
+    MARIO_CAPTURE=run.mcap python 1-1.py     # record the session
+    MARIO_CAPTURE_FPS=30                     # frames kept per second (default 60, 0: every frame)
+    MARIO_CAPTURE_BUFFERS=8                  # frames in flight (default 8)
+    MARIO_CAPTURE_LEVEL=1                    # zlib level, 0 writes raw pixels (default 1)
+
+The game hands the recorder to its Presenter, which grabs the target just
+before each flip:
+
+    presenter = Presenter(window, (800, 600), capture=Recorder.from_env('1-1'))
+
+File: MAGIC, HEADER (width, height, the R, G, B, A masks of the 32-bit
+pixels, zlib level), then per frame FRAME (frame number, seconds since the
+first frame, payload size) and the payload, rows top to bottom.
+read_frames() gives the frames back as RGB arrays.
+"""
+
+import atexit
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+
+import numpy as np
+import pygame
+
+MAGIC = b'MCAP\x01'
+HEADER = struct.Struct('<HH4IB')
+FRAME = struct.Struct('<IdI')
+# masks of the little-endian words pygame.image.tobytes(surface, 'RGBX') gives
+RGBX_MASKS = (0xff, 0xff00, 0xff0000, 0)
+
+
+class Recorder:
+    def __init__(self, game, path=None, fps=60, buffers=8, level=1):
+        self.game = game
+        self.path = path
+        self.interval = 1 / fps if fps else 0
+        self.buffers = buffers
+        self.level = level
+        self.frames = 0         # frames captured, written or dropped
+        self.written = 0
+        self.dropped = 0
+        self.pool = None        # (buffers, height, width) uint32, made on the first grab
+        self.masks = None
+        self._free = deque()    # pool indices the game may fill
+        self._filled = queue.SimpleQueue()  # (index, frame number, seconds), None to stop
+        self._writer = None
+        self._start = None
+        self._due = 0.0
+
+    @classmethod
+    def from_env(cls, game):
+        path = os.environ.get('MARIO_CAPTURE')
+        recorder = cls(game, path, float(os.environ.get('MARIO_CAPTURE_FPS', '60')),
+                       int(os.environ.get('MARIO_CAPTURE_BUFFERS', '8')),
+                       int(os.environ.get('MARIO_CAPTURE_LEVEL', '1')))
+        if path:
+            atexit.register(recorder.close)
+        return recorder
+
+    # ------------------------------------------------------------------
+    # Game thread
+    # ------------------------------------------------------------------
+    def grab(self, surface):
+        """Queue a copy of `surface` for the writer, or drop it if no buffer is free."""
+        if not self.path:
+            return
+        now = time.perf_counter()
+        if now < self._due:
+            return
+        # keep the cadence, but never bank more than half a frame of slack
+        self._due = max(self._due + self.interval, now + self.interval / 2)
+        if self.pool is None:
+            self._open(surface, now)
+        number = self.frames
+        self.frames += 1
+        try:
+            i = self._free.pop()
+        except IndexError:
+            self.dropped += 1
+            return
+        if surface.get_bytesize() == 4:
+            view = pygame.surfarray.pixels2d(surface)   # (w, h) over the surface's rows
+            np.copyto(self.pool[i], view.T)
+            del view                                    # unlocks the surface
+        else:
+            np.copyto(self.pool[i].view(np.uint8).reshape(-1),
+                      np.frombuffer(pygame.image.tobytes(surface, 'RGBX'), np.uint8))
+        self._filled.put((i, number, now - self._start))
+
+    def _open(self, surface, now):
+        width, height = surface.get_size()
+        self.masks = surface.get_masks() if surface.get_bytesize() == 4 else RGBX_MASKS
+        self.pool = np.zeros((self.buffers, height, width), dtype=np.uint32)
+        self._free.extend(range(self.buffers))
+        self._start = now
+        header = HEADER.pack(width, height, *self.masks, self.level)
+        self._writer = threading.Thread(target=self._run, args=(header,), name='capture-writer', daemon=True)
+        self._writer.start()
+        print(f'{self.game} capture: recording to {self.path}')
+
+    def close(self):
+        """Write out everything queued, then stop."""
+        if self._writer is None:
+            return
+        self._filled.put(None)
+        self._writer.join()
+        self._writer = None
+        print(f'{self.game} capture: {self.written} frames -> {self.path} ({self.dropped} dropped)')
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+    def _run(self, header):
+        with open(self.path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(header)
+            while True:
+                item = self._filled.get()
+                if item is None:
+                    break
+                i, number, seconds = item
+                pixels = memoryview(self.pool[i]).cast('B')
+                payload = zlib.compress(pixels, self.level) if self.level else pixels
+                f.write(FRAME.pack(number, seconds, len(payload)))
+                f.write(payload)
+                self._free.append(i)
+                self.written += 1
+
+
+def read_frames(path):
+    """Yield (frame number, seconds, (height, width, 3) uint8 RGB array) from a capture file."""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{path} is not a capture file')
+        width, height, *masks, level = HEADER.unpack(f.read(HEADER.size))
+        shifts = [(m & -m).bit_length() - 1 for m in masks[:3]]
+        while True:
+            head = f.read(FRAME.size)
+            if len(head) < FRAME.size:
+                return
+            number, seconds, size = FRAME.unpack(head)
+            data = f.read(size)
+            pixels = np.frombuffer(zlib.decompress(data) if level else data, np.uint32).reshape(height, width)
+            rgb = np.empty((height, width, 3), dtype=np.uint8)
+            for c, shift in enumerate(shifts):
+                rgb[..., c] = pixels >> shift
+            yield number, seconds, rgb
@@ -0,0 +1,219 @@
+"""
+Opt-in component/system layer for the 3D port.
+
+Entities registered with a World keep only their render state (model,
+colour, collider). Behaviour lives in component tables - contiguous arrays
+with one row per entity - and a few systems update whole tables at once:
+
+    spin       rotation_y += speed * dt
+    bob        y = base_y + sin((t0 + t) * speed) * height
+    oscillate  pos = origin + axis * sin((t0 + t) * speed) * amplitude
+    patrol     loop through points at constant speed (engine.movers)
+    proximity  callback(entity) while within radius of a target point
+
+Per-frame Python work is one call per system plus a single write-back loop
+of setPos/setPosHpr calls, so there is no update() dispatch per entity.
+"""
+
+import numpy as np
+
+from engine.movers import PathMovers
+
+
+class Table:
+    """Rows of numeric columns keyed by entity, kept packed by swap-remove."""
+
+    def __init__(self, capacity=64, **columns):
+        self.count = 0
+        self.entities = []
+        self.objects = []
+        self.index = {}
+        self.columns = {}
+        for name, width in dict(columns, row=0).items():
+            shape = (capacity,) if width == 0 else (capacity, width)
+            dtype = np.intp if name == 'row' else float
+            self.columns[name] = np.zeros(shape, dtype=dtype)
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, entity):
+        return entity in self.index
+
+    def col(self, name):
+        return self.columns[name][:self.count]
+
+    def add(self, entity, obj=None, **values):
+        i = self.count
+        if i == len(self.columns['row']):
+            for name, arr in self.columns.items():
+                bigger = np.zeros((len(arr) * 2,) + arr.shape[1:], dtype=arr.dtype)
+                bigger[:i] = arr
+                self.columns[name] = bigger
+        for name, value in values.items():
+            self.columns[name][i] = value
+        self.entities.append(entity)
+        self.objects.append(obj)
+        self.index[entity] = i
+        self.count += 1
+        return i
+
+    def remove(self, entity):
+        i = self.index.pop(entity, None)
+        if i is None:
+            return
+        last = self.count - 1
+        if i != last:
+            for arr in self.columns.values():
+                arr[i] = arr[last]
+            moved = self.entities[last]
+            self.entities[i] = moved
+            self.objects[i] = self.objects[last]
+            self.index[moved] = i
+        self.entities.pop()
+        self.objects.pop()
+        self.count = last
+
+    def renumber(self, old_row, new_row):
+        rows = self.col('row')
+        rows[rows == old_row] = new_row
+
+
+class World:
+    def __init__(self, capacity=256):
+        self.time = 0.0
+        self.transforms = Table(capacity, pos=3, h=0, spins=0)
+        self.spin = Table(capacity, speed=0)
+        self.bob = Table(capacity, base=0, speed=0, height=0, t0=0)
+        self.oscillate = Table(capacity, origin=3, axis=3, speed=0, t0=0)
+        self.proximity = Table(capacity, radius2=0)
+        self.tables = (self.spin, self.bob, self.oscillate, self.proximity)
+        self.movers = PathMovers(capacity)
+        self.mover_rows = np.zeros(capacity, dtype=np.intp)
+
+    def __contains__(self, entity):
+        return entity in self.transforms
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+    def add(self, entity, position, heading=0.0, spin=None, bob=None,
+            oscillate=None, patrol=None, pingpong=None, proximity=None):
+        """Register `entity` with the given components.
+
+        spin=speed, bob=(height, speed, t0), oscillate=(axis, amplitude,
+        speed, t0), patrol=(points, speed), pingpong=(end, rate) and
+        proximity=(radius, callback). Bob and oscillate are relative to
+        `position`; pingpong runs from `position` to `end`.
+        """
+        row = self.transforms.add(entity, pos=position, h=heading, spins=spin is not None)
+        if spin is not None:
+            self.spin.add(entity, speed=spin, row=row)
+        if bob is not None:
+            height, speed, t0 = bob
+            self.bob.add(entity, base=position[1], speed=speed, height=height, t0=t0, row=row)
+        if oscillate is not None:
+            axis, amplitude, speed, t0 = oscillate
+            axis = np.asarray(axis, dtype=float) * amplitude
+            self.oscillate.add(entity, origin=position, axis=axis, speed=speed, t0=t0, row=row)
+        if patrol is not None or pingpong is not None:
+            if patrol is not None:
+                slot = self.movers.add(entity, *patrol)
+            else:
+                slot = self.movers.add_pingpong(entity, position, *pingpong)
+            if slot >= len(self.mover_rows):
+                self.mover_rows = np.resize(self.mover_rows, len(self.mover_rows) * 2)
+            self.mover_rows[slot] = row
+        if proximity is not None:
+            radius, callback = proximity
+            self.proximity.add(entity, obj=callback, radius2=radius * radius, row=row)
+        return row
+
+    def remove(self, entity):
+        if entity not in self.transforms:
+            return
+        for table in self.tables:
+            table.remove(entity)
+        slot = self.movers.slots.get(entity)
+        if slot is not None:
+            self.mover_rows[slot] = self.mover_rows[self.movers.count - 1]
+            self.movers.remove(entity)
+        # the last transform row moves into the freed one
+        row = self.transforms.index[entity]
+        last = len(self.transforms) - 1
+        self.transforms.remove(entity)
+        if row != last:
+            for table in self.tables:
+                table.renumber(last, row)
+            rows = self.mover_rows[:self.movers.count]
+            rows[rows == last] = row
+
+    def position_of(self, entity):
+        return self.transforms.col('pos')[self.transforms.index[entity]]
+
+    # ------------------------------------------------------------------
+    # Systems
+    # ------------------------------------------------------------------
+    def step(self, dt, target=None):
+        """Run every system once. `target` is the proximity probe (e.g. the player)."""
+        self.time += dt
+        t = self.time
+        pos = self.transforms.columns['pos']
+        h = self.transforms.columns['h']
+
+        if self.movers.count:
+            pos[self.mover_rows[:self.movers.count]] = self.movers.step(dt)
+
+        osc = self.oscillate
+        if len(osc):
+            wave = np.sin((osc.col('t0') + t) * osc.col('speed'))
+            pos[osc.col('row')] = osc.col('origin') + osc.col('axis') * wave[:, None]
+
+        bob = self.bob
+        if len(bob):
+            wave = np.sin((bob.col('t0') + t) * bob.col('speed'))
+            pos[bob.col('row'), 1] = bob.col('base') + wave * bob.col('height')
+
+        spin = self.spin
+        if len(spin):
+            # ursina's rotation_y is the negated panda heading
+            rows = spin.col('row')
+            h[rows] = np.fmod(h[rows] - spin.col('speed') * dt, 360.0)
+
+        if target is not None and len(self.proximity):
+            self.trigger(target)
+
+    def trigger(self, target):
+        prox = self.proximity
+        delta = self.transforms.columns['pos'][prox.col('row')] - np.asarray(target, dtype=float)
+        hits = np.flatnonzero(np.einsum('ij,ij->i', delta, delta) < prox.col('radius2'))
+        if len(hits):
+            # callbacks may remove entities, so resolve them before calling any
+            fired = [(prox.entities[i], prox.objects[i]) for i in hits.tolist()]
+            for entity, callback in fired:
+                if entity in prox:
+                    callback(entity)
+
+    def write_back(self, rows=None):
+        """Push positions (and headings of spinning rows) onto the entity nodes.
+
+        `rows` limits the push to those transform rows; since every system is
+        a function of world time, skipped rows are exact once written again.
+        """
+        tf = self.transforms
+        n = len(tf)
+        if n == 0:
+            return
+        if rows is None:
+            rows = np.arange(n)
+        data = np.empty((len(rows), 4))
+        data[:, :3] = tf.columns['pos'][rows]
+        data[:, 3] = tf.columns['h'][rows]
+        spins = tf.columns['spins'][rows] != 0
+        entities = tf.entities
+        for i, (x, y, z, h), s in zip(rows.tolist(), data.tolist(), spins.tolist()):
+            entity = entities[i]
+            if s:
+                entity.setPosHpr(x, y, z, h, 0, 0)
+            else:
+                entity.setPos(x, y, z)
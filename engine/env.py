@@ -0,0 +1,289 @@
+"""
+reset()/step() environment around the 1-1 simulation, for automated players.
+
+SMBEnv runs the same Game.update() as 1-1.py (player, goombas, blocks, flag
+and time limit) without drawing. VectorEnv runs N copies split across
+worker processes; observations, rewards and done flags live in shared
+memory so a step costs one short pipe message per worker, not a pickled
+observation per env.
+
+    env = SMBEnv()
+    obs = env.reset()
+    obs, reward, done, info = env.step(RIGHT_JUMP)
+
+    venv = VectorEnv(64)
+    obs = venv.reset()
+    obs, rewards, dones = venv.step(actions)    # auto-resets finished envs
+
+observation='grid' swaps the feature vector for the tile grid under the
+camera (engine.observe), a (rows, cols) uint8 array of cell classes.
+
+The game module is loaded on first use; without a display already open it
+uses the SDL dummy driver, so no window appears.
+"""
+
+import multiprocessing as mp
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+NOOP, LEFT, RIGHT, JUMP, RIGHT_JUMP, LEFT_JUMP = range(6)
+ACTION_NAMES = ('noop', 'left', 'right', 'jump', 'right_jump', 'left_jump')
+
+# x, y, vel_x, vel_y, on_ground, time left, tiles to the flag,
+# then dx, dy of the two nearest live goombas (in tiles)
+OBS_SIZE = 11
+NO_GOOMBA = 32.0
+
+FLAG_REWARD = 50.0
+DEATH_PENALTY = -25.0
+DT = 1 / 60
+
+
+class Held:
+    """pygame.key.get_pressed() stand-in for a fixed set of keys."""
+    __slots__ = ('keys',)
+
+    def __init__(self, *keys):
+        self.keys = frozenset(keys)
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+
+def load_1_1():
+    import pygame
+    if not pygame.display.get_init():
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    from engine.loader import load_game
+    return load_game('1-1')
+
+
+class SMBEnv:
+    def __init__(self, max_steps=4000, frame_skip=1, observation='vector'):
+        import pygame
+        self.smb = smb = load_1_1()
+        self.max_steps = max_steps
+        self.frame_skip = frame_skip
+        self.observation = observation
+        left, right = Held(pygame.K_LEFT), Held(pygame.K_RIGHT)
+        self.action_keys = (Held(), left, right, Held(), right, left)
+        self.action_jumps = (False, False, False, True, True, True)
+        self.game = None
+        self.steps = 0
+        self.best_x = 0
+        self.obs = np.zeros(OBS_SIZE, dtype=np.float32)
+        self.observer = None
+        if observation == 'grid':
+            from engine.observe import TileObserver
+            # rows line up with the ground, which is not a whole number of tiles down
+            origin_y = smb.GROUND_TOP % smb.TILE
+            rows = -(-(smb.SCREEN_HEIGHT - origin_y) // smb.TILE)
+            self.observer = TileObserver(smb.build_level_1_1(), smb.TILE,
+                                         smb.SCREEN_WIDTH // smb.TILE, rows, origin_y)
+            self.obs = np.zeros((rows, self.observer.cols), dtype=np.uint8)
+        elif observation != 'vector':
+            raise ValueError(f'unknown observation {observation!r}')
+
+    @property
+    def action_count(self):
+        return len(self.action_keys)
+
+    @property
+    def observation_shape(self):
+        return self.obs.shape
+
+    def reset(self, out=None):
+        smb = self.smb
+        self.game = game = smb.Game()
+        game.state = smb.PLAYING
+        smb.particles.clear()   # nothing is drawn, so bursts would only pile up
+        self.steps = 0
+        self.best_x = game.player.rect.x
+        if self.observer:
+            self.observer.attach(game.level)
+        return self.observe(out)
+
+    def step(self, action, out=None):
+        smb, game = self.smb, self.game
+        player = game.player
+        keys = self.action_keys[action]
+        if self.action_jumps[action]:
+            player.jump()
+        for _ in range(self.frame_skip):
+            game.update(keys, DT)
+            if game.state != smb.PLAYING:
+                break
+        self.steps += 1
+
+        reward = 0.0
+        x = player.rect.x
+        if x > self.best_x:
+            reward = (x - self.best_x) / smb.TILE
+            self.best_x = x
+        fell = player.rect.top > smb.SCREEN_HEIGHT
+        done = fell or game.state != smb.PLAYING
+        if game.state == smb.LEVEL_COMPLETE:
+            reward += FLAG_REWARD
+        elif done:
+            reward += DEATH_PENALTY
+        truncated = not done and self.steps >= self.max_steps
+        info = {'x': x, 'flag': game.state == smb.LEVEL_COMPLETE,
+                'fell': fell, 'truncated': truncated}
+        return self.observe(out), reward, done or truncated, info
+
+    def observe(self, out=None):
+        """Write the observation into `out` (or the env's own buffer) and return it.
+
+        Grid observations without `out` are a view that the next step reuses.
+        """
+        smb, game = self.smb, self.game
+        if self.observer:
+            grid = self.observer.observe(game)
+            if out is None:
+                return grid
+            out[...] = grid
+            return out
+        obs = self.obs if out is None else out
+        player = game.player
+        rect, tile = player.rect, smb.TILE
+        px, py = rect.centerx, rect.bottom
+        obs[0] = rect.x / tile
+        obs[1] = rect.y / tile
+        obs[2] = player.vel_x
+        obs[3] = player.vel_y
+        obs[4] = player.on_ground
+        obs[5] = game.time_left
+        obs[6] = (game.level.flag.rect.x - px) / tile
+        near = sorted((e for e in game.level.enemies if e.alive),
+                      key=lambda e: abs(e.rect.centerx - px))
+        for i in range(2):
+            if i < len(near):
+                e = near[i]
+                obs[7 + 2 * i] = (e.rect.centerx - px) / tile
+                obs[8 + 2 * i] = (e.rect.bottom - py) / tile
+            else:
+                obs[7 + 2 * i] = NO_GOOMBA
+                obs[8 + 2 * i] = 0.0
+        return obs
+
+
+# ------------------------------------------------------------------
+# Vectorized
+# ------------------------------------------------------------------
+def _shared(shm, shape, dtype, offset):
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+
+
+def _layout(num_envs, obs_bytes):
+    """Offsets of rewards, dones and actions after the observations, and the total size."""
+    obs = -(-num_envs * obs_bytes // 8) * 8
+    return obs, obs + num_envs * 4, obs + num_envs * 5, obs + num_envs * 6
+
+
+def _views(shm, num_envs, shape, dtype):
+    rewards_at, dones_at, actions_at, _ = _layout(num_envs, int(np.prod(shape)) * dtype.itemsize)
+    return (_shared(shm, (num_envs,) + shape, dtype, 0),
+            _shared(shm, (num_envs,), np.float32, rewards_at),
+            _shared(shm, (num_envs,), np.bool_, dones_at),
+            _shared(shm, (num_envs,), np.int8, actions_at))
+
+
+def _worker(conn, num_envs, lo, hi, env_kwargs):
+    envs = [SMBEnv(**env_kwargs) for _ in range(lo, hi)]
+    conn.send((envs[0].obs.shape, envs[0].obs.dtype.str))
+    shm = shared_memory.SharedMemory(name=conn.recv())
+    obs, rewards, dones, actions = _views(shm, num_envs, envs[0].obs.shape, envs[0].obs.dtype)
+    try:
+        conn.send('ready')
+        while True:
+            cmd = conn.recv()
+            if cmd == 'step':
+                for i, (env, action) in enumerate(zip(envs, actions[lo:hi].tolist()), lo):
+                    row = obs[i]
+                    _, reward, done, _ = env.step(action, row)
+                    if done:
+                        env.reset(row)
+                    rewards[i] = reward
+                    dones[i] = done
+            elif cmd == 'reset':
+                for i, env in enumerate(envs, lo):
+                    env.reset(obs[i])
+            elif cmd == 'close':
+                break
+            conn.send(None)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        del obs, rewards, dones, actions
+        shm.close()
+
+
+class VectorEnv:
+    """N SMBEnvs in worker processes sharing one observation buffer.
+
+    reset() and step() return views of the shared arrays; they are
+    overwritten by the next call, so copy what needs to be kept.
+    """
+
+    def __init__(self, num_envs, num_workers=None, **env_kwargs):
+        num_workers = min(num_envs, num_workers or os.cpu_count() or 1)
+        self.num_envs = num_envs
+        self.shm = None
+
+        ctx = mp.get_context('spawn')
+        bounds = np.linspace(0, num_envs, num_workers + 1).astype(int).tolist()
+        self.conns, self.procs = [], []
+        for lo, hi in zip(bounds, bounds[1:]):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_worker, daemon=True,
+                               args=(child, num_envs, lo, hi, env_kwargs))
+            proc.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(proc)
+
+        # the workers report the observation shape, then attach to the block
+        shape, dtype = [conn.recv() for conn in self.conns][0]
+        dtype = np.dtype(dtype)
+        size = _layout(num_envs, int(np.prod(shape)) * dtype.itemsize)[3]
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.obs, self.rewards, self.dones, self.actions = _views(self.shm, num_envs, shape, dtype)
+        self._broadcast(self.shm.name)
+
+    def _broadcast(self, cmd):
+        for conn in self.conns:
+            conn.send(cmd)
+        for conn in self.conns:
+            conn.recv()
+
+    def reset(self):
+        self._broadcast('reset')
+        return self.obs
+
+    def step(self, actions):
+        self.actions[:] = actions
+        self._broadcast('step')
+        return self.obs, self.rewards, self.dones
+
+    def close(self):
+        if self.shm is None:
+            return
+        for conn in self.conns:
+            try:
+                conn.send('close')
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self.procs:
+            proc.join(timeout=5)
+        del self.obs, self.rewards, self.dones, self.actions
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,146 @@
+"""
+Gameplay event bus with a non-blocking telemetry sink.
+
+emit() packs a fixed-size record into a preallocated ring buffer and
+returns; it never touches the file system. When a log path is given, a
+daemon thread wakes every `flush_interval` seconds and writes everything
+published since the last flush as one batch, either as JSON lines or as raw
+records (path ending in .bin).
+
+If the writer ever falls a full ring behind, new events are counted in
+`dropped` instead of blocking the game; JSON logs end with that count.
+
+    MARIO_EVENT_LOG=run.jsonl python 1-1.py
+"""
+
+import atexit
+import json
+import os
+import struct
+import threading
+import time
+
+PICKUP, STOMP, DAMAGE, DEATH, LEVEL_CLEAR, BOSS_HIT, BUMP = range(7)
+EVENT_NAMES = ('pickup', 'stomp', 'damage', 'death', 'level_clear', 'boss_hit', 'bump')
+
+# seq, seconds since start, frame, kind, x, y, z, value
+RECORD = struct.Struct('<IdIBfffi')
+BIN_MAGIC = b'MEVT\x01'
+
+
+class EventBus:
+    def __init__(self, game, path=None, capacity=1 << 16, flush_interval=0.25):
+        self.game = game
+        self.capacity = capacity
+        self.buffer = bytearray(RECORD.size * capacity)
+        self.head = 0       # next sequence number to publish
+        self.tail = 0       # next sequence number the writer will read
+        self.dropped = 0
+        self.frame = 0
+        self.listeners = []
+        self.start = time.perf_counter()
+        self.path = path
+        self.flush_interval = flush_interval
+        self._wake = threading.Event()
+        self._stop = False
+        self._writer = None
+        if path:
+            self._writer = threading.Thread(target=self._run, name='event-writer', daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls, game):
+        return cls(game, os.environ.get('MARIO_EVENT_LOG'))
+
+    # ------------------------------------------------------------------
+    # Game thread
+    # ------------------------------------------------------------------
+    def tick(self):
+        self.frame += 1
+
+    def subscribe(self, fn):
+        """fn(kind, x, y, z, value) is called synchronously on every emit."""
+        self.listeners.append(fn)
+
+    def emit(self, kind, x=0.0, y=0.0, z=0.0, value=0):
+        seq = self.head
+        if self._writer is not None:
+            if seq - self.tail >= self.capacity:
+                self.dropped += 1
+                return
+            RECORD.pack_into(self.buffer, (seq % self.capacity) * RECORD.size, seq,
+                             time.perf_counter() - self.start, self.frame, kind,
+                             x, y, z, value)
+        self.head = seq + 1
+        for fn in self.listeners:
+            fn(kind, x, y, z, value)
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+    def _run(self):
+        binary = self.path.endswith('.bin')
+        with open(self.path, 'ab' if binary else 'a', encoding=None if binary else 'utf-8') as f:
+            if binary:
+                if f.tell() == 0:
+                    f.write(BIN_MAGIC + RECORD.format.encode().ljust(16, b'\0'))
+            else:
+                f.write(json.dumps({'session': self.game, 'started': time.time()}) + '\n')
+            while True:
+                self._wake.wait(self.flush_interval)
+                stopping = self._stop
+                self._drain(f, binary)
+                f.flush()
+                if stopping:
+                    return
+
+    def _drain(self, f, binary):
+        head, tail = self.head, self.tail
+        if head == tail:
+            return
+        size, cap = RECORD.size, self.capacity
+        start, end = tail % cap, head % cap
+        if start < end:
+            chunk = bytes(self.buffer[start * size:end * size])
+        else:
+            chunk = bytes(self.buffer[start * size:]) + bytes(self.buffer[:end * size])
+        self.tail = head
+        if binary:
+            f.write(chunk)
+        else:
+            lines = []
+            for seq, t, frame, kind, x, y, z, value in RECORD.iter_unpack(chunk):
+                lines.append(json.dumps({'seq': seq, 't': round(t, 6), 'frame': frame,
+                                         'event': EVENT_NAMES[kind], 'x': x, 'y': y,
+                                         'z': z, 'value': value}))
+            f.write('\n'.join(lines) + '\n')
+
+    def close(self):
+        if self._writer is None:
+            return
+        self._stop = True
+        self._wake.set()
+        self._writer.join()
+        self._writer = None
+        if self.dropped and not self.path.endswith('.bin'):
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'dropped': self.dropped}) + '\n')
+
+
+def read_log(path):
+    """Yield events from a .jsonl or .bin log as dicts."""
+    if path.endswith('.bin'):
+        with open(path, 'rb') as f:
+            data = f.read()
+        offset = len(BIN_MAGIC) + 16
+        data = data[offset:len(data) - (len(data) - offset) % RECORD.size]
+        for seq, t, frame, kind, x, y, z, value in RECORD.iter_unpack(data):
+            yield {'seq': seq, 't': t, 'frame': frame, 'event': EVENT_NAMES[kind],
+                   'x': x, 'y': y, 'z': z, 'value': value}
+    else:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                if 'event' in record:
+                    yield record
@@ -0,0 +1,97 @@
+"""
+Plain-text level files and a watcher for reloading them while a game runs.
+
+One object per line, a name followed by integers (tile units); blank lines
+and # comments are ignored:
+
+    length 240
+    ground 0 40
+    question 23 30
+    goomba 35
+
+What each name means is up to the game that builds the level. diff()
+compares two parses as multisets, so a reload only has to remove what
+went away and add what is new; everything else keeps its live state.
+
+    watcher = Watcher('levels/1-1.txt')
+    entries = watcher.poll()        # None unless the file changed
+"""
+
+import os
+from collections import Counter
+
+
+class LevelFileError(ValueError):
+    pass
+
+
+def parse(text, name='<level>'):
+    entries = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.split('#', 1)[0].split()
+        if not line:
+            continue
+        try:
+            entries.append((line[0],) + tuple(int(v) for v in line[1:]))
+        except ValueError:
+            raise LevelFileError(f'{name}:{number}: expected a name and integers') from None
+    return entries
+
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return parse(f.read(), path)
+
+
+def write(path, entries):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(' '.join(map(str, entry)) + '\n' for entry in entries)
+
+
+def diff(old, new):
+    """(removed, added): entries of old missing from new and vice versa, in file order."""
+    removed = Counter(old) - Counter(new)
+    added = Counter(new) - Counter(old)
+
+    def take(entries, counts):
+        out = []
+        for entry in entries:
+            if counts[entry]:
+                counts[entry] -= 1
+                out.append(entry)
+        return out
+    return take(old, removed), take(new, added)
+
+
+class Watcher:
+    """Polls a level file's size and mtime; poll() is a single os.stat."""
+
+    def __init__(self, path):
+        self.path = path
+        self.stamp = self._stamp()
+        self.error = None
+
+    def _stamp(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def poll(self):
+        """The new entries if the file changed since the last poll, else None.
+
+        A file that fails to parse (e.g. caught half-written) is reported in
+        `error` and retried on the next change.
+        """
+        stamp = self._stamp()
+        if stamp is None or stamp == self.stamp:
+            return None
+        self.stamp = stamp
+        try:
+            entries = read(self.path)
+        except (OSError, LevelFileError) as e:
+            self.error = e
+            return None
+        self.error = None
+        return entries
@@ -0,0 +1,39 @@
+"""
+Import the game scripts as modules.
+
+The games are standalone scripts whose file names are not valid module
+names ("1-1.py", "mario3pcport4k.py"), so tools load them by path. Loading
+runs the script's top level, which opens the pygame display; set
+SDL_VIDEODRIVER=dummy first when running headless.
+"""
+
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPTS = {
+    '1-1': '1-1.py',
+    'mario3': 'mario3pcport4k.py',
+    'mario4k': 'mario4k1.0pcport9.23.25.py',
+    'ultramario3d': '#######Ultramario1.0.py',
+}
+
+
+def load_game(name):
+    """Load (once) and return the module for a game in SCRIPTS."""
+    module_name = 'game_' + name.replace('-', '_')
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(ROOT, SCRIPTS[name]))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
+    return module
@@ -0,0 +1,104 @@
+"""
+Distance-based update level of detail.
+
+Rows within `near` of the eye are due every frame, rows out to `far` every
+`mid_interval` frames (staggered so they do not all land on one frame), and
+rows beyond `far` or behind the camera not at all. Callers hand in
+positions as an array and get back the row indices due this frame.
+
+LodGroup is for entities that still run Python per update: it keeps a home
+position and a reach (how far the entity can stray from home) so no
+position has to be read back per frame, and it accumulates skipped time so
+an entity that comes back into range catches up with one larger dt.
+"""
+
+import math
+
+import numpy as np
+
+NEAR, MID, FAR = 0, 1, 2
+
+
+def fog_distance(density, visibility=0.02):
+    """Distance at which exponential fog leaves `visibility` of the colour."""
+    return -math.log(visibility) / density
+
+
+class UpdateLOD:
+    def __init__(self, near=25.0, far=100.0, mid_interval=4, cull_margin=2.0):
+        self.near = near
+        self.far = far
+        self.mid_interval = mid_interval
+        self.cull_margin = cull_margin
+        self.frame = 0
+
+    def begin_frame(self):
+        self.frame += 1
+
+    def tiers(self, positions, eye, forward, reach=0.0):
+        delta = positions - np.asarray(eye, dtype=float)
+        dist = np.sqrt(np.einsum('ij,ij->i', delta, delta)) - reach
+        tier = np.full(len(positions), FAR, dtype=np.int8)
+        tier[dist < self.far] = MID
+        tier[dist < self.near] = NEAR
+        # behind the camera is as good as out of range
+        behind = delta @ np.asarray(forward, dtype=float) < -(reach + self.cull_margin)
+        tier[behind & (tier == MID)] = FAR
+        return tier
+
+    def due(self, positions, eye, forward, reach=0.0):
+        if len(positions) == 0:
+            return np.zeros(0, dtype=np.intp)
+        tier = self.tiers(positions, eye, forward, reach)
+        turn = (np.arange(len(tier)) + self.frame) % self.mid_interval == 0
+        return np.flatnonzero((tier == NEAR) | ((tier == MID) & turn))
+
+
+class LodGroup:
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.entities = []
+        self.index = {}
+        self.home = np.zeros((capacity, 3))
+        self.reach = np.zeros(capacity)
+        self.pending = np.zeros(capacity)
+
+    def add(self, entity, home, reach=0.0):
+        i = self.count
+        if i == len(self.reach):
+            self.home = np.resize(self.home, (i * 2, 3))
+            self.reach = np.resize(self.reach, i * 2)
+            self.pending = np.resize(self.pending, i * 2)
+        self.home[i] = home
+        self.reach[i] = reach
+        self.pending[i] = 0.0
+        self.entities.append(entity)
+        self.index[entity] = i
+        self.count += 1
+
+    def remove(self, entity):
+        i = self.index.pop(entity, None)
+        if i is None:
+            return
+        last = self.count - 1
+        if i != last:
+            for arr in (self.home, self.reach, self.pending):
+                arr[i] = arr[last]
+            moved = self.entities[last]
+            self.entities[i] = moved
+            self.index[moved] = i
+        self.entities.pop()
+        self.count = last
+
+    def tick(self, lod, eye, forward, dt):
+        """Return (entity, dt) for each entity due now, dt including skipped frames."""
+        n = self.count
+        if n == 0:
+            return []
+        pending = self.pending[:n]
+        pending += dt
+        rows = lod.due(self.home[:n], eye, forward, self.reach[:n])
+        dts = pending[rows].tolist()
+        pending[rows] = 0.0
+        entities = self.entities
+        return [(entities[i], d) for i, d in zip(rows.tolist(), dts)]
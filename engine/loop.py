@@ -0,0 +1,156 @@
+"""
+Fixed-rate simulation with interpolated rendering for the pygame loops.
+
+FixedStep turns the time each render frame took into a whole number of
+60 Hz simulation steps, carrying the remainder over; the game runs those
+steps and then draws once. On a 144 Hz display that is 2-3 draws per step,
+so Interpolator draws moving things (and the camera) part way between the
+positions before and after the last step, by FixedStep.alpha. Gameplay
+only ever sees fixed 1/60 s steps, whatever the render rate.
+
+    step = FixedStep(60)
+    interp = Interpolator(lambda: [game.player, *game.level.enemies], (game, 'camera_x'))
+    while True:
+        for _ in range(step.advance(clock.tick(RENDER_FPS) / 1000)):
+            interp.capture()
+            game.update(keys, step.dt)
+        with interp.blended(step.alpha):
+            game.draw(screen)
+
+LatencyMeter measures input-to-present latency. An input first seen at
+poll t1 arrived some time after the previous poll t0. Latency runs from
+then until the present of the first frame drawn after a simulation step
+has used it. mean assumes arrival halfway between the polls; worst
+assumes arrival right after t0. MARIO_LATENCY=1 makes the games print a
+summary on exit.
+"""
+
+import atexit
+import os
+import time
+from contextlib import contextmanager
+
+SNAP = 64       # px: moves bigger than this in one step are teleports, not motion
+
+
+class FixedStep:
+    def __init__(self, hz=60, max_steps=5):
+        self.dt = 1 / hz
+        self.max_steps = max_steps
+        self.acc = 0.0
+        self.alpha = 0.0
+        self.steps = 0
+
+    def advance(self, elapsed):
+        """Simulation steps due after `elapsed` seconds of render time.
+
+        Beyond max_steps the backlog is dropped (the game slows down rather
+        than spiralling after a long stall).
+        """
+        self.acc += elapsed
+        n = int((self.acc + 1e-9) / self.dt)
+        if n > self.max_steps:
+            n = self.max_steps
+            self.acc = 0.0
+        else:
+            self.acc = max(0.0, self.acc - n * self.dt)
+        self.alpha = min(1.0, self.acc / self.dt)
+        self.steps += n
+        return n
+
+
+class Interpolator:
+    """Draw-time blend of rect positions (and plain attributes) between two steps."""
+
+    def __init__(self, items, *attrs):
+        self.items = items              # callable returning the objects with a .rect
+        self.attrs = attrs              # (owner, name) pairs, e.g. (game, 'camera_x')
+        self.prev = {}
+        self.prev_attrs = ()
+
+    def capture(self):
+        """Call before each simulation step."""
+        self.prev = {obj: (obj.rect.x, obj.rect.y) for obj in self.items() if obj is not None}
+        self.prev_attrs = [getattr(owner, name) for owner, name in self.attrs]
+
+    @contextmanager
+    def blended(self, alpha):
+        rects, attrs = [], []
+        if alpha < 1.0:
+            beta = alpha - 1.0      # 0 draws the latest step, -1 the one before
+            for obj in self.items():
+                prev = self.prev.get(obj)
+                if prev is None:
+                    continue
+                rect = obj.rect
+                x, y = rect.x, rect.y
+                dx, dy = x - prev[0], y - prev[1]
+                if (dx or dy) and abs(dx) < SNAP and abs(dy) < SNAP:
+                    rects.append((rect, x, y))
+                    rect.x = x + round(dx * beta)
+                    rect.y = y + round(dy * beta)
+            for (owner, name), prev in zip(self.attrs, self.prev_attrs):
+                value = getattr(owner, name)
+                if value != prev and abs(value - prev) < SNAP:
+                    attrs.append((owner, name, value))
+                    setattr(owner, name, value + round((value - prev) * beta))
+        try:
+            yield
+        finally:
+            for rect, x, y in rects:
+                rect.x, rect.y = x, y
+            for owner, name, value in attrs:
+                setattr(owner, name, value)
+
+
+class LatencyMeter:
+    def __init__(self, keep=4096):
+        self.keep = keep
+        self.last_poll = time.perf_counter()
+        self.waiting = []       # (previous poll, poll) of inputs no step has used yet
+        self.used = []          # inputs a step has used, not yet on screen
+        self.samples = []       # (mean, worst) seconds
+
+    def polled(self, inputs):
+        """Call right after polling events with how many inputs came in."""
+        now = time.perf_counter()
+        if inputs:
+            self.waiting.extend([(self.last_poll, now)] * inputs)
+        self.last_poll = now
+
+    def stepped(self):
+        if self.waiting:
+            self.used.extend(self.waiting)
+            self.waiting.clear()
+
+    def presented(self):
+        if not self.used:
+            return
+        now = time.perf_counter()
+        for before, seen in self.used:
+            self.samples.append((now - (before + seen) / 2, now - before))
+        self.used.clear()
+        if len(self.samples) > self.keep:
+            del self.samples[:len(self.samples) - self.keep]
+
+    def summary(self):
+        if not self.samples:
+            return {'inputs': 0}
+        means = sorted(s[0] for s in self.samples)
+        worst = sorted(s[1] for s in self.samples)
+        pick = lambda xs, q: round(xs[min(len(xs) - 1, int(len(xs) * q))] * 1000, 2)
+        return {'inputs': len(self.samples), 'mean_ms_p50': pick(means, 0.5),
+                'mean_ms_p99': pick(means, 0.99), 'worst_ms_p50': pick(worst, 0.5),
+                'worst_ms_p99': pick(worst, 0.99)}
+
+    @classmethod
+    def from_env(cls, game):
+        meter = cls()
+        if os.environ.get('MARIO_LATENCY') == '1':
+            atexit.register(lambda: print(f'{game} input-to-present latency: {meter.summary()}'))
+        return meter
+
+
+def render_fps():
+    """MARIO_RENDER_FPS: render cap; 0 is uncapped (default 240)."""
+    return int(os.environ.get('MARIO_RENDER_FPS', '240'))
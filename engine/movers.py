@@ -0,0 +1,153 @@
+"""
+Batched path movers: moving platforms and patrolling enemies.
+
+Every mover follows a closed loop of points at a constant speed. Segment
+starts, unit directions and lengths are computed once when the mover is
+added, so a frame is a handful of array operations for all movers together
+instead of one lerp/normalize per entity.
+"""
+
+import numpy as np
+
+
+class PathMovers:
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.entities = []
+        self.slots = {}
+        # per mover
+        self.positions = np.zeros((capacity, 3))
+        self.speed = np.zeros(capacity)
+        self.dist = np.zeros(capacity)
+        self.loop_len = np.ones(capacity)
+        self.first = np.zeros(capacity, dtype=np.intp)
+        self.seg = np.zeros(capacity, dtype=np.intp)
+        # per segment (append-only, shared by all movers)
+        self.seg_count = 0
+        self.seg_start = np.zeros((capacity * 2, 3))
+        self.seg_dir = np.zeros((capacity * 2, 3))
+        self.seg_off = np.zeros(capacity * 2)
+        self.seg_end = np.zeros(capacity * 2)
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+    def add(self, entity, points, speed):
+        """Register `entity` to loop through `points` at `speed` units/s."""
+        pts = np.asarray(points, dtype=float).reshape(-1, 3)
+        ends = np.roll(pts, -1, axis=0)
+        delta = ends - pts
+        lengths = np.sqrt((delta * delta).sum(axis=1))
+        dirs = np.divide(delta, lengths[:, None], out=np.zeros_like(delta),
+                         where=lengths[:, None] > 0)
+        cum = np.cumsum(lengths)
+
+        if self.count == len(self.speed):
+            self._grow_movers()
+        while self.seg_count + len(pts) > len(self.seg_off):
+            self._grow_segments()
+
+        s0, s1 = self.seg_count, self.seg_count + len(pts)
+        self.seg_start[s0:s1] = pts
+        self.seg_dir[s0:s1] = dirs
+        self.seg_off[s0:s1] = cum - lengths
+        self.seg_end[s0:s1] = cum
+        self.seg_count = s1
+        total = cum[-1]
+        if total <= 0:
+            self.seg_end[s0:s1] = np.inf
+
+        i = self.count
+        self.first[i] = self.seg[i] = s0
+        self.dist[i] = 0.0
+        # a degenerate loop just sits on its first point
+        self.loop_len[i] = total if total > 0 else 1.0
+        self.speed[i] = speed if total > 0 else 0.0
+        self.positions[i] = pts[0]
+        self.entities.append(entity)
+        self.slots[entity] = i
+        self.count += 1
+        return i
+
+    def add_pingpong(self, entity, start, end, rate):
+        """Platform-style back-and-forth; `rate` is full traversals per second."""
+        length = float(np.linalg.norm(np.subtract(end, start, dtype=float)))
+        return self.add(entity, [start, end], rate * length)
+
+    def remove(self, entity):
+        """Drop `entity`, moving the last mover into its slot."""
+        i = self.slots.pop(entity, None)
+        if i is None:
+            return
+        last = self.count - 1
+        if i != last:
+            for arr in (self.positions, self.speed, self.dist, self.loop_len,
+                        self.first, self.seg):
+                arr[i] = arr[last]
+            moved = self.entities[last]
+            self.entities[i] = moved
+            self.slots[moved] = i
+        self.entities.pop()
+        self.count = last
+
+    def clear(self):
+        self.count = self.seg_count = 0
+        self.entities.clear()
+        self.slots.clear()
+
+    def _grow_movers(self):
+        for name in ('positions', 'speed', 'dist', 'loop_len', 'first', 'seg'):
+            arr = getattr(self, name)
+            bigger = np.zeros((len(arr) * 2,) + arr.shape[1:], dtype=arr.dtype)
+            bigger[:len(arr)] = arr
+            setattr(self, name, bigger)
+        self.loop_len[self.count:] = 1.0
+
+    def _grow_segments(self):
+        for name in ('seg_start', 'seg_dir', 'seg_off', 'seg_end'):
+            arr = getattr(self, name)
+            bigger = np.zeros((len(arr) * 2,) + arr.shape[1:], dtype=arr.dtype)
+            bigger[:len(arr)] = arr
+            setattr(self, name, bigger)
+
+    # ------------------------------------------------------------------
+    # Per-frame
+    # ------------------------------------------------------------------
+    def step(self, dt):
+        """Advance every mover by `dt` seconds; returns the positions view."""
+        n = self.count
+        if n == 0:
+            return self.positions[:0]
+        d = self.dist[:n]
+        seg = self.seg[:n]
+        d += self.speed[:n] * dt
+        np.fmod(d, self.loop_len[:n], out=d)
+        # wrapped past the end of the loop: restart from the first segment
+        wrapped = d < self.seg_off[seg]
+        seg[wrapped] = self.first[:n][wrapped]
+        # at most a few segments are crossed per frame
+        ahead = d >= self.seg_end[seg]
+        while ahead.any():
+            seg[ahead] += 1
+            ahead = d >= self.seg_end[seg]
+        pos = self.positions[:n]
+        np.multiply(self.seg_dir[seg], (d - self.seg_off[seg])[:, None], out=pos)
+        pos += self.seg_start[seg]
+        return pos
+
+    def write_back(self, rows=None):
+        """Copy positions onto the entities (anything with setPos, e.g. a NodePath).
+
+        `rows` limits the copy to those slots, e.g. the ones an UpdateLOD says
+        are due; the others keep moving and are written when they are due.
+        """
+        if rows is None:
+            for entity, (x, y, z) in zip(self.entities, self.positions[:self.count].tolist()):
+                entity.setPos(x, y, z)
+            return
+        entities = self.entities
+        for i, (x, y, z) in zip(rows.tolist(), self.positions[rows].tolist()):
+            entities[i].setPos(x, y, z)
+
+    def position_of(self, entity):
+        return self.positions[self.slots[entity]]
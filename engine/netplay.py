@@ -0,0 +1,291 @@
+"""
+Two-player 1-1 with rollback netcode over UDP.
+
+Both clients run the whole match (one Level, two Players) locally. Local
+input is applied on the frame it is pressed; the other player's input is
+predicted by repeating their last confirmed input. When their real input
+arrives and differs from the prediction, the client restores the snapshot
+taken before that frame (engine.savestate plus the second player) and
+re-simulates up to the present inside the same tick.
+
+Every packet carries all local inputs the peer has not acknowledged yet, so
+a lost packet is covered by the next one. A client that gets more than
+`max_rollback` frames ahead of the last confirmed remote input waits rather
+than predicting further, and a client that runs ahead of its peer skips the
+odd tick so both stay in step.
+
+    link = Link(7000, ('127.0.0.1', 7001), rtt_ms=100, loss=0.05)
+    session = Session(Match(smb), local=0, link=link)
+    session.tick(bits)      # once per 60 Hz frame; INPUT_LEFT | INPUT_RIGHT | INPUT_JUMP
+
+Link's rtt_ms / jitter_ms / loss options delay and drop outgoing packets to
+simulate a real connection on localhost.
+"""
+
+import heapq
+import random
+import socket
+import struct
+import time
+import zlib
+
+from engine import savestate
+from engine.env import Held
+
+INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP = 1, 2, 4
+DT = 1 / 60
+HISTORY = 128                  # frames of inputs and snapshots kept (power of two)
+MAX_ROLLBACK = 15
+MAX_SEND = 64
+
+# sender frame, frame of the first input, last remote frame received, advantage, count
+PACKET = struct.Struct('<IIibB')
+HELLO = b'hi'
+
+
+class _Muted:
+    def emit(self, *args, **kwargs):
+        pass
+
+
+class Match:
+    """1-1 with a second Player; advance() runs one frame for both."""
+
+    def __init__(self, smb, seed=0):
+        import pygame
+        random.seed(seed)       # part of every snapshot, so both clients start from the same one
+        self.smb = smb
+        self.game = game = smb.Game()
+        game.state = game.view = smb.PLAYING
+        self.players = (game.player, smb.Player(game.player.rect.x + smb.TILE, game.player.rect.y))
+        left, right = Held(pygame.K_LEFT), Held(pygame.K_RIGHT)
+        self.keys = (Held(), left, right, Held(pygame.K_LEFT, pygame.K_RIGHT))
+        self.frame = 0
+
+    def advance(self, inputs):
+        smb, game = self.smb, self.game
+        self.frame += 1
+        if game.state != smb.PLAYING:
+            return
+        level = game.level
+        for player, bits in zip(self.players, inputs):
+            if bits & INPUT_JUMP:
+                player.jump()
+            st = player.update(self.keys[bits & 3], level.near(player.rect), level.blocks,
+                               level.enemies)
+            if st == smb.DEAD or player.rect.top > smb.SCREEN_HEIGHT:
+                player.reset()
+            if player.rect.left < 0:
+                player.rect.left = 0
+        for b in level.blocks:
+            b.update()
+        for enemy in level.enemies:
+            enemy.update(level.near(enemy.rect))
+        if level.flag and any(p.rect.colliderect(level.flag.rect) for p in self.players):
+            game.state = smb.LEVEL_COMPLETE
+        game.hud_timer += DT
+        if game.hud_timer >= 1.0:
+            game.hud_timer = 0
+            game.time_left = max(0, game.time_left - 1)
+            if game.time_left == 0:
+                game.state = smb.DEAD
+
+    def save(self):
+        p = self.players[1]
+        return (savestate.dumps('1-1', self.game)
+                + savestate.SMB_PLAYER.pack(p.rect.x, p.rect.y, p.vel_x, p.vel_y, p.on_ground)
+                + self.frame.to_bytes(4, 'little'))
+
+    def load(self, data):
+        savestate.loads(self.game, data)
+        p = self.players[1]
+        at = len(data) - 4 - savestate.SMB_PLAYER.size
+        p.rect.x, p.rect.y, p.vel_x, p.vel_y, p.on_ground = savestate.SMB_PLAYER.unpack_from(data, at)
+        self.frame = int.from_bytes(data[-4:], 'little')
+
+    def camera_for(self, index):
+        smb, rect = self.smb, self.players[index].rect
+        return max(0, min(rect.centerx - smb.SCREEN_WIDTH // 2,
+                          self.game.level.length_px - smb.SCREEN_WIDTH))
+
+
+class Link:
+    """Non-blocking UDP socket with an optional latency / packet-loss shim on sends."""
+
+    def __init__(self, port, peer, rtt_ms=0, jitter_ms=0, loss=0.0, seed=None, host='127.0.0.1'):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+        self.peer = peer
+        self.delay = rtt_ms / 2000
+        self.jitter = jitter_ms / 1000
+        self.loss = loss
+        self.rng = random.Random(seed)      # never the game's random state
+        self.pending = []
+        self.seq = 0
+        self.sent = self.dropped = 0
+
+    def send(self, data):
+        self.sent += 1
+        if self.loss and self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        if not (self.delay or self.jitter):
+            self._sendto(data)
+            return
+        due = time.perf_counter() + self.delay + self.jitter * self.rng.random()
+        self.seq += 1
+        heapq.heappush(self.pending, (due, self.seq, data))
+
+    def _sendto(self, data):
+        try:
+            self.sock.sendto(data, self.peer)
+        except OSError:
+            pass    # peer not listening yet; the next packet repeats everything
+
+    def flush(self):
+        now = time.perf_counter()
+        pending = self.pending
+        while pending and pending[0][0] <= now:
+            self._sendto(heapq.heappop(pending)[2])
+
+    def recv(self):
+        self.flush()
+        packets = []
+        while True:
+            try:
+                packets.append(self.sock.recv(2048))
+            except (BlockingIOError, ConnectionResetError):
+                return packets
+
+    def close(self):
+        self.sock.close()
+
+
+class Session:
+    def __init__(self, match, local, link, max_rollback=MAX_ROLLBACK):
+        self.match = match
+        self.local = local
+        self.remote = 1 - local
+        self.link = link
+        self.max_rollback = max_rollback
+        self.frame = 0                      # next frame to simulate
+        self.inputs = (bytearray(HISTORY), bytearray(HISTORY))
+        self.states = [None] * HISTORY      # snapshot taken before each frame
+        self.confirmed = -1                 # last remote frame received
+        self.acked = -1                     # last local frame the peer has
+        self.peer_frame = 0
+        self.peer_advantage = 0
+        self.wait_until = 0
+        self.rollbacks = self.resimulated = self.stalls = 0
+        self.max_rollback_ms = 0.0
+
+    def connect(self, timeout=10.0):
+        """Exchange hellos so both clients start together; False on timeout."""
+        end = time.perf_counter() + timeout
+        heard = False
+        while time.perf_counter() < end:
+            self.link.send(HELLO)
+            for data in self.link.recv():
+                heard = True
+                if data != HELLO:
+                    self._receive(data)
+            if heard:
+                for _ in range(3):
+                    self.link.send(HELLO)
+                return True
+            time.sleep(0.01)
+        return False
+
+    def predicted(self):
+        if self.confirmed < 0:
+            return 0
+        return self.inputs[self.remote][self.confirmed % HISTORY] & ~INPUT_JUMP
+
+    def _receive(self, data):
+        """Take in a packet; returns the earliest frame whose prediction was wrong, or None."""
+        if len(data) < PACKET.size:
+            return None
+        peer_frame, first, ack, advantage, count = PACKET.unpack_from(data)
+        if peer_frame >= self.peer_frame:
+            self.peer_frame, self.peer_advantage = peer_frame, advantage
+        self.acked = max(self.acked, ack)
+        remote = self.inputs[self.remote]
+        wrong = None
+        for i, bits in enumerate(data[PACKET.size:PACKET.size + count]):
+            f = first + i
+            if f != self.confirmed + 1:
+                continue
+            slot = f % HISTORY
+            if f < self.frame and remote[slot] != bits and wrong is None:
+                wrong = f
+            remote[slot] = bits
+            self.confirmed = f
+        return wrong
+
+    def _simulate(self, frame):
+        self.states[frame % HISTORY] = self.match.save()
+        slot = frame % HISTORY
+        if frame > self.confirmed:
+            self.inputs[self.remote][slot] = self.predicted()
+        pair = [0, 0]
+        pair[self.local] = self.inputs[self.local][slot]
+        pair[self.remote] = self.inputs[self.remote][slot]
+        self.match.advance(pair)
+
+    def _rollback(self, frame):
+        t0 = time.perf_counter()
+        smb = self.match.smb
+        events, smb.events = smb.events, _Muted()   # already emitted the first time round
+        try:
+            self.match.load(self.states[frame % HISTORY])
+            for f in range(frame, self.frame):
+                self._simulate(f)
+        finally:
+            smb.events = events
+        self.rollbacks += 1
+        self.resimulated += self.frame - frame
+        self.max_rollback_ms = max(self.max_rollback_ms, (time.perf_counter() - t0) * 1000)
+
+    def tick(self, bits):
+        """Run one frame with this client's input; False if it had to wait for the peer."""
+        wrong = None
+        for data in self.link.recv():
+            if data == HELLO:
+                continue
+            f = self._receive(data)
+            if f is not None and (wrong is None or f < wrong):
+                wrong = f
+        if wrong is not None:
+            self._rollback(wrong)
+
+        advanced = False
+        advantage = self.frame - self.peer_frame
+        if self.frame - self.confirmed > self.max_rollback:
+            self.stalls += 1
+        elif advantage - self.peer_advantage >= 2 and self.frame >= self.wait_until:
+            self.wait_until = self.frame + 10       # ahead of the peer: give it a tick
+            self.stalls += 1
+        else:
+            self.inputs[self.local][self.frame % HISTORY] = bits
+            self._simulate(self.frame)
+            self.frame += 1
+            advanced = True
+        self._send(advantage)
+        return advanced
+
+    def _send(self, advantage):
+        first = max(self.acked + 1, self.frame - MAX_SEND)
+        local = self.inputs[self.local]
+        bits = bytes(local[f % HISTORY] for f in range(first, self.frame))
+        advantage = max(-128, min(127, advantage))
+        self.link.send(PACKET.pack(self.frame, first, self.confirmed, advantage, len(bits)) + bits)
+        self.link.flush()
+
+    def settled(self, frame):
+        """True once every input before `frame` is confirmed and its snapshot is still kept."""
+        return frame <= self.confirmed + 1 and frame < self.frame and self.frame - frame < HISTORY
+
+    def checksum(self, frame):
+        """CRC of the snapshot before `frame`; compare between clients once settled()."""
+        return zlib.crc32(self.states[frame % HISTORY])
@@ -0,0 +1,121 @@
+"""
+Tile-grid observations built from level data instead of rendered frames.
+
+The level's solids are rasterised once into a grid of kind ids, one cell
+per TILE. Each observe() only restores the few cells the moving things
+covered last time, marks bumped question blocks as used and stamps the
+goombas and the player, then returns a view of the columns under the
+camera. No pixels are read and nothing is blitted.
+
+Cells hold the eight observation classes from engine.tiles: EMPTY, GROUND,
+BRICK, QUESTION, USED, PIPE, GOOMBA, PLAYER (stairs count as ground).
+
+    observer = TileObserver(game.level, TILE, cols, rows, origin_y)
+    grid = observer.observe(game)       # (rows, cols) uint8 view, reused
+
+render_target() adds a small palettised Surface showing the same grid;
+pixels() is a zero-copy pygame.surfarray view of it.
+"""
+
+import numpy as np
+import pygame
+
+from engine import tiles
+
+CLASSES = (tiles.EMPTY, tiles.GROUND, tiles.BRICK, tiles.QUESTION,
+           tiles.USED, tiles.PIPE, tiles.GOOMBA, tiles.PLAYER)
+# level kinds that are shown as one of the classes above
+FOLD = {tiles.STAIR: tiles.GROUND, tiles.PLATFORM: tiles.GROUND}
+PALETTE = [(107, 140, 255), (222, 160, 92), (185, 70, 20), (255, 200, 0),
+           (160, 160, 160), (40, 170, 40), (139, 69, 19), (200, 0, 0)]
+
+
+class TileObserver:
+    def __init__(self, level, tile, cols, rows, origin_y=0):
+        self.tile = tile
+        self.origin_y = origin_y    # screen y of the top of row 0
+        self.cols = cols
+        self.rows = rows
+        self.stamped = []
+        self.target = self.grid_surface = self.grid_pixels = None
+        self.attach(level)
+
+    def attach(self, level):
+        """Rasterise a (new) level; called again after every restart."""
+        tile = self.tile
+        width = -(-level.length_px // tile)
+        # `cols` spare empty columns so a window never runs off the end
+        self.base = np.zeros((self.rows, width + self.cols), dtype=np.uint8)
+        self.questions = []
+        for solid in level.solids:
+            kind = FOLD.get(solid.kind, solid.kind)
+            if kind not in CLASSES:
+                continue
+            cells = self._cells(solid.rect)
+            if cells:
+                self.base[cells] = kind
+                if kind == tiles.QUESTION:
+                    self.questions.append((solid, cells))
+        self.live = self.base.copy()
+        self.stamped = []
+        self.level = level
+
+    def _cells(self, rect):
+        tile = self.tile
+        top, bottom = rect.top - self.origin_y, rect.bottom - self.origin_y
+        r0, r1 = max(top // tile, 0), min(-(-bottom // tile), self.rows)
+        c0, c1 = max(rect.left // tile, 0), -(-rect.right // tile)
+        if r0 >= r1 or c0 >= c1:
+            return None
+        return slice(r0, r1), slice(c0, c1)
+
+    def _stamp(self, rect, kind):
+        cells = self._cells(rect)
+        if cells:
+            self.live[cells] = kind
+            self.stamped.append(cells)
+
+    def observe(self, game):
+        """(rows, cols) view of the grid under game.camera_x; valid until the next call."""
+        live, base = self.live, self.base
+        for cells in self.stamped:
+            live[cells] = base[cells]
+        self.stamped.clear()
+        if self.questions:
+            for solid, cells in self.questions:
+                if solid.used:
+                    base[cells] = live[cells] = tiles.USED
+            self.questions = [q for q in self.questions if not q[0].used]
+        for enemy in self.level.enemies:
+            if enemy.alive or enemy.squash_timer > 0:
+                self._stamp(enemy.rect, tiles.GOOMBA)
+        self._stamp(game.player.rect, tiles.PLAYER)
+        c0 = game.camera_x // self.tile
+        return live[:, c0:c0 + self.cols]
+
+    # ------------------------------------------------------------------
+    # Optional render target
+    # ------------------------------------------------------------------
+    def render_target(self, scale=2):
+        """A palettised (cols*scale, rows*scale) Surface that render() fills."""
+        size = (self.cols * scale, self.rows * scale)
+        self.grid_surface = pygame.Surface((self.cols, self.rows), depth=8)
+        self.grid_surface.set_palette(PALETTE)
+        self.grid_pixels = pygame.surfarray.pixels2d(self.grid_surface)
+        self.target = pygame.Surface(size, depth=8)
+        self.target.set_palette(PALETTE)
+        return self.target
+
+    def render(self, grid):
+        """Draw an observe() result into the render target (a 1 px per cell copy and a scale)."""
+        self.grid_pixels[...] = grid.T
+        pygame.transform.scale(self.grid_surface, self.target.get_size(), self.target)
+        return self.target
+
+    def pixels(self):
+        """Zero-copy (width, height) array view of the render target's pixels.
+
+        The Surface stays locked while the array is alive; drop it before
+        blitting the target.
+        """
+        return pygame.surfarray.pixels2d(self.target)
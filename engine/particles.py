@@ -0,0 +1,176 @@
+"""
+Particle effects in preallocated NumPy arrays.
+
+Every particle is a column of one float32 array (x, y, vx, vy, frames
+left) plus a colour index, and the live ones are always packed at the
+front, [:count]. update() moves them all with a few in-place array
+operations and, when some have run out, compresses the survivors into a
+second set of arrays and swaps the two. draw() writes the pixels straight
+into the target Surface through surfarray. There is no Sprite, Surface or
+Python object per particle, and nothing grows: a burst that doesn't fit
+in `capacity` is cut short and the rest counted in `dropped`.
+
+burst() only queues the burst and clear() a fresh queue that starts by
+emptying the arrays; the next update() does the work. So game code may
+call either from the simulation thread (engine/simthread.py) while
+update() and draw() run on the render thread.
+
+    particles = Particles()
+    events.subscribe(particles.on_event)        # coins on PICKUP, dust on STOMP and BUMP
+    particles.burst(x, y, 'bump')
+    ...
+    particles.update()                          # every 60 Hz step
+    particles.draw(screen, camera_x)            # every drawn frame
+"""
+
+from collections import deque
+
+import numpy as np
+import pygame
+
+from engine.events import BUMP, PICKUP, STOMP
+
+# name -> (colours, particles, sideways speed, upward speed, frames); speeds
+# are the most a particle gets, in px per step
+EFFECTS = {
+    'bump': (((185, 70, 20), (120, 50, 20), (230, 150, 90)), 12, 1.5, 4.0, 28),
+    'coin': (((255, 220, 0), (255, 255, 255), (255, 170, 0)), 18, 2.0, 5.0, 34),
+    'stomp': (((140, 80, 40), (255, 255, 255), (90, 50, 20)), 16, 2.5, 2.5, 22),
+}
+ON_EVENT = {PICKUP: 'coin', STOMP: 'stomp', BUMP: 'bump'}
+X, Y, VX, VY, LIFE = range(5)
+
+
+class Particles:
+    def __init__(self, capacity=50_000, effects=EFFECTS, on=ON_EVENT, gravity=0.3, size=2, seed=None):
+        self.capacity = capacity
+        self.gravity = gravity
+        self.size = size                # px square per particle
+        self.on = on                    # event kind -> effect name
+        self.count = 0
+        self.dropped = 0
+        self.pending = deque()          # (x, y, effect, count) or None (clear) for the next update()
+        self.rng = np.random.default_rng(seed)
+        # the effects share one palette; each keeps (first colour, colours, ...)
+        self.palette, self.effects = [], {}
+        for name, (colours, n, speed, kick, frames) in effects.items():
+            self.effects[name] = (len(self.palette), len(colours), n, speed, kick, frames)
+            self.palette.extend(colours)
+        # two copies of everything, swapped on compaction
+        self.fields = np.zeros((2, 5, capacity), dtype=np.float32)
+        self.colour = np.zeros((2, capacity), dtype=np.intp)
+        self.side = 0
+        # scratch for update() and draw(), so a frame allocates nothing per particle
+        self._keep = np.zeros(capacity, dtype=bool)
+        self._inside = np.zeros(capacity, dtype=bool)
+        self._px = np.zeros((4, capacity), dtype=np.intp)     # intp: indexing won't convert
+        self._pixel = np.zeros(capacity, dtype=np.uint32)
+        self._index = np.zeros(capacity, dtype=np.intp)
+        self._mapped = np.zeros(len(self.palette), dtype=np.uint32)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        """No particles from the next update() on; bursts queued before this are dropped."""
+        self.pending = deque([None])
+
+    def on_event(self, kind, x, y, z, value):
+        """EventBus listener: a burst of the effect mapped to `kind`, if any."""
+        name = self.on.get(kind)
+        if name is not None:
+            self.burst(x, y, name)
+
+    def burst(self, x, y, effect, count=None):
+        """`count` (default: the effect's own) new particles of `effect` at (x, y), from the next update()."""
+        self.pending.append((x, y, effect, count))
+
+    def _spawn(self, x, y, effect, count):
+        first, colours, n, speed, kick, frames = self.effects[effect]
+        n = n if count is None else count
+        start = self.count
+        fit = min(n, self.capacity - start)
+        self.dropped += n - fit
+        if fit <= 0:
+            return
+        end = start + fit
+        f = self.fields[self.side, :, start:end]
+        rng = self.rng
+        f[X] = x
+        f[Y] = y
+        rng.random(dtype=np.float32, out=f[VX])  # sideways in [-speed, speed)
+        f[VX] -= 0.5
+        f[VX] *= 2 * speed
+        rng.random(dtype=np.float32, out=f[VY])  # up, between a third and all of kick
+        f[VY] *= -kick * 2 / 3
+        f[VY] -= kick / 3
+        rng.random(dtype=np.float32, out=f[LIFE])  # frames, +-25%
+        f[LIFE] *= frames / 2
+        f[LIFE] += frames * 3 / 4
+        self.colour[self.side, start:end] = rng.integers(first, first + colours, fit)
+        self.count = end
+
+    def update(self):
+        pending = self.pending
+        while pending:
+            burst = pending.popleft()
+            if burst is None:
+                self.count = 0
+            else:
+                self._spawn(*burst)
+        n = self.count
+        if not n:
+            return
+        f = self.fields[self.side, :, :n]
+        f[VY] += self.gravity
+        f[X] += f[VX]
+        f[Y] += f[VY]
+        f[LIFE] -= 1
+        keep = self._keep[:n]
+        np.greater(f[LIFE], 0, out=keep)
+        alive = int(np.count_nonzero(keep))
+        if alive < n:
+            # one index array, then a gather per row (mode='clip' writes
+            # straight into `out`; the default buffers it)
+            survivors = np.flatnonzero(keep)
+            back = 1 - self.side
+            for row, out in zip(f, self.fields[back, :, :alive]):
+                np.take(row, survivors, out=out, mode='clip')
+            np.take(self.colour[self.side, :n], survivors, out=self.colour[back, :alive], mode='clip')
+            self.side = back
+        self.count = alive
+
+    def draw(self, surface, camera_x=0, camera_y=0):
+        n = self.count
+        if not n:
+            return
+        width, height = surface.get_size()
+        size = self.size
+        f = self.fields[self.side]
+        px, py, cx, cy = self._px[:, :n]
+        np.subtract(f[X, :n], camera_x, out=px, casting='unsafe')
+        np.subtract(f[Y, :n], camera_y, out=py, casting='unsafe')
+        # as unsigned, anything left of or above the surface is huge, so one
+        # comparison per axis keeps what is fully on it
+        inside, below = self._inside[:n], self._keep[:n]
+        np.less(px.view(np.uintp), width - size + 1, out=inside)
+        np.less(py.view(np.uintp), height - size + 1, out=below)
+        inside &= below
+        shown = np.flatnonzero(inside)
+        k = len(shown)
+        if not k:
+            return
+        cx, cy, index, pixel = cx[:k], cy[:k], self._index[:k], self._pixel[:k]
+        np.take(px, shown, out=cx, mode='clip')
+        np.take(py, shown, out=cy, mode='clip')
+        np.take(self.colour[self.side], shown, out=index, mode='clip')
+        self._mapped[:] = [surface.map_rgb(c) for c in self.palette]
+        np.take(self._mapped, index, out=pixel, mode='clip')
+        pixels = pygame.surfarray.pixels2d(surface)
+        for _ in range(size):
+            for _ in range(size):
+                pixels[cx, cy] = pixel
+                cx += 1
+            cx -= size
+            cy += 1
+        del pixels      # unlocks the surface
@@ -0,0 +1,179 @@
+"""
+On-demand sampling profiler for the game thread, with flamegraph output.
+
+While recording, a daemon thread wakes every `interval` seconds, reads the
+game thread's current Python stack from sys._current_frames() and tags it
+with the game state and frame number the game reports through `tag()`.
+Nothing is hooked into the game itself: when not recording there is no
+thread, no trace function and no per-frame call, only the hotkey check in
+the game's existing event handling.
+
+When a recording stops, the sampler thread writes it out (the game never
+waits on the file):
+
+    *.json   speedscope (https://www.speedscope.app), one profile per game
+             state; every sample sits under a "frame N" root, so the
+             time-order view shows each game frame as one block and a
+             stutter as a wide one
+    other    collapsed stacks ("PLAYING;run_game (1-1.py:486);... 12"),
+             one flamegraph per state, for flamegraph.pl / inferno
+
+    profiler = Sampler.from_env('1-1')
+    profiler.attach(lambda: (STATE_NAMES[game.view], events.frame))   # on the game thread
+    ...
+    if key == PROFILE_KEY: profiler.toggle()
+
+In the games F8 starts and stops a recording; one still running when the
+game quits is written out at exit. For headless runs,
+MARIO_PROFILE=path records from start-up to exit, and
+MARIO_PROFILE_FRAMES=600-900 limits it to those game frames. A `{n}` in
+the path numbers successive recordings. MARIO_PROFILE_HZ sets the rate
+(default 200; the game thread only gives up the GIL every
+sys.getswitchinterval(), 5 ms by default, so much higher rates mostly
+sample the moments it blocks in C).
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+DEFAULT_PATH = 'profile-{game}-{n}.folded'
+
+
+def frame_name(code):
+    return f'{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class Sampler:
+    def __init__(self, game, path=None, hz=200, frames=None, autostart=False):
+        self.game = game
+        self.path = path or DEFAULT_PATH
+        self.interval = 1 / hz
+        self.frames = frames            # (first, last) game frame to record, or None
+        self.autostart = autostart
+        self.tag = None                 # () -> (state name, frame number)
+        self.thread_id = None
+        self.recordings = 0
+        self._thread = None
+        self._stop = None
+
+    @classmethod
+    def from_env(cls, game):
+        path = os.environ.get('MARIO_PROFILE')
+        window = os.environ.get('MARIO_PROFILE_FRAMES')
+        frames = tuple(int(n) for n in window.split('-', 1)) if window else None
+        return cls(game, path, float(os.environ.get('MARIO_PROFILE_HZ', '200')),
+                   frames, autostart=bool(path or frames))
+
+    # ------------------------------------------------------------------
+    # Game thread
+    # ------------------------------------------------------------------
+    def attach(self, tag):
+        """Profile the calling thread; `tag()` returns (state name, frame number)."""
+        self.tag = tag
+        self.thread_id = threading.get_ident()
+        if self.autostart:
+            self.autostart = False
+            self.start()
+
+    @property
+    def recording(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def toggle(self):
+        if self.recording:
+            self.stop()
+        else:
+            self.start()
+
+    def start(self):
+        if self.recording or self.tag is None:
+            return
+        self.recordings += 1
+        if self.recordings == 1:
+            atexit.register(self.close)     # a recording still running at exit is written out
+        path = self.path.format(game=self.game, n=self.recordings)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop, path),
+                                        name='profiler', daemon=True)
+        self._thread.start()
+        print(f'{self.game} profiler: recording to {path}')
+
+    def stop(self):
+        """Stop recording; the profile is written by the sampler thread."""
+        if self._stop is not None:
+            self._stop.set()
+
+    def close(self):
+        self.stop()
+        if self._thread is not None:
+            self._thread.join()
+
+    # ------------------------------------------------------------------
+    # Sampler thread
+    # ------------------------------------------------------------------
+    def _run(self, stop, path):
+        first, last = self.frames or (0, None)
+        stacks = {}
+        samples = []    # (seconds, frame, state, stack of code objects, root first)
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            state, number = self.tag()
+            if number < first:
+                continue
+            if last is not None and number > last:
+                break
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            codes.reverse()
+            stack = tuple(codes)
+            samples.append((time.perf_counter(), number, state, stacks.setdefault(stack, stack)))
+        if path.endswith('.json'):
+            write_speedscope(path, self.game, samples, self.interval)
+        else:
+            write_collapsed(path, samples)
+        print(f'{self.game} profiler: {len(samples)} samples -> {path}')
+
+
+def write_collapsed(path, samples):
+    counts = Counter(';'.join([state, *map(frame_name, stack)]) for _, _, state, stack in samples)
+    with open(path, 'w') as f:
+        for line, count in counts.most_common():
+            f.write(f'{line} {count}\n')
+
+
+def write_speedscope(path, game, samples, interval):
+    frames, index = [], {}
+
+    def frame_id(name, file=None, line=None):
+        i = index.get(name)
+        if i is None:
+            i = index[name] = len(frames)
+            frames.append({'name': name} if file is None else {'name': name, 'file': file, 'line': line})
+        return i
+
+    profiles = {}
+    previous = None
+    for t, number, state, stack in samples:
+        profile = profiles.get(state)
+        if profile is None:
+            profile = profiles[state] = {'type': 'sampled', 'name': f'{game} {state}', 'unit': 'seconds',
+                                         'startValue': 0, 'endValue': 0, 'samples': [], 'weights': []}
+        weight = interval if previous is None else t - previous
+        previous = t
+        profile['samples'].append([frame_id(f'frame {number}')] + [
+            frame_id(frame_name(code), code.co_filename, code.co_firstlineno) for code in stack])
+        profile['weights'].append(weight)
+        profile['endValue'] += weight
+    with open(path, 'w') as f:
+        json.dump({'$schema': 'https://www.speedscope.app/file-format-schema.json',
+                   'name': f'{game} profile', 'exporter': 'engine.profiler',
+                   'shared': {'frames': frames}, 'profiles': list(profiles.values())}, f)
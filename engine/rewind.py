@@ -0,0 +1,109 @@
+"""
+Hold-to-rewind history for 1-1 and mario3, built on engine.savestate.
+
+Every tick capture() snapshots the game and stores how to get from the new
+frame back to the previous one: the byte positions that changed and their
+XOR, packed into one bytes object. The newest snapshot is kept whole, so it
+is the keyframe every delta is applied against and stepping back one frame
+costs one small delta. When a snapshot changes length (mario3 enemies,
+coins or boss projectiles come and go) the previous snapshot is stored
+whole instead.
+
+History is a fixed ring of records: at most `seconds * fps` frames and
+`max_bytes` of record data, oldest frames dropped first, so memory stays
+capped however long the session runs.
+
+    rewind = Rewind('1-1', game)
+    rewind.capture()        # after every update
+    rewind.step_back()      # while the rewind key is held
+"""
+
+import numpy as np
+
+from engine import savestate
+
+DELTA, FULL = 0, 1
+MAX_DELTA_STATE = 1 << 16   # delta positions are stored as uint16
+NO_CHANGE = b''
+
+
+class Rewind:
+    def __init__(self, name, target, seconds=60, fps=60, max_bytes=1 << 20):
+        self.name = name
+        self.target = target
+        self.fps = fps
+        self.capacity = seconds * fps
+        self.max_bytes = max_bytes
+        self.records = [None] * self.capacity   # record i steps frame i back to frame i-1
+        self.kinds = bytearray(self.capacity)
+        self.head = 0                           # slot the next record goes in
+        self.count = 0                          # frames that can be stepped back
+        self.nbytes = 0
+        self.current = None                     # newest snapshot, uint8 array
+
+    def clear(self):
+        self.records = [None] * self.capacity
+        self.head = self.count = self.nbytes = 0
+        self.current = None
+
+    @property
+    def seconds(self):
+        """How far back the history currently reaches."""
+        return self.count / self.fps
+
+    def _drop_oldest(self):
+        slot = (self.head - self.count) % self.capacity
+        self.nbytes -= len(self.records[slot])
+        self.records[slot] = None
+        self.count -= 1
+
+    def capture(self):
+        """Snapshot the target after a tick and record the step back to the previous one."""
+        state = np.frombuffer(savestate.dumps(self.name, self.target), dtype=np.uint8)
+        prev = self.current
+        self.current = state
+        if prev is None:
+            return
+        if len(prev) == len(state) and len(state) <= MAX_DELTA_STATE:
+            diff = np.bitwise_xor(prev, state)
+            changed = np.flatnonzero(diff)
+            if len(changed):
+                record = changed.astype('<u2').tobytes() + diff[changed].tobytes()
+            else:
+                record = NO_CHANGE
+            kind = DELTA
+        else:
+            record, kind = prev.tobytes(), FULL
+
+        if self.count == self.capacity:
+            self._drop_oldest()
+        while self.count and self.nbytes + len(record) > self.max_bytes:
+            self._drop_oldest()
+        slot = self.head
+        self.records[slot] = record
+        self.kinds[slot] = kind
+        self.head = (slot + 1) % self.capacity
+        self.count += 1
+        self.nbytes += len(record)
+
+    def step_back(self):
+        """Restore the previous frame; False once history runs out."""
+        if not self.count:
+            return False
+        slot = (self.head - 1) % self.capacity
+        record = self.records[slot]
+        if self.kinds[slot] == FULL:
+            state = np.frombuffer(record, dtype=np.uint8)
+        else:
+            state = self.current.copy()
+            n = len(record) // 3
+            if n:
+                state[np.frombuffer(record, dtype='<u2', count=n)] ^= \
+                    np.frombuffer(record, dtype=np.uint8, offset=2 * n)
+        self.records[slot] = None
+        self.head = slot
+        self.count -= 1
+        self.nbytes -= len(record)
+        self.current = state
+        savestate.loads(self.target, state)
+        return True
@@ -0,0 +1,242 @@
+"""
+Compact binary save states for 1-1 and mario3.
+
+A snapshot is simulation state only, never surfaces: player kinematics,
+blocks, enemies, timers, world/level, boss and projectiles, and the
+`random` module's state so a restored game replays exactly. Values are
+packed with fixed struct layouts after a small header; restoring from disk
+maps the file and unpacks straight from the mapping.
+
+    data = dumps('1-1', game)          # bytes
+    loads(game, data)
+    save('late.msav', 'mario3', m3)    # m3: the loaded mario3 module
+    load('late.msav', m3)
+    error = quickload('late.msav', 'mario3', m3)   # None, or why m3 was left as it was
+
+1-1 restores into an existing Game (the level layout is fixed, so objects
+are updated in place). mario3 levels are random, so its platforms, enemies
+and coins are stored and rebuilt.
+"""
+
+import mmap
+import random
+import struct
+import sys
+
+MAGIC = b'MSAV'
+VERSION = 1
+HEADER = struct.Struct('<4sBBH')           # magic, version, game, reserved
+GAME_IDS = {'1-1': 1, 'mario3': 2}
+
+RNG = struct.Struct('<625I?d')             # Mersenne Twister words, gauss_next
+COUNT = struct.Struct('<H')
+
+# 1-1
+SMB_GAME = struct.Struct('<BBhdi')         # state, view, time_left, hud_timer, camera_x
+SMB_PLAYER = struct.Struct('<iidd?')       # x, y, vel_x, vel_y, on_ground
+SMB_BLOCK = struct.Struct('<bB')           # used (-1 = brick), bump_timer
+SMB_GOOMBA = struct.Struct('<iiHHb?i')     # x, y, w, h, vx, alive, squash_timer
+
+# mario3
+M3_GAME = struct.Struct('<BBB')            # game_state, current_world, current_level
+M3_PLAYER = struct.Struct('<iiid??bbi')    # x, y, vel_x, vel_y, jumping, on_ground, direction, lives, score
+M3_RECT = struct.Struct('<iiHH')
+M3_ENEMY = struct.Struct('<iibbB')         # x, y, velocity_x, direction, koopa
+M3_BOSS = struct.Struct('<?BiiiibH')       # present, type, x, y, vel_x, vel_y, health, attack_timer
+M3_PROJECTILE = struct.Struct('<iiii3B')   # x, y, vel_x, vel_y, colour
+M3_FLAG = struct.Struct('<?ii')
+BOSS_TYPES = ('bowser', 'king_boo', 'petey_piranha')
+
+
+class SaveStateError(ValueError):
+    pass
+
+
+class _Writer:
+    __slots__ = ('buf',)
+
+    def __init__(self):
+        self.buf = bytearray()
+
+    def put(self, fmt, *values):
+        self.buf += fmt.pack(*values)
+
+
+class _Reader:
+    __slots__ = ('buf', 'pos')
+
+    def __init__(self, buf, pos=0):
+        self.buf = buf
+        self.pos = pos
+
+    def get(self, fmt):
+        values = fmt.unpack_from(self.buf, self.pos)
+        self.pos += fmt.size
+        return values
+
+    def count(self):
+        return self.get(COUNT)[0]
+
+
+def _put_rng(w):
+    _, words, gauss = random.getstate()
+    w.put(RNG, *words, gauss is not None, gauss or 0.0)
+
+
+def _get_rng(r):
+    values = r.get(RNG)
+    random.setstate((3, values[:625], values[626] if values[625] else None))
+
+
+def _module_of(obj):
+    return sys.modules[type(obj).__module__]
+
+
+# ------------------------------------------------------------------
+# 1-1
+# ------------------------------------------------------------------
+def _dump_1_1(game, w):
+    level, p = game.level, game.player
+    w.put(SMB_GAME, game.state, game.view, game.time_left, game.hud_timer, game.camera_x)
+    w.put(SMB_PLAYER, p.rect.x, p.rect.y, p.vel_x, p.vel_y, p.on_ground)
+    w.put(COUNT, len(level.blocks))
+    for b in level.blocks:
+        w.put(SMB_BLOCK, -1 if b.used is None else b.used, b.bump_timer)
+    w.put(COUNT, len(level.enemies))
+    for e in level.enemies:
+        r = e.rect
+        w.put(SMB_GOOMBA, r.x, r.y, r.w, r.h, e.vx, e.alive, e.squash_timer)
+    _put_rng(w)
+
+
+def _load_1_1(game, r):
+    smb = _module_of(game)
+    level, p = game.level, game.player
+    game.state, game.view, game.time_left, game.hud_timer, game.camera_x = r.get(SMB_GAME)
+    p.rect.x, p.rect.y, p.vel_x, p.vel_y, p.on_ground = r.get(SMB_PLAYER)
+    if r.count() != len(level.blocks):
+        raise SaveStateError('block count does not match this level')
+    for b in level.blocks:
+        used, b.bump_timer = r.get(SMB_BLOCK)
+        b.used = None if used < 0 else bool(used)
+    if r.count() != len(level.enemies):
+        raise SaveStateError('goomba count does not match this level')
+    for e in level.enemies:
+        x, y, w, h, e.vx, e.alive, e.squash_timer = r.get(SMB_GOOMBA)
+        e.image = smb.create_goomba_surface() if e.alive else smb.squashed_goomba_surface()
+        e.rect.update(x, y, w, h)
+    _get_rng(r)
+
+
+# ------------------------------------------------------------------
+# mario3 (state lives in module globals)
+# ------------------------------------------------------------------
+def _dump_mario3(m3, w):
+    p, boss, flag = m3.player, m3.boss, m3.flag_pole
+    w.put(M3_GAME, m3.game_state, m3.current_world, m3.current_level)
+    w.put(M3_PLAYER, p.rect.x, p.rect.y, p.velocity_x, p.velocity_y, p.jumping, p.on_ground,
+          p.direction, p.lives, p.score)
+    w.put(COUNT, len(m3.platforms))
+    for t in m3.platforms:
+        w.put(M3_RECT, *t.rect)
+    w.put(COUNT, len(m3.enemies))
+    for e in m3.enemies:
+        w.put(M3_ENEMY, e.rect.x, e.rect.y, e.velocity_x, e.direction, e.enemy_type == 'koopa')
+    w.put(COUNT, len(m3.coins))
+    for c in m3.coins:
+        w.put(M3_RECT, *c.rect)
+    w.put(M3_FLAG, flag is not None, *(flag.rect.topleft if flag else (0, 0)))
+    if boss is None:
+        w.put(M3_BOSS, False, 0, 0, 0, 0, 0, 0, 0)
+        w.put(COUNT, 0)
+    else:
+        w.put(M3_BOSS, True, BOSS_TYPES.index(boss.boss_type), boss.rect.x, boss.rect.y,
+              boss.velocity_x, boss.velocity_y, boss.health, boss.attack_timer)
+        w.put(COUNT, len(boss.projectiles))
+        for s in boss.projectiles:
+            w.put(M3_PROJECTILE, s.rect.x, s.rect.y, s.velocity_x, s.velocity_y,
+                  *s.image.get_at((0, 0))[:3])
+    _put_rng(w)
+
+
+def _load_mario3(m3, r):
+    p = m3.player
+    m3.game_state, m3.current_world, m3.current_level = r.get(M3_GAME)
+    (p.rect.x, p.rect.y, p.velocity_x, p.velocity_y, p.jumping, p.on_ground,
+     p.direction, p.lives, p.score) = r.get(M3_PLAYER)
+    m3.platforms.empty()
+    m3.platforms.add(*[m3.Platform(*r.get(M3_RECT)) for _ in range(r.count())])
+    m3.enemies.empty()
+    for _ in range(r.count()):
+        x, y, vx, direction, koopa = r.get(M3_ENEMY)
+        e = m3.Enemy(x, y, 'koopa' if koopa else 'goomba')
+        e.velocity_x, e.direction = vx, direction
+        m3.enemies.add(e)
+    m3.coins.empty()
+    for _ in range(r.count()):
+        x, y, _, _ = r.get(M3_RECT)
+        m3.coins.add(m3.Coin(x, y))
+    has_flag, x, y = r.get(M3_FLAG)
+    m3.flag_pole = m3.FlagPole(x, y) if has_flag else None
+    present, kind, x, y, vx, vy, health, attack_timer = r.get(M3_BOSS)
+    boss = None
+    if present:
+        boss = m3.Boss(BOSS_TYPES[kind])
+        boss.rect.topleft = (x, y)
+        boss.velocity_x, boss.velocity_y = vx, vy
+        boss.health, boss.attack_timer = health, attack_timer
+    for _ in range(r.count()):
+        x, y, vx, vy, *colour = r.get(M3_PROJECTILE)
+        s = m3.Projectile(0, 0, vx, vy, tuple(colour))
+        s.rect.topleft = (x, y)
+        boss.projectiles.add(s)
+    m3.boss = boss
+    _get_rng(r)
+
+
+CODECS = {1: (_dump_1_1, _load_1_1), 2: (_dump_mario3, _load_mario3)}
+
+
+# ------------------------------------------------------------------
+# Public API
+# ------------------------------------------------------------------
+def dumps(name, target):
+    """Snapshot `target` (a 1-1 Game, or the mario3 module) as bytes."""
+    game_id = GAME_IDS[name]
+    w = _Writer()
+    w.put(HEADER, MAGIC, VERSION, game_id, 0)
+    CODECS[game_id][0](target, w)
+    return bytes(w.buf)
+
+
+def loads(target, data):
+    """Restore `target` from a dumps() result (bytes, memoryview or mmap)."""
+    magic, version, game_id, _ = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION or game_id not in CODECS:
+        raise SaveStateError('not a save state this version can read')
+    CODECS[game_id][1](target, _Reader(data, HEADER.size))
+
+
+def save(path, name, target):
+    data = dumps(name, target)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+def load(path, target):
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        loads(target, data)
+
+
+def quickload(path, name, target):
+    """load() for the games' F9: a file this game can't take (an older format,
+    cut short, or saved before a level edit changed the blocks or goombas)
+    leaves `target` as it was. Returns the error, or None once loaded."""
+    before = dumps(name, target)
+    try:
+        load(path, target)
+    except (ValueError, struct.error) as e:     # SaveStateError is a ValueError
+        loads(target, before)
+        return e
+    return None
@@ -0,0 +1,287 @@
+"""
+High scores and run history in a local SQLite file, written off the game
+thread.
+
+A run is one go from the start of a game to its end (cleared, dead, or
+abandoned by starting another). It is recorded with its final score, and
+every level cleared on the way adds a split: the score and the ticks since
+the run started when that level was cleared.
+
+The game calls start(); splits and ends come from the EventBus: on_event()
+takes LEVEL_CLEAR as a split of level() (and the end of the run if that
+is the `last` level) and DEATH as the end. A death is only written when
+the next run starts (or at close()), since a rewind or quickload can take
+it back: a LEVEL_CLEAR after it carries on the same run.
+
+start(), split() and finish() only put a tuple on a queue. A writer thread
+opens the database, takes whatever has queued up (at most `batch` items,
+waiting up to `flush_interval` s for the first one) and commits it as one
+transaction, so disk time and fsyncs are paid per batch, never by a frame.
+The database is in WAL mode, so the leaderboard queries below read while
+the writer writes.
+
+    MARIO_SCORES=scores.db python 1-1.py     # the default; MARIO_SCORES= turns it off
+
+    scores = Scores.from_env('mario3', lambda: events.frame, level=lambda: f'{world}-{level}')
+    events.subscribe(scores.on_event)
+    scores.start()              # when a run begins
+    scores.top('1-1')           # [(score, ticks, run, when), ...] best first
+    scores.top()                # whole runs
+    scores.history()            # latest runs
+
+The top-N queries walk the (game, level, score DESC, ticks) and (game,
+score DESC, ticks) indexes and stop after N rows, so they cost the same
+with a few runs recorded or millions. Queued writes show up in them once
+the writer has committed them; flush() waits for that.
+
+    python -m engine.scores scores.db mario3 [level]    # print a leaderboard
+"""
+
+import atexit
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+from engine.events import DEATH, LEVEL_CLEAR
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    game TEXT NOT NULL,
+    started REAL NOT NULL,          -- unix time
+    ended REAL,                     -- NULL while the run is going
+    score INTEGER,
+    ticks INTEGER,                  -- simulation ticks from start to end
+    levels INTEGER NOT NULL DEFAULT 0,
+    outcome TEXT                    -- 'clear', 'dead' or 'quit'
+);
+CREATE TABLE IF NOT EXISTS splits (
+    run INTEGER NOT NULL REFERENCES runs(id),
+    game TEXT NOT NULL,
+    level TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    ticks INTEGER NOT NULL,         -- since the run started
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS splits_top ON splits (game, level, score DESC, ticks);
+CREATE INDEX IF NOT EXISTS runs_top ON runs (game, score DESC, ticks);
+CREATE INDEX IF NOT EXISTS runs_recent ON runs (game, started DESC);
+"""
+
+TOP_LEVEL = ('SELECT score, ticks, run, at FROM splits WHERE game = ? AND level = ? '
+             'ORDER BY score DESC, ticks LIMIT ?')
+TOP_RUNS = ('SELECT score, ticks, id, ended FROM runs WHERE game = ? AND ended IS NOT NULL '
+            'ORDER BY score DESC, ticks LIMIT ?')
+HISTORY = ('SELECT id, started, ended, score, ticks, levels, outcome FROM runs WHERE game = ? '
+           'ORDER BY started DESC LIMIT ?')
+
+
+def connect(path):
+    db = sqlite3.connect(path, timeout=30)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')    # WAL stays consistent; a crash may lose the last batch
+    db.executescript(SCHEMA)
+    return db
+
+
+class Scores:
+    def __init__(self, game, path=None, clock=None, level=None, last=None, batch=4096, flush_interval=0.5):
+        self.game = game
+        self.path = path
+        self.clock = clock or (lambda: 0)   # () -> current simulation tick
+        self.level = level or (lambda: game)  # () -> name of the level being played
+        self.last = last                    # level whose clear ends the run, None: only death does
+        self.batch = batch
+        self.flush_interval = flush_interval
+        self.run = None                     # this session's number for the run going on
+        self.runs = 0
+        self.levels = 0
+        self.score = 0                      # the run's score at its last split
+        self.started = 0                    # tick the run started on
+        self.death = None                   # (score, ticks, unix time) of the run's death, until the next start()
+        self.written = 0                    # items committed
+        self.error = None
+        self._queue = queue.SimpleQueue()   # (op, ...), None to stop
+        self._writer = None
+        self._reader = None
+
+    @classmethod
+    def from_env(cls, game, clock=None, level=None, last=None):
+        scores = cls(game, os.environ.get('MARIO_SCORES', 'scores.db') or None, clock, level, last)
+        if scores.path:
+            atexit.register(scores.close)
+        return scores
+
+    # ------------------------------------------------------------------
+    # Game thread
+    # ------------------------------------------------------------------
+    def start(self):
+        """A new run; one still going is recorded as dead if it died, else abandoned."""
+        if not self.path:
+            return
+        self._end()
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._run, name='scores-writer', daemon=True)
+            self._writer.start()
+        self.runs += 1
+        self.run = self.runs
+        self.levels = 0
+        self.score = 0
+        self.started = self.clock()
+        self._queue.put(('start', self.run, time.time()))
+
+    def on_event(self, kind, x, y, z, value):
+        """EventBus listener: `value` is the score on LEVEL_CLEAR and DEATH."""
+        if kind == LEVEL_CLEAR:
+            level = self.level()
+            self.split(level, value)
+            if level == self.last:
+                self.finish(value, 'clear')
+        elif kind == DEATH and self.run is not None:
+            self.death = (value, self.clock() - self.started, time.time())
+
+    def split(self, level, score):
+        """`level` cleared with `score` in the run going on."""
+        if self.run is None:
+            return
+        self.death = None
+        self.levels += 1
+        self.score = score
+        self._queue.put(('split', self.run, level, score, self.clock() - self.started, time.time()))
+
+    def finish(self, score, outcome, ticks=None, ended=None):
+        """End the run going on, if any; score None keeps the last split's, ticks and ended None are now."""
+        if self.run is None:
+            return
+        score = self.score if score is None else score
+        ticks = self.clock() - self.started if ticks is None else ticks
+        self._queue.put(('finish', self.run, score, ticks, self.levels, outcome, ended or time.time()))
+        self.run = None
+        self.death = None
+
+    def _end(self):
+        if self.death is not None:
+            score, ticks, ended = self.death
+            self.finish(score, 'dead', ticks, ended)
+        else:
+            self.finish(None, 'quit')
+
+    def flush(self):
+        """Wait until everything queued so far is committed."""
+        if self._writer is None:
+            return
+        done = threading.Event()
+        self._queue.put(('flush', done))
+        done.wait()
+
+    def close(self):
+        """Record the run going on (dead or abandoned), write out the queue, then stop."""
+        if self._writer is None:
+            return
+        self._end()
+        self._queue.put(None)
+        self._writer.join()
+        self._writer = None
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self.error is not None:
+            print(f'{self.game} scores: {self.error}')
+
+    # ------------------------------------------------------------------
+    # Queries (their own connection, on the calling thread)
+    # ------------------------------------------------------------------
+    def _read(self, sql, args):
+        if not self.path:
+            return []
+        if self._reader is None:
+            self._reader = connect(self.path)
+        return self._reader.execute(sql, args).fetchall()
+
+    def top(self, level=None, n=10):
+        """[(score, ticks, run id, unix time)] best first, for `level` or (None) whole runs."""
+        if level is None:
+            return self._read(TOP_RUNS, (self.game, n))
+        return self._read(TOP_LEVEL, (self.game, level, n))
+
+    def history(self, n=20):
+        """[(run id, started, ended, score, ticks, levels, outcome)] latest first."""
+        return self._read(HISTORY, (self.game, n))
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+    def _run(self):
+        try:
+            db = connect(self.path)
+        except sqlite3.Error as e:
+            self.error = e
+            return self._discard()
+        ids = {}        # this session's run number -> runs.id
+        stopping = False
+        while not stopping:
+            try:
+                items = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(items) < self.batch:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            flushed = []
+            try:
+                with db:
+                    for item in items:
+                        if item is None:
+                            stopping = True
+                        elif item[0] == 'flush':
+                            flushed.append(item[1])
+                        else:
+                            self._write(db, ids, item)
+                self.written += len(items) - len(flushed) - stopping
+            except (sqlite3.Error, KeyError) as e:
+                self.error = e      # the batch is lost; later ones may still go through
+            for done in flushed:
+                done.set()
+        db.close()
+
+    def _write(self, db, ids, item):
+        op, run, *values = item
+        if op == 'start':
+            ids[run] = db.execute('INSERT INTO runs (game, started) VALUES (?, ?)',
+                                  (self.game, values[0])).lastrowid
+        elif op == 'split':
+            level, score, ticks, at = values
+            db.execute('INSERT INTO splits VALUES (?, ?, ?, ?, ?, ?)',
+                       (ids[run], self.game, level, score, ticks, at))
+        else:
+            score, ticks, levels, outcome, ended = values
+            db.execute('UPDATE runs SET ended = ?, score = ?, ticks = ?, levels = ?, outcome = ? WHERE id = ?',
+                       (ended, score, ticks, levels, outcome, ids.pop(run)))
+
+    def _discard(self):
+        """No database: keep taking items so flush() and close() still return."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if item[0] == 'flush':
+                item[1].set()
+
+
+def main():
+    if len(sys.argv) < 3:
+        sys.exit('usage: python -m engine.scores SCORES.db GAME [LEVEL]')
+    path, game, level = sys.argv[1], sys.argv[2], (sys.argv[3:] or [None])[0]
+    scores = Scores(game, path)
+    print(f'{game} {"level " + level if level else "runs"}, best first:')
+    for i, (score, ticks, run, when) in enumerate(scores.top(level), 1):
+        print(f'{i:3}. {score:8}  {ticks / 60:8.2f} s  run {run}  {time.strftime("%Y-%m-%d %H:%M", time.localtime(when))}')
+
+
+if __name__ == '__main__':
+    main()
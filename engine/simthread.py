@@ -0,0 +1,144 @@
+"""
+Optional simulation thread: fixed-rate ticks on a thread of their own,
+drawn by the main thread from immutable snapshots.
+
+In the normal loop a frame that takes long to draw holds back the next
+simulation step. SimThread instead calls tick(keys, pressed) every 1/hz s
+on its own thread and, after each tick, snapshot(). The main thread keeps
+polling events (SDL wants that on the main thread), hands keys over with
+`keys` and send(), and draws whatever view() returns.
+
+A snapshot is a namedtuple of plain values and shared images, built after
+a tick and never changed afterwards. Whatever else both threads touch must
+be safe for it: particles queue their bursts and clears for update() on
+the render thread, and 1-1's Level holds a lock while apply() changes the
+static solids or draw() reads them. Publishing is one tuple assignment holding the last two snapshots: the
+render thread always reads a complete pair, while the simulation builds the
+next snapshot in its own third slot. view() blends the pair by how far the
+clock is between the two ticks, the same way Interpolator does in the
+single-thread loop. That needs a snapshot to have a `camera` x and
+`sprites`: (key, image, world x, world y) tuples, key being anything that
+identifies the same object from one snapshot to the next.
+
+The render thread's fills, blits and scales release the GIL. The switch
+interval is lowered while the thread runs, so Python-level drawing can't
+hold a tick back for the default 5 ms. A tick that is more than
+`max_behind` ticks late gives up the lost time instead of bursting to
+catch up, like FixedStep. setup(), if given, runs on the simulation thread
+before the first tick; the games attach the profiler there, so F8 samples
+the ticks rather than the drawing.
+
+    sim = SimThread(tick, game.snapshot, 60, setup=lambda: profiler.attach(tag))
+    sim.keys = pygame.key.get_pressed()
+    sim.start()
+    while running:
+        ... sim.send(event.key) for KEYDOWNs; sim.keys = pygame.key.get_pressed()
+        view, ticks = sim.view()
+        game.draw(screen, view)
+    sim.stop()
+
+MARIO_SIM_THREAD=1 turns it on in 1-1 and mario3.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+from engine.loop import SNAP
+
+
+def enabled():
+    return os.environ.get('MARIO_SIM_THREAD') == '1'
+
+
+def blend(prev, view, alpha):
+    """`view` with its camera and sprites moved back toward `prev` by 1 - alpha."""
+    if prev is None or alpha >= 1.0:
+        return view
+    beta = alpha - 1.0          # 0 draws the latest tick, -1 the one before
+    before = {sprite[0]: sprite for sprite in prev.sprites}
+    sprites = []
+    for sprite in view.sprites:
+        old = before.get(sprite[0])
+        if old is not None:
+            key, image, x, y = sprite
+            dx, dy = x - old[2], y - old[3]
+            if (dx or dy) and abs(dx) < SNAP and abs(dy) < SNAP:
+                sprite = (key, image, x + round(dx * beta), y + round(dy * beta))
+        sprites.append(sprite)
+    camera = view.camera
+    moved = camera - prev.camera
+    if moved and abs(moved) < SNAP:
+        camera += round(moved * beta)
+    return view._replace(camera=camera, sprites=sprites)
+
+
+class SimThread:
+    def __init__(self, tick, snapshot, hz=60, max_behind=5, switch_interval=0.001, setup=None):
+        self.tick = tick                # tick(keys, pressed): one simulation step
+        self.snapshot = snapshot        # () -> immutable snapshot of what to draw
+        self.setup = setup              # () called on the simulation thread before the first tick
+        self.dt = 1 / hz
+        self.max_behind = max_behind
+        self.switch_interval = switch_interval
+        self.keys = None                # latest pygame.key.get_pressed(), from the main thread
+        self.pressed = deque()          # KEYDOWN keys for the next tick
+        self.ticks = 0
+        self.skipped = 0                # ticks given up after a stall
+        self.late = deque(maxlen=4096)  # seconds each tick started after it was due
+        self.error = None
+        self._published = (0, 0.0, None, None)     # (tick, due time, previous, latest)
+        self._stop = threading.Event()
+        self._thread = None
+        self._interval = None
+
+    def start(self):
+        self._published = (0, time.perf_counter(), None, self.snapshot())
+        self._interval = sys.getswitchinterval()
+        sys.setswitchinterval(self.switch_interval)
+        self._thread = threading.Thread(target=self._run, name='simulation', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            sys.setswitchinterval(self._interval)
+
+    def send(self, key):
+        self.pressed.append(key)
+
+    def view(self):
+        """(latest snapshot blended toward the one before it for now, its tick number)."""
+        if self.error is not None:
+            raise self.error
+        ticks, due, prev, latest = self._published
+        alpha = min(1.0, max(0.0, (time.perf_counter() - due) / self.dt))
+        return blend(prev, latest, alpha), ticks
+
+    def _run(self):
+        due = time.perf_counter() + self.dt
+        pressed = self.pressed
+        try:
+            if self.setup is not None:
+                self.setup()
+            while not self._stop.is_set():
+                now = time.perf_counter()
+                if now < due:
+                    self._stop.wait(due - now)
+                    continue
+                if now - due > self.max_behind * self.dt:
+                    self.skipped += int((now - due) / self.dt)
+                    due = now
+                self.late.append(now - due)
+                keys = [pressed.popleft() for _ in range(len(pressed))]
+                self.tick(self.keys, keys)
+                latest = self.snapshot()
+                self.ticks += 1
+                self._published = (self.ticks, due, self._published[3], latest)
+                due += self.dt
+        except BaseException as e:
+            self.error = e
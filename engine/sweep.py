@@ -0,0 +1,165 @@
+"""
+Swept-AABB collision for the pygame games.
+
+The old movement code moved a rect by its whole velocity and then pushed
+it out of whatever it overlapped, solid by solid in list order. That makes
+the result depend on the order of the list, and anything thinner than one
+tick of movement can be skipped entirely. sweep() instead finds the
+earliest time of impact of the moving rect against the candidate solids
+in one pass, with the contact normal. move() uses it to stop the rect
+flush against the first thing in its way.
+
+Candidates are narrowed with a colliderect() against the area the move
+sweeps through; only those get an exact time of impact, which for a move
+along one axis is just the gap to the solid, in whole pixels. Solids the rect
+already overlaps before it moves are ignored, so a rect that starts inside
+something moves out of it instead of sticking.
+
+    hit = move(player.rect, 0, dy, level.near(player.rect))
+    if hit and hit.normal == (0, -1):     # landed
+        ...
+    block = hit.solids[0]                 # the one with the most overlap
+
+The games move one axis at a time (x, then y), which keeps every step
+exact in whole pixels.
+"""
+
+from collections import namedtuple
+
+from pygame import Rect
+
+# t: fraction of the move at impact; normal: the surface's outward normal;
+# solids: everything touched at t, most overlap across the move first, then
+# list order.
+Contact = namedtuple('Contact', 't normal solids')
+_contact = Contact._make
+
+
+def entry_time(rect, dx, dy, other):
+    """When `rect` moving by (dx, dy) starts overlapping `other`, and the axis (0/1), or None."""
+    if dx > 0:
+        tx = (other.left - rect.right) / dx
+        exit_x = (other.right - rect.left) / dx
+    elif dx < 0:
+        tx = (other.right - rect.left) / dx
+        exit_x = (other.left - rect.right) / dx
+    elif rect.left < other.right and other.left < rect.right:
+        tx, exit_x = float('-inf'), float('inf')
+    else:
+        return None
+    if dy > 0:
+        ty = (other.top - rect.bottom) / dy
+        exit_y = (other.bottom - rect.top) / dy
+    elif dy < 0:
+        ty = (other.bottom - rect.top) / dy
+        exit_y = (other.top - rect.bottom) / dy
+    elif rect.top < other.bottom and other.top < rect.bottom:
+        ty, exit_y = float('-inf'), float('inf')
+    else:
+        return None
+    t = max(tx, ty)
+    if t < 0 or t >= 1 or t >= min(exit_x, exit_y):
+        return None
+    return t, (0 if tx > ty else 1)
+
+
+def sweep(rect, dx, dy, solids):
+    """Earliest Contact of `rect` moving by (dx, dy) with `solids` (anything with a .rect), or None."""
+    if dx and dy:
+        return sweep_diagonal(rect, dx, dy, solids)
+    # along one axis: only the strip the move newly covers can be hit, and
+    # the time of impact is the gap to the solid's near edge
+    if dx > 0:
+        strip, normal = Rect(rect.right, rect.top, dx, rect.height), (-1, 0)
+    elif dx < 0:
+        strip, normal = Rect(rect.left + dx, rect.top, -dx, rect.height), (1, 0)
+    elif dy > 0:
+        strip, normal = Rect(rect.left, rect.bottom, rect.width, dy), (0, -1)
+    elif dy < 0:
+        strip, normal = Rect(rect.left, rect.top + dy, rect.width, -dy), (0, 1)
+    else:
+        return None
+    best, hits = None, None
+    for solid in solids:
+        other = solid.rect
+        if not strip.colliderect(other):
+            continue
+        if dx > 0:
+            gap = other.left - rect.right
+        elif dx < 0:
+            gap = rect.left - other.right
+        elif dy > 0:
+            gap = other.top - rect.bottom
+        else:
+            gap = rect.top - other.bottom
+        if gap < 0:     # already overlapping
+            continue
+        if hits is None or gap < best:
+            best, hits = gap, [solid]
+        elif gap == best:
+            hits.append(solid)
+    if hits is None:
+        return None
+    if len(hits) > 1:
+        by_overlap(rect, hits, normal[0] != 0)
+    return _contact((best / abs(dx or dy), normal, hits))
+
+
+def sweep_diagonal(rect, dx, dy, solids):
+    box = rect.union(rect.move(dx, dy))
+    best, axis, hits = 1.0, 0, []
+    for solid in solids:
+        if not box.colliderect(solid.rect):
+            continue
+        found = entry_time(rect, dx, dy, solid.rect)
+        if found is None:
+            continue
+        t, a = found
+        if t < best:
+            best, axis, hits = t, a, [solid]
+        elif t == best:
+            hits.append(solid)
+    if not hits:
+        return None
+    normal = (-1 if dx > 0 else 1, 0) if axis == 0 else (0, -1 if dy > 0 else 1)
+    by_overlap(rect, hits, axis == 0)
+    return Contact(best, normal, hits)
+
+
+def by_overlap(rect, hits, vertical):
+    """Sort `hits` by how much of rect they cover across the move, most first (stable)."""
+    if vertical:
+        hits.sort(key=lambda s: max(rect.top, s.rect.top) - min(rect.bottom, s.rect.bottom))
+    else:
+        hits.sort(key=lambda s: max(rect.left, s.rect.left) - min(rect.right, s.rect.right))
+
+
+def move(rect, dx, dy, solids):
+    """Move `rect` in place by (dx, dy), stopping at the first solid in the way.
+
+    On a hit the rect ends flush with it along the normal, the other axis
+    advanced by the same fraction of the move (truncated to whole pixels),
+    and the Contact is returned. Otherwise the rect moves the whole way and
+    the result is None.
+    """
+    hit = sweep(rect, dx, dy, solids)
+    if hit is None:
+        rect.move_ip(dx, dy)
+        return None
+    other = hit.solids[0].rect
+    nx, ny = hit.normal
+    if nx:
+        if dy:
+            rect.y += int(dy * hit.t)
+        if nx < 0:
+            rect.right = other.left
+        else:
+            rect.left = other.right
+    else:
+        if dx:
+            rect.x += int(dx * hit.t)
+        if ny < 0:
+            rect.bottom = other.top
+        else:
+            rect.top = other.bottom
+    return hit
@@ -0,0 +1,29 @@
+"""
+Rendered text that is only re-rendered when it changes.
+
+Font.render makes a new Surface every call, so a HUD drawn every frame
+renders the same string 60 times a second. Labels keeps the last surface
+per slot and hands it back while the text and colour stay the same:
+
+    labels = Labels(font)
+    screen.blit(labels.render('hud', 'TIME %03d' % time_left, WHITE), (20, 10))
+    screen.blit(labels.render('title', 'GAME OVER', RED), ...)
+
+Use a fixed slot for text that changes (one surface kept per slot) and
+the text itself for captions.
+"""
+
+
+class Labels:
+    def __init__(self, font, antialias=True):
+        self.font = font
+        self.antialias = antialias
+        self.slots = {}     # slot -> (text, colour, surface)
+
+    def render(self, slot, text, color):
+        cached = self.slots.get(slot)
+        if cached is not None and cached[0] == text and cached[1] == color:
+            return cached[2]
+        surface = self.font.render(text, self.antialias, color)
+        self.slots[slot] = (text, color, surface)
+        return surface
@@ -0,0 +1,184 @@
+"""
+Compact level entities for the pygame games.
+
+A Tile is three slots: a rect, a kind id and a reference to an image that
+is shared with every other tile of the same size and colour. There is no
+per-instance __dict__, no sprite-group bookkeeping and no private Surface,
+which is what makes 100k-tile levels cheap.
+
+TileGroup covers the parts of pygame.sprite.Group the games actually use
+(add/remove/empty, update, draw, collide) on a plain list. SpriteAdapter
+wraps a tile for the rare code path that really needs a Sprite.
+ColumnIndex buckets static tiles by column for nearby() collision queries
+and can be edited a tile at a time. merge_rects() turns many touching
+static rects into the few that collision needs.
+"""
+
+import pygame
+
+# Kind ids shared by the games, tools and observation encoders.
+EMPTY, GROUND, BRICK, QUESTION, USED, PIPE, GOOMBA, PLAYER = range(8)
+STAIR, PLATFORM, COIN, KOOPA, FLAG = range(8, 13)
+
+
+class Tile:
+    __slots__ = ('rect', 'kind', 'image')
+
+    def __init__(self, rect, kind, image):
+        self.rect = rect
+        self.kind = kind
+        self.image = image
+
+    def __repr__(self):
+        return f'<{type(self).__name__} kind={self.kind} {tuple(self.rect)}>'
+
+
+class TileGroup:
+    """List-backed stand-in for pygame.sprite.Group."""
+    __slots__ = ('items',)
+
+    def __init__(self, *items):
+        self.items = list(items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def add(self, *items):
+        self.items.extend(items)
+
+    def remove(self, *items):
+        for item in items:
+            if item in self.items:
+                self.items.remove(item)
+
+    def empty(self):
+        self.items.clear()
+
+    def update(self, *args):
+        for item in self.items:
+            item.update(*args)
+
+    def draw(self, surface, camera_x=0):
+        if camera_x:
+            surface.blits([(t.image, (t.rect.x - camera_x, t.rect.y)) for t in self.items], False)
+        else:
+            surface.blits([(t.image, t.rect) for t in self.items], False)
+
+    def collide(self, rect, dokill=False):
+        """Items overlapping `rect` (like spritecollide); dokill removes them."""
+        hits = [self.items[i] for i in rect.collidelistall([t.rect for t in self.items])]
+        if dokill and hits:
+            self.remove(*hits)
+        return hits
+
+
+class ColumnIndex:
+    """Static tiles bucketed by `width`-px column of the level.
+
+    nearby(rect) lists the tiles in the columns rect covers, in the order
+    they were added, so collision code that resolves against the first hit
+    behaves exactly as if it had walked the whole list. add() and remove()
+    touch only the columns of that tile.
+    """
+    __slots__ = ('width', 'buckets', 'order', 'serial')
+
+    def __init__(self, width=64, tiles=()):
+        self.width = width
+        self.buckets = {}
+        self.order = {}
+        self.serial = 0
+        for tile in tiles:
+            self.add(tile)
+
+    def _columns(self, rect):
+        return range(rect.left // self.width, (rect.right - 1) // self.width + 1)
+
+    def add(self, tile):
+        self.order[tile] = self.serial
+        self.serial += 1
+        for c in self._columns(tile.rect):
+            self.buckets.setdefault(c, []).append(tile)
+
+    def remove(self, tile):
+        del self.order[tile]
+        for c in self._columns(tile.rect):
+            self.buckets[c].remove(tile)
+
+    def nearby(self, rect):
+        c0, c1 = rect.left // self.width, (rect.right - 1) // self.width
+        buckets = self.buckets
+        if c0 == c1:
+            return buckets.get(c0, ())
+        found = set()
+        for c in range(c0, c1 + 1):
+            found.update(buckets.get(c, ()))
+        return sorted(found, key=self.order.__getitem__)
+
+
+def merge_rects(rects):
+    """The area `rects` cover, as few non-overlapping Rects as a greedy pass finds.
+
+    The plane is cut into cells at every rect edge. Each row of cells is
+    split into maximal filled runs, and a run grows down over the rows below
+    as long as they hold exactly the same run, so a pipe standing on a wider
+    ground strip stays its own rect. Runs come out top to bottom, left to right.
+    """
+    rects = [r for r in rects if r.width > 0 and r.height > 0]
+    xs = sorted({x for r in rects for x in (r.left, r.right)})
+    ys = sorted({y for r in rects for y in (r.top, r.bottom)})
+    col = {x: i for i, x in enumerate(xs)}
+    row = {y: j for j, y in enumerate(ys)}
+    width = len(xs) - 1
+    filled = [[False] * width for _ in range(len(ys) - 1)]
+    for r in rects:
+        i0, i1 = col[r.left], col[r.right]
+        for j in range(row[r.top], row[r.bottom]):
+            filled[j][i0:i1] = [True] * (i1 - i0)
+    merged = []
+    for j, line in enumerate(filled):
+        i = 0
+        while i < width:
+            if not line[i]:
+                i += 1
+                continue
+            i0 = i
+            while i < width and line[i]:
+                i += 1
+            line[i0:i] = [False] * (i - i0)
+            k = j + 1
+            while (k < len(filled) and all(filled[k][i0:i])
+                   and (i0 == 0 or not filled[k][i0 - 1]) and (i == width or not filled[k][i])):
+                filled[k][i0:i] = [False] * (i - i0)
+                k += 1
+            merged.append(pygame.Rect(xs[i0], ys[j], xs[i] - xs[i0], ys[k] - ys[j]))
+    return merged
+
+
+class SpriteAdapter(pygame.sprite.Sprite):
+    """A Sprite view of a tile; image and rect are the tile's own objects."""
+
+    def __init__(self, tile, *groups):
+        self.tile = tile
+        super().__init__(*groups)
+
+    @property
+    def image(self):
+        return self.tile.image
+
+    @property
+    def rect(self):
+        return self.tile.rect
+
+    def update(self, *args, **kwargs):
+        update = getattr(self.tile, 'update', None)
+        if update:
+            update(*args, **kwargs)
@@ -1,7 +1,20 @@
 import pygame
 import sys
+import math
 import random
 import os
+from collections import namedtuple
+from engine import savestate, simthread, sweep, tiles
+from engine.atlas import Atlas
+from engine.particles import Particles
+from engine.loop import FixedStep, Interpolator, LatencyMeter, render_fps
+from engine.capture import Recorder
+from engine.present import Presenter, display_mode
+from engine.profiler import Sampler
+from engine.text import Labels
+from engine.rewind import Rewind
+from engine.scores import Scores
+from engine.events import EventBus, PICKUP, STOMP, DAMAGE, DEATH, LEVEL_CLEAR, BOSS_HIT
 
 # Initialize pygame
 pygame.init()
@@ -20,15 +33,37 @@ BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 
 # Create the screen
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 pygame.display.set_caption("Super Mario PC Port")
 
 # Disable maximize button (this is OS-dependent and may not work on all systems)
-pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.NOFRAME)
+window = pygame.display.set_mode(*display_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.NOFRAME))
+
+# Everything is drawn at SCREEN_WIDTH x SCREEN_HEIGHT and scaled to the window
+# once per frame (MARIO_WINDOW=3840x2160, MARIO_SCALE=integer|fit|stretch|sdl)
+presenter = Presenter(window, (SCREEN_WIDTH, SCREEN_HEIGHT), capture=Recorder.from_env("mario3"))
+screen = presenter.target
 
 # Clock for controlling FPS
 clock = pygame.time.Clock()
-FPS = 60
+FPS = 60                    # simulation steps per second
+RENDER_FPS = render_fps()   # draw rate cap; MARIO_RENDER_FPS=0 for uncapped
+latency = LatencyMeter.from_env("mario3")   # MARIO_LATENCY=1 prints input-to-present latency on exit
+
+# Gameplay telemetry (MARIO_EVENT_LOG=run.jsonl to record)
+events = EventBus.from_env("mario3")
+particles = Particles()   # bursts on coin pickups and stomps
+events.subscribe(particles.on_event)
+# Runs and a split per level cleared, in scores.db (MARIO_SCORES= to turn off)
+scores = Scores.from_env("mario3", lambda: events.frame, lambda: f"{current_world}-{current_level}")
+events.subscribe(scores.on_event)
+
+# Quick save (F5) / load (F9) of the whole simulation state
+QUICKSAVE = "quicksave-mario3.msav"
+# Hold to step back through the last 60 seconds
+REWIND_KEY = pygame.K_BACKSPACE
+# Start/stop a sampling profile of the game loop (MARIO_PROFILE=out.folded records from start-up)
+PROFILE_KEY = pygame.K_F8
+profiler = Sampler.from_env("mario3")
 
 # Game states
 MENU = 0
@@ -36,6 +71,7 @@ PLAYING = 1
 GAME_OVER = 2
 LEVEL_COMPLETE = 3
 BOSS_FIGHT = 4
+STATE_NAMES = ("MENU", "PLAYING", "GAME_OVER", "LEVEL_COMPLETE", "BOSS_FIGHT")
 
 # Current game state
 game_state = MENU
@@ -44,8 +80,7 @@ game_state = MENU
 class Player(pygame.sprite.Sprite):
     def __init__(self):
         super().__init__()
-        self.image = pygame.Surface((30, 40))
-        self.image.fill(RED)
+        self.image = solid_surface(30, 40, RED)
         self.rect = self.image.get_rect()
         self.rect.x = 50
         self.rect.y = SCREEN_HEIGHT - 100
@@ -63,29 +98,16 @@ class Player(pygame.sprite.Sprite):
         if self.velocity_y > 10:
             self.velocity_y = 10
             
-        # Update position
-        self.rect.x += self.velocity_x
-        self.rect.y += self.velocity_y
-        
-        # Check for collisions with platforms
+        # Move one axis at a time, stopping flush at the first platform in
+        # the way (swept, so fast falls can't pass through thin platforms)
         self.on_ground = False
-        for platform in platforms:
-            if pygame.sprite.collide_rect(self, platform):
-                # Collision from top
-                if self.velocity_y > 0 and self.rect.bottom > platform.rect.top and self.rect.top < platform.rect.top:
-                    self.rect.bottom = platform.rect.top
-                    self.velocity_y = 0
-                    self.on_ground = True
-                    self.jumping = False
-                # Collision from bottom
-                elif self.velocity_y < 0 and self.rect.top < platform.rect.bottom and self.rect.bottom > platform.rect.bottom:
-                    self.rect.top = platform.rect.bottom
-                    self.velocity_y = 0
-                # Collision from sides
-                elif self.velocity_x > 0 and self.rect.right > platform.rect.left and self.rect.left < platform.rect.left:
-                    self.rect.right = platform.rect.left
-                elif self.velocity_x < 0 and self.rect.left < platform.rect.right and self.rect.right > platform.rect.right:
-                    self.rect.left = platform.rect.right
+        sweep.move(self.rect, self.velocity_x, 0, platforms)
+        dy = math.floor(self.velocity_y + 0.5)   # whole pixels, rounded like Rect does
+        if sweep.move(self.rect, 0, dy, platforms):
+            self.velocity_y = 0
+            if dy > 0:
+                self.on_ground = True
+                self.jumping = False
         
         # Keep player on screen
         if self.rect.left < 0:
@@ -117,28 +139,35 @@ class Player(pygame.sprite.Sprite):
     def stop(self):
         self.velocity_x = 0
 
-# Platform class
-class Platform(pygame.sprite.Sprite):
+# Display-format sprites, packed into sheets at start-up (see prepare_sprites)
+atlas = Atlas()
+
+def make_solid(width, height, color):
+    surface = pygame.Surface((width, height))
+    surface.fill(color)
+    return surface
+
+# Solid-colour surfaces are shared by every entity of the same size and colour
+def solid_surface(width, height, color):
+    return atlas.get((width, height, color), lambda: make_solid(width, height, color))
+
+# Platform class (slotted tile, shared image, kept in a TileGroup)
+class Platform(tiles.Tile):
+    __slots__ = ()
+
     def __init__(self, x, y, width, height, color=BROWN):
-        super().__init__()
-        self.image = pygame.Surface((width, height))
-        self.image.fill(color)
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
+        super().__init__(pygame.Rect(x, y, width, height), tiles.PLATFORM,
+                         solid_surface(width, height, color))
 
 # Enemy class
-class Enemy(pygame.sprite.Sprite):
+class Enemy(tiles.Tile):
+    __slots__ = ('velocity_x', 'enemy_type', 'direction')
+
     def __init__(self, x, y, enemy_type="goomba"):
-        super().__init__()
-        self.image = pygame.Surface((30, 30))
-        if enemy_type == "goomba":
-            self.image.fill(BROWN)
-        elif enemy_type == "koopa":
-            self.image.fill(GREEN)
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
+        if enemy_type == "koopa":
+            super().__init__(pygame.Rect(x, y, 30, 30), tiles.KOOPA, solid_surface(30, 30, GREEN))
+        else:
+            super().__init__(pygame.Rect(x, y, 30, 30), tiles.GOOMBA, solid_surface(30, 30, BROWN))
         self.velocity_x = -2
         self.enemy_type = enemy_type
         self.direction = -1  # Start moving left
@@ -167,15 +196,15 @@ class Enemy(pygame.sprite.Sprite):
 class Boss(pygame.sprite.Sprite):
     def __init__(self, boss_type):
         super().__init__()
-        self.image = pygame.Surface((60, 60))
-        
         # Different colors for different bosses
+        color = BLACK
         if boss_type == "bowser":
-            self.image.fill(RED)
+            color = RED
         elif boss_type == "king_boo":
-            self.image.fill(WHITE)
+            color = WHITE
         elif boss_type == "petey_piranha":
-            self.image.fill(GREEN)
+            color = GREEN
+        self.image = solid_surface(60, 60, color)
             
         self.rect = self.image.get_rect()
         self.rect.x = SCREEN_WIDTH - 100
@@ -224,8 +253,7 @@ class Boss(pygame.sprite.Sprite):
 class Projectile(pygame.sprite.Sprite):
     def __init__(self, x, y, velocity_x, velocity_y, color):
         super().__init__()
-        self.image = pygame.Surface((10, 10))
-        self.image.fill(color)
+        self.image = solid_surface(10, 10, color)
         self.rect = self.image.get_rect()
         self.rect.centerx = x
         self.rect.centery = y
@@ -241,30 +269,26 @@ class Projectile(pygame.sprite.Sprite):
             self.kill()
 
 # Coin class
-class Coin(pygame.sprite.Sprite):
+class Coin(tiles.Tile):
+    __slots__ = ()
+
     def __init__(self, x, y):
-        super().__init__()
-        self.image = pygame.Surface((15, 15))
-        self.image.fill(YELLOW)
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
+        super().__init__(pygame.Rect(x, y, 15, 15), tiles.COIN, solid_surface(15, 15, YELLOW))
 
 # Flag pole for level completion
 class FlagPole(pygame.sprite.Sprite):
     def __init__(self, x, y):
         super().__init__()
-        self.image = pygame.Surface((10, 100))
-        self.image.fill(RED)
+        self.image = solid_surface(10, 100, RED)
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
 
 # Create game objects
 player = Player()
-platforms = pygame.sprite.Group()
-enemies = pygame.sprite.Group()
-coins = pygame.sprite.Group()
+platforms = tiles.TileGroup()
+enemies = tiles.TileGroup()
+coins = tiles.TileGroup()
 flag_pole = None
 boss = None
 
@@ -275,6 +299,7 @@ level_complete = False
 
 # Font for text
 font = pygame.font.SysFont(None, 36)
+labels = Labels(font)   # HUD text, re-rendered only when it changes
 
 # Function to generate a level
 def generate_level(world, level):
@@ -284,6 +309,7 @@ def generate_level(world, level):
     platforms.empty()
     enemies.empty()
     coins.empty()
+    particles.clear()
     flag_pole = None
     boss = None
     
@@ -330,41 +356,68 @@ def generate_level(world, level):
     player.velocity_x = 0
     player.velocity_y = 0
 
+# Make every sprite the levels can use (platforms are 50-150 px wide) and pack them
+def prepare_sprites():
+    for width in range(50, 151):
+        solid_surface(width, 20, BROWN)
+    for width in (SCREEN_WIDTH, 200):
+        solid_surface(width, 20, BROWN)
+    for color in (RED, WHITE, GREEN):
+        solid_surface(60, 60, color)
+        solid_surface(10, 10, color)
+    for color in (BROWN, GREEN):
+        solid_surface(30, 30, color)
+    solid_surface(15, 15, YELLOW)
+    solid_surface(10, 100, RED)
+    solid_surface(30, 40, RED)
+    atlas.pack()
+
+prepare_sprites()
+
 # Generate the first level
 generate_level(current_world, current_level)
 
-# Main game loop
-running = True
-while running:
-    # Handle events
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-            
-        if event.type == pygame.KEYDOWN:
-            if game_state == MENU:
-                if event.key == pygame.K_RETURN:
-                    game_state = PLAYING
-                    generate_level(current_world, current_level)
-                    
-            elif game_state == PLAYING or game_state == BOSS_FIGHT:
-                if event.key == pygame.K_SPACE:
-                    player.jump()
-                if event.key == pygame.K_ESCAPE:
-                    game_state = MENU
-                    
-            elif game_state == GAME_OVER or game_state == LEVEL_COMPLETE:
-                if event.key == pygame.K_RETURN:
-                    if game_state == GAME_OVER:
-                        player.lives = 3
-                        player.score = 0
-                        current_world = 1
-                        current_level = 1
-                    game_state = PLAYING
-                    generate_level(current_world, current_level)
-    
-    # Get pressed keys for continuous movement
-    keys = pygame.key.get_pressed()
+# Handle one input event
+def handle_event(event):
+    global running, game_state, current_world, current_level
+    if event.type == pygame.QUIT:
+        running = False
+        
+    if event.type == pygame.KEYDOWN:
+        if event.key == PROFILE_KEY:
+            profiler.toggle()
+        elif event.key == pygame.K_F5:
+            savestate.save(QUICKSAVE, "mario3", sys.modules[__name__])
+        elif event.key == pygame.K_F9 and os.path.exists(QUICKSAVE):
+            error = savestate.quickload(QUICKSAVE, "mario3", sys.modules[__name__])
+            if error:
+                print(f"mario3 quickload: {error}")
+        elif game_state == MENU:
+            if event.key == pygame.K_RETURN:
+                game_state = PLAYING
+                generate_level(current_world, current_level)
+                if scores.run is None:
+                    scores.start()
+                
+        elif game_state == PLAYING or game_state == BOSS_FIGHT:
+            if event.key == pygame.K_SPACE:
+                player.jump()
+            if event.key == pygame.K_ESCAPE:
+                game_state = MENU
+                
+        elif game_state == GAME_OVER or game_state == LEVEL_COMPLETE:
+            if event.key == pygame.K_RETURN:
+                if game_state == GAME_OVER:
+                    player.lives = 3
+                    player.score = 0
+                    current_world = 1
+                    current_level = 1
+                    scores.start()
+                game_state = PLAYING
+                generate_level(current_world, current_level)
+
+# Continuous movement from the held keys
+def handle_keys(keys):
     if game_state == PLAYING or game_state == BOSS_FIGHT:
         if keys[pygame.K_LEFT]:
             player.move_left()
@@ -372,29 +425,35 @@ while running:
             player.move_right()
         else:
             player.stop()
-    
-    # Update game objects based on game state
+
+# Update game objects based on game state
+def update_game():
+    global game_state, current_world, current_level
     if game_state == PLAYING:
         player.update(platforms)
         enemies.update(platforms)
         
         # Check for coin collisions
-        coin_collisions = pygame.sprite.spritecollide(player, coins, True)
+        coin_collisions = coins.collide(player.rect, True)
         for coin in coin_collisions:
             player.score += 100
+            events.emit(PICKUP, coin.rect.centerx, coin.rect.centery, value=player.score)
             
         # Check for enemy collisions
-        enemy_collisions = pygame.sprite.spritecollide(player, enemies, False)
+        enemy_collisions = enemies.collide(player.rect)
         for enemy in enemy_collisions:
             # If player is falling on enemy
             if player.velocity_y > 0 and player.rect.bottom < enemy.rect.centery:
-                enemy.kill()
+                enemies.remove(enemy)
                 player.score += 200
                 player.velocity_y = -5  # Bounce
+                events.emit(STOMP, enemy.rect.centerx, enemy.rect.top, value=player.score)
             else:
                 player.lives -= 1
+                events.emit(DAMAGE, player.rect.centerx, player.rect.bottom, value=player.lives)
                 if player.lives <= 0:
                     game_state = GAME_OVER
+                    events.emit(DEATH, player.rect.centerx, player.rect.bottom, value=player.score)
                 else:
                     # Reset player position
                     player.rect.x = 50
@@ -405,6 +464,7 @@ while running:
         # Check for flag pole collision (level complete)
         if flag_pole and pygame.sprite.collide_rect(player, flag_pole):
             game_state = LEVEL_COMPLETE
+            events.emit(LEVEL_CLEAR, player.rect.centerx, player.rect.bottom, value=player.score)
             current_level += 1
             if current_level > 5:
                 current_level = 1
@@ -412,8 +472,9 @@ while running:
                 if current_world > 6:
                     current_world = 1  # Loop back to world 1 after completing all worlds
             
-        # Check if player reached the boss area
-        if current_level == 5 and player.rect.x > SCREEN_WIDTH - 200:
+        # Check if player reached the boss area (not when the flag of
+        # level 4 has just moved current_level on to the castle)
+        if game_state == PLAYING and current_level == 5 and player.rect.x > SCREEN_WIDTH - 200:
             game_state = BOSS_FIGHT
             
     elif game_state == BOSS_FIGHT:
@@ -425,8 +486,10 @@ while running:
             projectile_collisions = pygame.sprite.spritecollide(player, boss.projectiles, True)
             for projectile in projectile_collisions:
                 player.lives -= 1
+                events.emit(DAMAGE, player.rect.centerx, player.rect.bottom, value=player.lives)
                 if player.lives <= 0:
                     game_state = GAME_OVER
+                    events.emit(DEATH, player.rect.centerx, player.rect.bottom, value=player.score)
                 else:
                     # Reset player position
                     player.rect.x = 50
@@ -439,10 +502,12 @@ while running:
                 if player.velocity_y > 0 and player.rect.bottom < boss.rect.centery:
                     boss.health -= 1
                     player.velocity_y = -10  # Bounce higher
+                    events.emit(BOSS_HIT, boss.rect.centerx, boss.rect.top, value=boss.health)
                     if boss.health <= 0:
                         boss.kill()
                         player.score += 1000
                         game_state = LEVEL_COMPLETE
+                        events.emit(LEVEL_CLEAR, player.rect.centerx, player.rect.bottom, value=player.score)
                         current_level += 1
                         if current_level > 5:
                             current_level = 1
@@ -451,83 +516,193 @@ while running:
                                 current_world = 1  # Loop back to world 1 after completing all worlds
                 else:
                     player.lives -= 1
+                    events.emit(DAMAGE, player.rect.centerx, player.rect.bottom, value=player.lives)
                     if player.lives <= 0:
                         game_state = GAME_OVER
+                        events.emit(DEATH, player.rect.centerx, player.rect.bottom, value=player.score)
                     else:
                         # Reset player position
                         player.rect.x = 50
                         player.rect.y = SCREEN_HEIGHT - 100
                         player.velocity_x = 0
                         player.velocity_y = 0
-    
-    # Draw everything
+
+# What one frame shows, built after a step and never changed; with
+# MARIO_SIM_THREAD=1 the main thread draws it while the next steps run.
+# The last `over` sprites are drawn over the particles.
+View = namedtuple("View", "state camera sprites over lives score world level boss_health")
+
+def snapshot():
+    sprites, over = (), 0
+    if game_state == PLAYING or game_state == BOSS_FIGHT:
+        sprites = [(t, t.image, t.rect.x, t.rect.y) for group in (platforms, coins) for t in group]
+        if flag_pole:
+            sprites.append((flag_pole, flag_pole.image, flag_pole.rect.x, flag_pole.rect.y))
+        sprites += [(e, e.image, e.rect.x, e.rect.y) for e in enemies]
+        sprites.append((player, player.image, player.rect.x, player.rect.y))
+        if game_state == BOSS_FIGHT and boss:
+            top = [boss, *boss.projectiles]
+            sprites += [(s, s.image, s.rect.x, s.rect.y) for s in top]
+            over = len(top)
+        sprites = tuple(sprites)
+    return View(game_state, 0, sprites, over, player.lives, player.score,
+                current_world, current_level, boss.health if boss else 0)
+
+# Draw everything
+def draw_game(view=None):
+    view = view or snapshot()
+    game_state = view.state
     screen.fill(SKY_BLUE)
     
     if game_state == MENU:
         # Draw menu
-        title_text = font.render("SUPER MARIO PC PORT", True, RED)
-        instruction_text = font.render("Press ENTER to Start", True, WHITE)
+        title_text = labels.render("title", "SUPER MARIO PC PORT", RED)
+        instruction_text = labels.render("instruction", "Press ENTER to Start", WHITE)
         screen.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, 100))
         screen.blit(instruction_text, (SCREEN_WIDTH // 2 - instruction_text.get_width() // 2, 200))
         
     elif game_state == PLAYING or game_state == BOSS_FIGHT:
-        # Draw platforms
-        platforms.draw(screen)
-        
-        # Draw coins
-        coins.draw(screen)
-        
-        # Draw flag pole if it exists
-        if flag_pole:
-            screen.blit(flag_pole.image, flag_pole.rect)
-        
-        # Draw enemies
-        enemies.draw(screen)
-        
-        # Draw player
-        screen.blit(player.image, player.rect)
+        # Draw platforms, coins, the flag pole, enemies and the player
+        under = len(view.sprites) - view.over
+        screen.blits([(image, (x, y)) for _, image, x, y in view.sprites[:under]], False)
+
+        # Draw coin and stomp particles
+        particles.draw(screen)
         
-        # Draw boss if in boss fight
-        if game_state == BOSS_FIGHT and boss:
-            screen.blit(boss.image, boss.rect)
-            boss.projectiles.draw(screen)
+        # Draw boss and its projectiles if in boss fight
+        if view.over:
+            screen.blits([(image, (x, y)) for _, image, x, y in view.sprites[under:]], False)
             
             # Draw boss health
-            health_text = font.render(f"BOSS HP: {boss.health}", True, RED)
+            health_text = labels.render("health", f"BOSS HP: {view.boss_health}", RED)
             screen.blit(health_text, (SCREEN_WIDTH - 150, 20))
         
         # Draw HUD
-        lives_text = font.render(f"Lives: {player.lives}", True, WHITE)
-        score_text = font.render(f"Score: {player.score}", True, WHITE)
-        world_text = font.render(f"World {current_world}-{current_level}", True, WHITE)
+        lives_text = labels.render("lives", f"Lives: {view.lives}", WHITE)
+        score_text = labels.render("score", f"Score: {view.score}", WHITE)
+        world_text = labels.render("world", f"World {view.world}-{view.level}", WHITE)
         screen.blit(lives_text, (10, 10))
         screen.blit(score_text, (10, 50))
         screen.blit(world_text, (SCREEN_WIDTH - 100, 10))
         
     elif game_state == LEVEL_COMPLETE:
         # Draw level complete screen
-        complete_text = font.render("LEVEL COMPLETE!", True, GREEN)
-        next_text = font.render(f"Next: World {current_world}-{current_level}", True, WHITE)
-        instruction_text = font.render("Press ENTER to Continue", True, WHITE)
+        complete_text = labels.render("complete", "LEVEL COMPLETE!", GREEN)
+        next_text = labels.render("next", f"Next: World {view.world}-{view.level}", WHITE)
+        instruction_text = labels.render("instruction", "Press ENTER to Continue", WHITE)
         screen.blit(complete_text, (SCREEN_WIDTH // 2 - complete_text.get_width() // 2, 100))
         screen.blit(next_text, (SCREEN_WIDTH // 2 - next_text.get_width() // 2, 150))
         screen.blit(instruction_text, (SCREEN_WIDTH // 2 - instruction_text.get_width() // 2, 200))
         
     elif game_state == GAME_OVER:
         # Draw game over screen
-        game_over_text = font.render("GAME OVER", True, RED)
-        score_text = font.render(f"Final Score: {player.score}", True, WHITE)
-        instruction_text = font.render("Press ENTER to Restart", True, WHITE)
+        game_over_text = labels.render("game_over", "GAME OVER", RED)
+        score_text = labels.render("score", f"Final Score: {view.score}", WHITE)
+        instruction_text = labels.render("instruction", "Press ENTER to Restart", WHITE)
         screen.blit(game_over_text, (SCREEN_WIDTH // 2 - game_over_text.get_width() // 2, 100))
         screen.blit(score_text, (SCREEN_WIDTH // 2 - score_text.get_width() // 2, 150))
         screen.blit(instruction_text, (SCREEN_WIDTH // 2 - instruction_text.get_width() // 2, 200))
-    
-    # Update the display
-    pygame.display.flip()
-    
-    # Control the frame rate
-    clock.tick(FPS)
 
-# Quit pygame
-pygame.quit()
-sys.exit()
+# Main game loop
+# Everything that moves, for drawing in between simulation steps
+def moving():
+    items = [player, *enemies]
+    if boss:
+        items.append(boss)
+        items.extend(boss.projectiles)
+    return items
+
+
+def main():
+    global running
+    running = True
+    rewind = Rewind("mario3", sys.modules[__name__])
+
+    # Profile whichever thread runs the ticks
+    def attach():
+        profiler.attach(lambda: (STATE_NAMES[game_state], events.frame))
+
+    def tick(keys, pressed):
+        for event in pressed:
+            handle_event(event)
+        events.tick()
+        if keys[REWIND_KEY]:
+            rewind.step_back()
+        else:
+            handle_keys(keys)
+            update_game()
+            rewind.capture()
+
+    if simthread.enabled():
+        return run_threaded(tick, attach)
+    attach()
+    step = FixedStep(FPS)
+    interp = Interpolator(moving)
+    while running:
+        elapsed = clock.tick(RENDER_FPS) / 1000
+
+        # Handle events
+        polled = pygame.event.get()
+        latency.polled(sum(event.type == pygame.KEYDOWN for event in polled))
+        for event in polled:
+            handle_event(event)
+
+        # Simulate in fixed 60 Hz steps
+        keys = pygame.key.get_pressed()
+        for _ in range(step.advance(elapsed)):
+            interp.capture()
+            tick(keys, ())
+            particles.update()
+            latency.stepped()
+
+        # Draw between the last two steps
+        with interp.blended(step.alpha):
+            draw_game()
+
+        # Update the display
+        presenter.present()
+        latency.presented()
+
+    # Quit pygame
+    pygame.quit()
+    sys.exit()
+
+
+# tick() at 60 Hz on the simulation thread, after setup(); this one polls
+# and draws its Views
+def run_threaded(tick, setup):
+    sim = simthread.SimThread(tick, snapshot, FPS, setup=setup)
+    sim.keys = pygame.key.get_pressed()
+    sim.start()
+    seen = 0
+    while True:
+        clock.tick(RENDER_FPS)
+
+        # Input events go to the simulation, all but quitting and the profiler
+        polled = pygame.event.get()
+        latency.polled(sum(event.type == pygame.KEYDOWN for event in polled))
+        for event in polled:
+            if event.type == pygame.QUIT:
+                sim.stop()
+                pygame.quit()
+                sys.exit()
+            elif event.type == pygame.KEYDOWN and event.key == PROFILE_KEY:
+                profiler.toggle()
+            elif event.type == pygame.KEYDOWN:
+                sim.send(event)
+        sim.keys = pygame.key.get_pressed()
+
+        # Draw the latest View, blended toward the one before it
+        view, ticks = sim.view()
+        for _ in range(min(ticks - seen, 5)):
+            particles.update()
+        if ticks != seen:
+            latency.stepped()
+            seen = ticks
+        draw_game(view)
+        presenter.present()
+        latency.presented()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,25 @@
-import pygame, sys
+import math, pygame, sys
+from engine import sweep
+from engine.atlas import Atlas
+from engine.loop import FixedStep, Interpolator, LatencyMeter, render_fps
+from engine.capture import Recorder
+from engine.present import Presenter, display_mode
+from engine.profiler import Sampler
 
 # ========================
 # Initialization
 # ========================
 pygame.init()
 SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+window = pygame.display.set_mode(*display_mode((SCREEN_WIDTH, SCREEN_HEIGHT)))
+presenter = Presenter(window, (SCREEN_WIDTH, SCREEN_HEIGHT), capture=Recorder.from_env("mario4k"))   # MARIO_WINDOW=3840x2160 MARIO_SCALE=integer
+screen = presenter.target
 pygame.display.set_caption("Ultra Mario 2D Bros v0.x 1.0 - SMB1 Engine")
 clock = pygame.time.Clock()
-FPS = 60
+FPS = 60                   # simulation rate
+RENDER_FPS = render_fps()  # MARIO_RENDER_FPS=0 draws uncapped
+latency = LatencyMeter.from_env("mario4k")
+profiler = Sampler.from_env("mario4k")   # F8 starts/stops a profile; MARIO_PROFILE=out.folded from start-up
 
 # ========================
 # Constants
@@ -27,6 +38,9 @@ SKIN = (255, 220, 177)
 title_font = pygame.font.SysFont("Arial", 48, bold=True)
 menu_font = pygame.font.SysFont("Arial", 28, bold=True)
 
+# Display-format sprites, packed into sheets once everything below exists
+atlas = Atlas()
+
 # ========================
 # NES Mario sprite
 # ========================
@@ -52,7 +66,7 @@ def create_mario():
 class Player(pygame.sprite.Sprite):
     def __init__(self, x, y):
         super().__init__()
-        self.image = create_mario()
+        self.image = atlas.get("mario", create_mario)
         self.rect = self.image.get_rect(topleft=(x, y))
         self.vel_y = 0
         self.on_ground = False
@@ -71,23 +85,13 @@ class Player(pygame.sprite.Sprite):
             self.vel_y = 6
         dy += self.vel_y
 
-        # collisions
+        # collisions: swept one axis at a time, stopping flush at the first platform
         self.on_ground = False
-        self.rect.x += dx
-        for p in platforms:
-            if self.rect.colliderect(p.rect):
-                if dx > 0: self.rect.right = p.rect.left
-                if dx < 0: self.rect.left = p.rect.right
-        self.rect.y += dy
-        for p in platforms:
-            if self.rect.colliderect(p.rect):
-                if dy > 0:
-                    self.rect.bottom = p.rect.top
-                    self.vel_y = 0
-                    self.on_ground = True
-                if dy < 0:
-                    self.rect.top = p.rect.bottom
-                    self.vel_y = 0
+        sweep.move(self.rect, dx, 0, platforms)
+        dy = math.floor(dy + 0.5)   # whole pixels, rounded like Rect does
+        if sweep.move(self.rect, 0, dy, platforms):
+            self.vel_y = 0
+            if dy > 0: self.on_ground = True
 
     def jump(self):
         if self.on_ground:
@@ -97,10 +101,17 @@ class Player(pygame.sprite.Sprite):
 class Platform(pygame.sprite.Sprite):
     def __init__(self, x, y, w, h):
         super().__init__()
-        self.image = pygame.Surface((w, h))
-        self.image.fill(BROWN)
+        self.image = atlas.get(("platform", w, h), lambda: make_platform(w, h))
         self.rect = self.image.get_rect(topleft=(x, y))
 
+def make_platform(w, h):
+    surf = pygame.Surface((w, h))
+    surf.fill(BROWN)
+    return surf
+
+atlas.get("mario", create_mario); atlas.get(("platform", SCREEN_WIDTH, 40), lambda: make_platform(SCREEN_WIDTH, 40))
+atlas.pack()
+
 # ========================
 # Game Functions
 # ========================
@@ -108,28 +119,41 @@ def run_game():
     player = Player(50, SCREEN_HEIGHT-100)
     platforms = [Platform(0, SCREEN_HEIGHT-40, SCREEN_WIDTH, 40)]
 
+    step = FixedStep(FPS)
+    interp = Interpolator(lambda: [player])
+    profiler.attach(lambda: ("PLAYING", step.steps))
+
     running = True
     while running:
-        dt = clock.tick(FPS)
+        elapsed = clock.tick(RENDER_FPS) / 1000
         keys = pygame.key.get_pressed()
 
-        for e in pygame.event.get():
+        polled = pygame.event.get()
+        latency.polled(sum(e.type == pygame.KEYDOWN for e in polled))
+        for e in polled:
             if e.type == pygame.QUIT:
                 pygame.quit(); sys.exit()
             elif e.type == pygame.KEYDOWN:
                 if e.key == pygame.K_ESCAPE:
                     return MENU
+                elif e.key == pygame.K_F8:
+                    profiler.toggle()
                 elif e.key == pygame.K_z:   # Z jump trigger
                     player.jump()
 
-        # update
-        player.update(keys, platforms)
+        # update: fixed 60 Hz steps
+        for _ in range(step.advance(elapsed)):
+            interp.capture()
+            player.update(keys, platforms)
+            latency.stepped()
 
-        # draw
+        # draw, between the last two steps
         screen.fill(SKY_BLUE)
         for p in platforms: screen.blit(p.image, p.rect)
-        screen.blit(player.image, player.rect)
-        pygame.display.flip()
+        with interp.blended(step.alpha):
+            screen.blit(player.image, player.rect)
+        presenter.present()
+        latency.presented()
 
 def main():
     run_game()